@@ -0,0 +1,80 @@
+// Typeahead user picker (see myapp/lookup.py).
+// Markup: a .typeahead element with data-lookup-url, holding a text input
+// [data-typeahead-input], a hidden input [data-typeahead-value] that is
+// submitted, and a [data-typeahead-results] list.
+(function() {
+    const DELAY_MS = 200;
+
+    function label(user) {
+        let text = user.name === user.username ? user.username : user.name + ' (' + user.username + ')';
+        if (user.location) {
+            text += ' - ' + user.location;
+        }
+        if (user.open_inspections !== undefined) {
+            text += ' - ' + user.open_inspections + ' open';
+        }
+        return text;
+    }
+
+    function attach(box) {
+        const input = box.querySelector('[data-typeahead-input]');
+        const value = box.querySelector('[data-typeahead-value]');
+        const list = box.querySelector('[data-typeahead-results]');
+        const url = box.dataset.lookupUrl;
+        let timer = null;
+        let pending = null;
+
+        function clear() {
+            list.innerHTML = '';
+        }
+
+        function show(users) {
+            clear();
+            users.forEach(function(user) {
+                const item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'list-group-item list-group-item-action';
+                item.textContent = label(user);
+                item.addEventListener('click', function() {
+                    input.value = user.name;
+                    value.value = user.id;
+                    clear();
+                });
+                list.appendChild(item);
+            });
+        }
+
+        input.addEventListener('input', function() {
+            // Typing invalidates the previous pick
+            value.value = '';
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                clear();
+                return;
+            }
+            timer = setTimeout(function() {
+                if (pending) {
+                    pending.abort();
+                }
+                pending = new AbortController();
+                const sep = url.indexOf('?') === -1 ? '?' : '&';
+                fetch(url + sep + 'q=' + encodeURIComponent(query), {
+                    credentials: 'same-origin',
+                    signal: pending.signal,
+                })
+                    .then(function(response) { return response.ok ? response.json() : {results: []}; })
+                    .then(function(data) { show(data.results); })
+                    .catch(function() {});
+            }, DELAY_MS);
+        });
+
+        document.addEventListener('click', function(event) {
+            if (!box.contains(event.target)) {
+                clear();
+            }
+        });
+    }
+
+    document.querySelectorAll('.typeahead[data-lookup-url]').forEach(attach);
+})();
@@ -6,7 +6,8 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ubr.settings')
+    # UBR_ENV=production selects ubr/settings_production.py
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ubr.settings_production' if os.environ.get('UBR_ENV') == 'production' else 'ubr.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -2,7 +2,10 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from .models import Profile
-from .models import InspectionRequest, InspectionReport, Complaint, Message, Payment, AdminBalance
+from .models import InspectionRequest, InspectionReport, Complaint, Message, Payment, AdminBalance, Job, Broadcast, AuditLog
+from .models import ArchivedInspectionRequest, ArchivedMessage, FeeRule, InspectorAvailability, InspectorTimeOff
+from . import archive, fees, scheduling
+from .paginators import EstimatedCountPaginator
 
 
 class ProfileInline(admin.StackedInline):
@@ -21,6 +24,20 @@ class CustomUserAdmin(UserAdmin):
     inlines = (ProfileInline,)
 
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables that grow to millions of rows.
+
+    Page counts come from table statistics instead of COUNT(*) (see
+    myapp/paginators.py), the "N total" count and filter facets are off, and
+    subclasses pick users with autocomplete widgets rather than a <select>
+    listing every account.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+
 # Unregister the default User admin and register our custom one
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
@@ -28,9 +45,11 @@ admin.site.register(User, CustomUserAdmin)
 
 # Register Profile separately
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(LargeTableAdmin):
     list_display = ('user', 'user_type', 'bio_preview')  # removed 'location'
     search_fields = ('user__username', 'user_type')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     
     def bio_preview(self, obj):
         """Show first 50 characters of bio"""
@@ -42,32 +61,144 @@ class ProfileAdmin(admin.ModelAdmin):
 
 # Register new models
 @admin.register(InspectionRequest)
-class InspectionRequestAdmin(admin.ModelAdmin):
-    list_display = ('id', 'owner', 'building_location', 'status', 'inspector', 'created_at')
+class InspectionRequestAdmin(LargeTableAdmin):
+    list_display = ('id', 'owner', 'building_location', 'status', 'inspector', 'appointment_start', 'created_at')
     list_filter = ('status', 'req_type')
+    list_select_related = ('owner', 'inspector')
+    autocomplete_fields = ('owner', 'inspector')
+    date_hierarchy = 'created_at'
+    actions = ('schedule_appointments',)
+
+    @admin.action(description='Book appointments for all assigned, unscheduled requests')
+    def schedule_appointments(self, request, queryset):
+        booked, unbooked = scheduling.schedule_backlog()
+        self.message_user(request, f'Booked {booked} appointment(s); {unbooked} found no free slot.')
 
 
 @admin.register(InspectionReport)
-class InspectionReportAdmin(admin.ModelAdmin):
+class InspectionReportAdmin(LargeTableAdmin):
     list_display = ('inspection_request', 'inspector', 'inspection_date', 'decision')
+    # InspectionRequest.__str__ shows the owner's username
+    list_select_related = ('inspection_request__owner', 'inspector')
+    raw_id_fields = ('inspection_request',)
+    autocomplete_fields = ('inspector',)
 
 
 @admin.register(Complaint)
-class ComplaintAdmin(admin.ModelAdmin):
+class ComplaintAdmin(LargeTableAdmin):
     list_display = ('reporter', 'against_inspector', 'resolved', 'created_at')
     list_filter = ('resolved',)
+    list_select_related = ('reporter', 'against_inspector')
+    autocomplete_fields = ('reporter', 'against_inspector')
+    date_hierarchy = 'created_at'
 
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(LargeTableAdmin):
     list_display = ('sender', 'recipient', 'sent_at', 'is_read')
+    list_select_related = ('sender', 'recipient')
+    autocomplete_fields = ('sender', 'recipient')
+    date_hierarchy = 'sent_at'
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdmin):
     list_display = ('payer', 'amount', 'inspection_request', 'created_at')
+    list_select_related = ('payer', 'inspection_request__owner')
+    raw_id_fields = ('inspection_request',)
+    autocomplete_fields = ('payer',)
+    date_hierarchy = 'created_at'
+
+
+@admin.register(FeeRule)
+class FeeRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'req_type', 'zone', 'min_floors', 'max_floors', 'min_area', 'max_area',
+                    'base_fee', 'per_floor', 'per_square_metre', 'priority', 'effective_from', 'effective_to')
+    list_filter = ('req_type',)
+    search_fields = ('name', 'zone')
+    actions = ('recompute_pending_fees',)
+
+    @admin.action(description='Reprice all pending requests with the current rules')
+    def recompute_pending_fees(self, request, queryset):
+        fees.schedule_recompute()
+        self.message_user(request, 'Pending requests are being repriced.')
+
+
+@admin.register(InspectorAvailability)
+class InspectorAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ('inspector', 'weekday', 'start_time', 'end_time')
+    list_filter = ('weekday',)
+    list_select_related = ('inspector',)
+    autocomplete_fields = ('inspector',)
+
+
+@admin.register(InspectorTimeOff)
+class InspectorTimeOffAdmin(admin.ModelAdmin):
+    list_display = ('inspector', 'start', 'end', 'reason')
+    list_select_related = ('inspector',)
+    autocomplete_fields = ('inspector',)
+    date_hierarchy = 'start'
 
 
 @admin.register(AdminBalance)
 class AdminBalanceAdmin(admin.ModelAdmin):
     list_display = ('balance',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'priority', 'run_at', 'attempts', 'locked_by')
+    list_filter = ('status', 'task')
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'audience', 'sender', 'sent_at')
+    list_filter = ('audience',)
+
+
+@admin.register(AuditLog)
+class AuditLogAdmin(LargeTableAdmin):
+    list_display = ('created_at', 'actor', 'action', 'target', 'affected')
+    list_filter = ('action',)
+    list_select_related = ('actor',)
+    autocomplete_fields = ('actor',)
+    date_hierarchy = 'created_at'
+
+
+class ArchiveAdmin(LargeTableAdmin):
+    """
+    Read-only changelist over an archive table (see myapp/archive.py), with
+    an action that moves the selected rows back to the hot table.
+    """
+    actions = ('restore_selected',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description='Restore selected rows to the live tables')
+    def restore_selected(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
+        if self.model is ArchivedMessage:
+            restored = archive.restore_messages(ids)
+        else:
+            restored = archive.restore_requests(ids)
+        self.message_user(request, f'Restored {restored} row(s).')
+
+
+@admin.register(ArchivedInspectionRequest)
+class ArchivedInspectionRequestAdmin(ArchiveAdmin):
+    list_display = ('id', 'owner', 'building_location', 'status', 'inspector', 'created_at', 'archived_at')
+    list_filter = ('status',)
+    list_select_related = ('owner', 'inspector')
+    date_hierarchy = 'archived_at'
+
+
+@admin.register(ArchivedMessage)
+class ArchivedMessageAdmin(ArchiveAdmin):
+    list_display = ('sender', 'recipient', 'subject', 'sent_at', 'archived_at')
+    list_select_related = ('sender', 'recipient')
+    date_hierarchy = 'archived_at'
@@ -0,0 +1,228 @@
+"""
+Time-series revenue and throughput analytics for the admin analytics page.
+
+Every metric is grouped into day/week/month buckets on the database side.
+A bucket that has closed (its end is in the past) no longer changes, so its
+result is cached under a per-bucket key and never recomputed; only the
+current open bucket, plus any closed bucket missing from the cache, is
+queried on each request.
+
+Closed requests with their reports and payments move to the archive tables
+(myapp/archive.py) while still inside the charted range, so every metric
+is aggregated over the live and the archive table and combined here.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, DateField, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import (
+    ArchivedInspectionReport, ArchivedInspectionRequest, ArchivedPayment, InspectionReport,
+    InspectionRequest, Payment,
+)
+
+GRANULARITIES = ('day', 'week', 'month')
+MAX_PERIODS = 366
+# Closed buckets are immutable, the timeout only bounds cache growth
+CLOSED_BUCKET_TIMEOUT = 60 * 60 * 24 * 7
+# v2: buckets include archived rows
+CACHE_PREFIX = 'analytics:v2'
+ARCHIVES = {
+    Payment: ArchivedPayment,
+    InspectionRequest: ArchivedInspectionRequest,
+    InspectionReport: ArchivedInspectionReport,
+}
+
+
+def bucket_start(day, granularity):
+    """Return the first day of the bucket containing ``day``."""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        # ISO weeks start on Monday, matching Trunc('week')
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_bucket(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+def bucket_starts(granularity, periods, today=None):
+    """Return the last ``periods`` bucket starts, oldest first, ending with the open one."""
+    current = bucket_start(today or timezone.localdate(), granularity)
+    starts = [current]
+    for _ in range(periods - 1):
+        starts.append(bucket_start(starts[-1] - timedelta(days=1), granularity))
+    starts.reverse()
+    return starts
+
+
+def _as_datetime(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _empty_bucket(start):
+    return {
+        'bucket': start.isoformat(),
+        'payments': 0,
+        'revenue': '0.00',
+        'requests_created': 0,
+        'reports_filed': 0,
+        'avg_turnaround_hours': None,
+        'inspectors': [],
+    }
+
+
+def _live_and_archived(model):
+    # Closed requests and their reports and payments move to the archive
+    # tables after ARCHIVE_AFTER_DAYS (myapp/archive.py); both count
+    return (model, ARCHIVES[model])
+
+
+def _compute_buckets(granularity, starts):
+    """Aggregate every metric for the given bucket starts in one pass per table.
+
+    ``starts`` must be sorted; the queried range spans from the first start
+    to the end of the last bucket, so a contiguous run costs one query per
+    source table (live and archive) regardless of how many buckets it covers.
+    """
+    wanted = set(starts)
+    results = {start: _empty_bucket(start) for start in starts}
+    lo = _as_datetime(starts[0])
+    hi = _as_datetime(next_bucket(starts[-1], granularity))
+
+    def bucket(field):
+        return Trunc(field, granularity, output_field=DateField())
+
+    revenue = {}
+    for model in _live_and_archived(Payment):
+        # SQL: SELECT DATE_TRUNC(%s, created_at) AS bucket, COUNT(*), SUM(amount)
+        #      FROM payment WHERE created_at >= %s AND created_at < %s GROUP BY bucket
+        payment_rows = (model.objects.filter(created_at__gte=lo, created_at__lt=hi)
+                        .annotate(b=bucket('created_at')).values('b')
+                        .annotate(n=Count('id'), revenue=Sum('amount')).order_by())
+        for row in payment_rows:
+            if row['b'] in wanted:
+                results[row['b']]['payments'] += row['n']
+                revenue[row['b']] = revenue.get(row['b'], 0) + row['revenue']
+    for start, amount in revenue.items():
+        results[start]['revenue'] = f"{amount:.2f}"
+
+    for model in _live_and_archived(InspectionRequest):
+        request_rows = (model.objects.filter(created_at__gte=lo, created_at__lt=hi)
+                        .annotate(b=bucket('created_at')).values('b')
+                        .annotate(n=Count('id')).order_by())
+        for row in request_rows:
+            if row['b'] in wanted:
+                results[row['b']]['requests_created'] += row['n']
+
+    # Turnaround: request created_at -> report inspection_date, bucketed by filing date
+    turnaround = ExpressionWrapper(
+        F('inspection_date') - F('inspection_request__created_at'), output_field=DurationField())
+    # bucket: [reports, total turnaround]
+    turnarounds = {}
+    # (bucket, inspector_id, username): [reports, approved, rejected]
+    per_inspector = {}
+    for model in _live_and_archived(InspectionReport):
+        report_rows = (model.objects.filter(inspection_date__gte=lo, inspection_date__lt=hi)
+                       .annotate(b=bucket('inspection_date')).values('b')
+                       .annotate(n=Count('id'), turnaround=Avg(turnaround)).order_by())
+        for row in report_rows:
+            if row['b'] in wanted:
+                results[row['b']]['reports_filed'] += row['n']
+                if row['turnaround'] is not None:
+                    totals = turnarounds.setdefault(row['b'], [0, timedelta()])
+                    totals[0] += row['n']
+                    totals[1] += row['turnaround'] * row['n']
+
+        inspector_rows = (model.objects
+                          .filter(inspection_date__gte=lo, inspection_date__lt=hi, inspector__isnull=False)
+                          .annotate(b=bucket('inspection_date'))
+                          .values('b', 'inspector_id', 'inspector__username')
+                          .annotate(total=Count('id'),
+                                    approved=Count('id', filter=Q(decision='Approved')),
+                                    rejected=Count('id', filter=Q(decision='Rejected')))
+                          .order_by())
+        for row in inspector_rows:
+            if row['b'] in wanted:
+                counts = per_inspector.setdefault((row['b'], row['inspector_id'], row['inspector__username']),
+                                                  [0, 0, 0])
+                counts[0] += row['total']
+                counts[1] += row['approved']
+                counts[2] += row['rejected']
+    for start, (reports, total) in turnarounds.items():
+        results[start]['avg_turnaround_hours'] = round(total.total_seconds() / reports / 3600, 2)
+
+    # Approval rate per inspector, ranked within each bucket like RANK() (ties
+    # share a rank); ranked here, once live and archived counts are combined
+    for (start, inspector_id, username), (total, approved, rejected) in per_inspector.items():
+        results[start]['inspectors'].append({
+            'inspector_id': inspector_id,
+            'username': username,
+            'reports': total,
+            'approved': approved,
+            'rejected': rejected,
+            'approval_rate': round(approved / total, 4),
+        })
+    for start in results:
+        inspectors = results[start]['inspectors']
+        inspectors.sort(key=lambda row: (-row['approved'] / row['reports'], row['username']))
+        for position, row in enumerate(inspectors):
+            previous = inspectors[position - 1] if position else None
+            if previous is None or previous['approved'] / previous['reports'] != row['approved'] / row['reports']:
+                rank = position + 1
+            row['rank'] = rank
+    return results
+
+
+def _cache_key(granularity, start):
+    return f'{CACHE_PREFIX}:{granularity}:{start.isoformat()}'
+
+
+def time_series(granularity='day', periods=30):
+    """Return ``periods`` buckets of metrics, oldest first.
+
+    Closed buckets come from the cache when present; the open bucket is
+    always recomputed and never cached.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {", ".join(GRANULARITIES)}')
+    periods = max(1, min(int(periods), MAX_PERIODS))
+    starts = bucket_starts(granularity, periods)
+    open_start = starts[-1]
+    closed = starts[:-1]
+
+    cached = cache.get_many([_cache_key(granularity, s) for s in closed])
+    buckets = {}
+    missing = []
+    for start in closed:
+        hit = cached.get(_cache_key(granularity, start))
+        if hit is None:
+            missing.append(start)
+        else:
+            buckets[start] = hit
+
+    if missing:
+        # One ranged query covering the oldest missing bucket up to the open one
+        computed = _compute_buckets(granularity, missing + [open_start])
+        cache.set_many({_cache_key(granularity, s): computed[s] for s in missing},
+                       CLOSED_BUCKET_TIMEOUT)
+        buckets.update(computed)
+    else:
+        buckets.update(_compute_buckets(granularity, [open_start]))
+
+    return {
+        'granularity': granularity,
+        'open_bucket': open_start.isoformat(),
+        'cached_buckets': len(closed) - len(missing),
+        'buckets': [buckets[s] for s in starts],
+    }
@@ -0,0 +1,327 @@
+"""
+Read-only JSON API (v1) for the field tablets.
+
+``GET /api/v1/<resource>/`` lists requests, reports, messages or payments
+visible to the logged-in user; ``GET /api/v1/<resource>/<pk>/`` returns one.
+
+* ``?fields=id,status`` picks the returned fields; without it the resource's
+  default fields are returned (large text fields are opt-in).
+* Keyset pagination, newest first: ``?limit=`` (default 50, max 200) and
+  ``?before=<id>``; the response's ``next`` holds the URL of the next page.
+  Unlike OFFSET, a page costs the same however deep the client scrolls.
+* Archived requests, reports, messages and payments (myapp/archive.py keeps
+  their ids) are listed and looked up alongside the live ones.
+* Rows are read with ``values()`` over exactly the requested columns and
+  serialised as compact JSON, no model instances are built.
+* Responses carry an ETag derived from the user's data versions
+  (myapp/data_versions.py), so an unchanged page revalidates with a 304
+  before any row is queried; outside AUTH_CACHE_MODE 'revalidate' the ETag
+  is a hash of the body. Responses are gzipped for clients that accept it.
+
+Offline clients use ``/api/v1/sync/`` instead, see myapp/sync.py.
+
+The API authenticates with the session cookie, so the one write,
+``POST /api/v1/sync/reports/``, passes Django's CSRF check like a form:
+send the ``csrftoken`` cookie's value in an ``X-CSRFToken`` header. Every
+``GET /api/v1/sync/`` sets that cookie. Over HTTPS Django also wants an
+``Origin`` (or ``Referer``) header naming this site.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
+
+from . import data_versions, db_router
+from .decorators import revalidating
+from .models import (
+    ArchivedInspectionReport, ArchivedInspectionRequest, ArchivedMessage, ArchivedPayment,
+    InspectionReport, InspectionRequest, Message, Payment,
+)
+
+VERSION = 'v1'
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+MAX_SYNC_BATCH = 50
+
+
+class Resource:
+    """Describes one API resource: public field names mapped to ORM paths."""
+
+    def __init__(self, model, fields, default_fields, scope, archive_model=None):
+        self.model = model
+        self.fields = fields
+        self.default_fields = default_fields
+        # scope(user) -> Q limiting rows to those the user may see
+        self.scope = scope
+        # Archive table with the same fields and ids (myapp/archive.py)
+        self.archive_model = archive_model
+
+    def querysets(self, user):
+        """The user's rows in the live table, then in the archive table."""
+        return [self.queryset(user, model) for model in (self.model, self.archive_model) if model is not None]
+
+    def queryset(self, user, model=None):
+        qs = (model or self.model).objects.all()
+        q = self.scope(user)
+        return qs if q is None else qs.filter(q)
+
+
+def _staff_or(q):
+    return lambda user: None if user.is_staff else q(user)
+
+
+RESOURCES = {
+    'requests': Resource(
+        InspectionRequest,
+        fields={
+            'id': 'id', 'type': 'req_type', 'location': 'building_location', 'fee': 'fee',
+            'status': 'status', 'created_at': 'created_at', 'updated_at': 'updated_at',
+            'owner': 'owner__username', 'inspector': 'inspector__username', 'report_id': 'report__id',
+            'appointment_start': 'appointment_start', 'appointment_end': 'appointment_end',
+        },
+        default_fields=('id', 'type', 'location', 'fee', 'status', 'created_at', 'inspector', 'report_id'),
+        scope=_staff_or(lambda user: Q(owner=user) | Q(inspector=user)),
+        archive_model=ArchivedInspectionRequest,
+    ),
+    'reports': Resource(
+        InspectionReport,
+        fields={
+            'id': 'id', 'request_id': 'inspection_request_id', 'inspector': 'inspector__username',
+            'inspection_date': 'inspection_date', 'decision': 'decision', 'updated_at': 'updated_at',
+            'structural_evaluation': 'structural_evaluation',
+            'compliance_checklist': 'compliance_checklist', 'remarks': 'remarks',
+        },
+        default_fields=('id', 'request_id', 'inspector', 'inspection_date', 'decision', 'updated_at'),
+        scope=_staff_or(lambda user: Q(inspection_request__owner=user) | Q(inspector=user)),
+        archive_model=ArchivedInspectionReport,
+    ),
+    'messages': Resource(
+        Message,
+        fields={
+            'id': 'id', 'sender': 'sender__username', 'subject': 'subject', 'body': 'body',
+            'sent_at': 'sent_at', 'is_read': 'is_read', 'updated_at': 'updated_at',
+        },
+        default_fields=('id', 'sender', 'subject', 'sent_at', 'is_read'),
+        # The inbox is personal, staff included
+        scope=lambda user: Q(recipient=user),
+        archive_model=ArchivedMessage,
+    ),
+    'payments': Resource(
+        Payment,
+        fields={
+            'id': 'id', 'request_id': 'inspection_request_id', 'amount': 'amount', 'created_at': 'created_at',
+        },
+        default_fields=('id', 'request_id', 'amount', 'created_at'),
+        scope=_staff_or(lambda user: Q(payer=user)),
+        archive_model=ArchivedPayment,
+    ),
+}
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _selected_fields(request, resource):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(resource.default_fields)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. "
+                         f"Available: {', '.join(resource.fields)}")
+    return names
+
+
+def _rows(qs, resource, names):
+    """Project ``qs`` onto ``names`` with values(); returns ``[(id, row), ...]``."""
+    paths = [resource.fields[name] for name in names]
+    if 'id' not in paths:
+        # The cursor needs the id even when the client didn't ask for it
+        paths.append('id')
+    return [(values['id'], {name: values[resource.fields[name]] for name in names})
+            for values in qs.values(*paths)]
+
+
+def _json_response(payload):
+    content = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    response = HttpResponse(content, content_type='application/json')
+    # Clients may keep the body but must revalidate it before reuse
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _not_modified(request, etag):
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = 'private, no-cache'
+    return not_modified
+
+
+def _conditional(view_func):
+    """ETag from the data versions of the user, checked before the view queries anything.
+
+    Every row a user can list bumps their scope when it changes; staff list
+    everyone's requests, reports and payments, so theirs also depends on the
+    admin scope. A page read from a replica is validated by a hash of its
+    body instead: the versions are bumped on the primary's commit and must
+    not be paired with a lagging replica's rows. So is every page outside
+    AUTH_CACHE_MODE 'revalidate', where the versions may live in a
+    per-process cache that never sees the workers' bumps.
+    """
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not revalidating():
+            return _body_etag(request, view_func(request, *args, **kwargs))
+        user = request.user
+        scopes = [data_versions.user_scope(user.pk)]
+        if user.is_staff:
+            scopes.append(data_versions.ADMIN)
+        parts = (VERSION, request.get_full_path(), user.pk, *data_versions.get(*scopes))
+        etag = quote_etag(hashlib.sha1('\x1f'.join(map(str, parts)).encode('utf-8')).hexdigest())
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        response = view_func(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if db_router.read_from_replica():
+            return _body_etag(request, response)
+        response['ETag'] = etag
+        return response
+    return _wrapped
+
+
+def _body_etag(request, response):
+    """Validate ``response`` by a hash of its body (costs the queries, saves the transfer)."""
+    if response.status_code != 200:
+        return response
+    etag = quote_etag(hashlib.sha1(response.content).hexdigest())
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    response['ETag'] = etag
+    return response
+
+
+def _login_required(view_func):
+    # login_required would redirect to the HTML login page
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error('Authentication required.', status=401)
+        return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
+@require_GET
+@_login_required
+@gzip_page
+@_conditional
+def api_list(request, resource):
+    res = RESOURCES.get(resource)
+    if res is None:
+        return _error(f'Unknown resource {resource!r}.', status=404)
+    try:
+        names = _selected_fields(request, res)
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        before = request.GET.get('before')
+        before = int(before) if before else None
+    except ValueError as exc:
+        return _error(str(exc))
+    if limit < 1:
+        return _error('limit must be positive')
+
+    rows = []
+    for qs in res.querysets(request.user):
+        if before is not None:
+            # SQL: ... WHERE id < %s ORDER BY id DESC LIMIT %s
+            qs = qs.filter(id__lt=before)
+        # One extra row tells whether there is a next page without a COUNT(*)
+        rows.extend(_rows(qs.order_by('-id')[:limit + 1], res, names))
+    # A row lives in either the live or the archive table; merge the two pages by id
+    rows.sort(key=lambda row: row[0], reverse=True)
+    del rows[limit + 1:]
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['before'] = rows[-1][0]
+        next_url = f'{request.path}?{params.urlencode()}'
+    results = [row for _, row in rows]
+    return _json_response({'version': VERSION, 'results': results, 'next': next_url})
+
+
+@require_GET
+@_login_required
+@gzip_page
+@_conditional
+def api_detail(request, resource, pk):
+    res = RESOURCES.get(resource)
+    if res is None:
+        return _error(f'Unknown resource {resource!r}.', status=404)
+    try:
+        names = _selected_fields(request, res)
+    except ValueError as exc:
+        return _error(str(exc))
+    for qs in res.querysets(request.user):
+        rows = _rows(qs.filter(pk=pk), res, names)
+        if rows:
+            break
+    if not rows:
+        return _error('Not found.', status=404)
+    return _json_response({'version': VERSION, 'result': rows[0][1]})
+
+
+@require_GET
+@_login_required
+@ensure_csrf_cookie
+@gzip_page
+def api_sync(request):
+    """Changes since ``?cursor=`` (omit it for a full download).
+
+    Also sets the ``csrftoken`` cookie that ``api_sync_reports`` needs.
+    """
+    from . import sync
+    try:
+        since = sync.decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError as exc:
+        return _error(str(exc))
+    payload = sync.changes_since(request.user, since)
+    return JsonResponse({'version': VERSION, **payload})
+
+
+@require_POST
+@_login_required
+def api_sync_reports(request):
+    """File a batch of reports written offline: ``{"reports": [{...}, ...]}``.
+
+    Each item: ``request_id``, ``base_updated_at`` (the request's updated_at
+    as last synced), ``decision`` and optional ``structural_evaluation``,
+    ``compliance_checklist``, ``remarks``, ``inspection_date`` and
+    ``client_id`` (echoed back). Items are applied independently; each gets
+    a ``created``, ``conflict`` or ``error`` result.
+
+    Needs an ``X-CSRFToken`` header with the ``csrftoken`` cookie's value
+    (set by ``GET /api/v1/sync/``); without it the request gets a 403.
+    """
+    from . import sync
+    try:
+        items = json.loads(request.body)['reports']
+    except (ValueError, KeyError, TypeError):
+        return _error('Expected a JSON object with a "reports" list.')
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return _error('"reports" must be a list of objects.')
+    if len(items) > MAX_SYNC_BATCH:
+        return _error(f'At most {MAX_SYNC_BATCH} reports per batch.')
+    results = [sync.apply_report(request.user, item) for item in items]
+    return JsonResponse({'version': VERSION, 'results': results})
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MyappConfig(AppConfig):
     name = 'myapp'
+
+    def ready(self):
+        # Register background job handlers (see myapp/jobs.py)
+        from . import tasks  # noqa: F401
@@ -0,0 +1,178 @@
+"""
+Hot/cold archival of closed requests and old messages.
+
+Requests that are Paid, Completed or Rejected and were not touched for
+``ARCHIVE_AFTER_DAYS``, together with their report and payments, and read
+messages not touched for ``ARCHIVE_MESSAGES_AFTER_DAYS``, are moved to the
+``Archived*`` tables, so the hot tables the dashboards, inbox and workers
+scan only hold live rows and stay small enough to be cached.
+
+Rows are moved in batches of ``ARCHIVE_BATCH_SIZE``, one transaction per
+batch, with ``INSERT INTO archived_... SELECT ... WHERE id IN (...)``
+followed by ``DELETE ... WHERE id IN (...)``. Ids are kept, compressed text
+columns are copied as stored, and no model signals fire: an archived row is
+still visible (no sync tombstone), its cached report renderings stay valid
+and the rollups and profile counters still count it (``rebuild_rollups`` and
+``repair_profile_counters`` read both tables).
+
+Pages read both tables: the dashboards merge archived requests into their
+pages, the inbox lists archived messages, and reports and messages are
+looked up in the archive when the hot table does not have them. The v1 API
+and offline sync list and look up archived rows too, so a full download
+still gets them.
+``restore_requests`` and ``restore_messages`` move rows back on demand
+(Django admin action, ``manage.py restore_archived``) and touch
+``updated_at`` so the next archival run leaves them be.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import data_versions
+from .models import (
+    ArchivedInspectionReport, ArchivedInspectionRequest, ArchivedMessage, ArchivedPayment,
+    InspectionReport, InspectionRequest, Message, Payment, PendingNotification,
+)
+from .purge import delete_ids
+
+# Requests in these statuses never change again
+CLOSED_STATUSES = ('Paid', 'Completed', 'Rejected')
+
+
+def batch_size():
+    return getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+
+
+def request_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 180))
+
+
+def message_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'ARCHIVE_MESSAGES_AFTER_DAYS', 90))
+
+
+def _copy(source, target, ids, **values):
+    """``INSERT INTO <target> (...) SELECT ... FROM <source> WHERE id IN (...)``.
+
+    Columns are matched by name; ``values`` fills target columns the source
+    does not have (``archived_at``).
+    """
+    if not ids:
+        return 0
+    connection = connections[router.db_for_write(target)]
+    qn = connection.ops.quote_name
+    source_columns = {field.column for field in source._meta.concrete_fields}
+    columns = [field.column for field in target._meta.concrete_fields
+               if field.column in source_columns and field.column not in values]
+    selected = [qn(column) for column in columns] + ['%s'] * len(values)
+    placeholders = ', '.join(['%s'] * len(ids))
+    sql = (f'INSERT INTO {qn(target._meta.db_table)} ({", ".join(qn(c) for c in [*columns, *values])}) '
+           f'SELECT {", ".join(selected)} FROM {qn(source._meta.db_table)} WHERE id IN ({placeholders})')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*values.values(), *ids])
+        return cursor.rowcount
+
+
+def _move_requests(requests, reports, payments, ids, **values):
+    """Move requests ``ids`` with their reports and payments from one set of tables to the other."""
+    report_ids = list(reports[0].objects.filter(inspection_request_id__in=ids).values_list('pk', flat=True))
+    payment_ids = list(payments[0].objects.filter(inspection_request_id__in=ids).values_list('pk', flat=True))
+    # Parents first on insert, children first on delete
+    _copy(requests[0], requests[1], ids, **values)
+    _copy(reports[0], reports[1], report_ids)
+    _copy(payments[0], payments[1], payment_ids)
+    delete_ids(payments[0], payment_ids)
+    delete_ids(reports[0], report_ids)
+    return delete_ids(requests[0], ids)
+
+
+@transaction.atomic
+def archive_requests_batch(cutoff=None):
+    """Archive one batch of closed requests; returns how many were moved."""
+    cutoff = cutoff or request_cutoff()
+    # SQL: SELECT id, owner_id, inspector_id FROM inspection_request
+    #      WHERE status IN ('Paid', 'Completed', 'Rejected') AND updated_at < %s
+    #      ORDER BY id LIMIT %s FOR UPDATE
+    rows = list(InspectionRequest.objects.select_for_update()
+                .filter(status__in=CLOSED_STATUSES, updated_at__lt=cutoff)
+                # Notifications still waiting to be sent point at the hot row
+                .exclude(pk__in=PendingNotification.objects.values('inspection_request_id'))
+                .order_by('id').values_list('pk', 'owner_id', 'inspector_id')[:batch_size()])
+    if not rows:
+        return 0
+    moved = _move_requests((InspectionRequest, ArchivedInspectionRequest),
+                           (InspectionReport, ArchivedInspectionReport),
+                           (Payment, ArchivedPayment),
+                           [pk for pk, _, _ in rows], archived_at=timezone.now())
+    user_ids = [user_id for _, owner_id, inspector_id in rows for user_id in (owner_id, inspector_id)]
+    transaction.on_commit(lambda: data_versions.bump_users(*user_ids, admin=True))
+    return moved
+
+
+@transaction.atomic
+def archive_messages_batch(cutoff=None):
+    """Archive one batch of old read messages; returns how many were moved."""
+    cutoff = cutoff or message_cutoff()
+    # SQL: SELECT id, sender_id, recipient_id FROM message
+    #      WHERE is_read = TRUE AND updated_at < %s ORDER BY id LIMIT %s FOR UPDATE
+    rows = list(Message.objects.select_for_update()
+                .filter(is_read=True, updated_at__lt=cutoff)
+                .order_by('id').values_list('pk', 'sender_id', 'recipient_id')[:batch_size()])
+    if not rows:
+        return 0
+    ids = [pk for pk, _, _ in rows]
+    _copy(Message, ArchivedMessage, ids, archived_at=timezone.now())
+    moved = delete_ids(Message, ids)
+    user_ids = [user_id for _, sender_id, recipient_id in rows for user_id in (sender_id, recipient_id)]
+    transaction.on_commit(lambda: data_versions.bump_users(*user_ids))
+    return moved
+
+
+def archive_all(cutoff=None, message_cutoff=None):
+    """Archive batch after batch until nothing is left; returns ``(requests, messages)`` moved."""
+    requests = messages = 0
+    while moved := archive_requests_batch(cutoff):
+        requests += moved
+    while moved := archive_messages_batch(message_cutoff):
+        messages += moved
+    return requests, messages
+
+
+@transaction.atomic
+def restore_requests(ids):
+    """Move archived requests (with report and payments) back to the hot tables."""
+    rows = list(ArchivedInspectionRequest.objects.filter(pk__in=ids).values_list('pk', 'owner_id', 'inspector_id'))
+    if not rows:
+        return 0
+    ids = [pk for pk, _, _ in rows]
+    restored = _move_requests((ArchivedInspectionRequest, InspectionRequest),
+                              (ArchivedInspectionReport, InspectionReport),
+                              (ArchivedPayment, Payment), ids)
+    # Restored on demand: keep it hot for another retention window
+    InspectionRequest.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+    user_ids = [user_id for _, owner_id, inspector_id in rows for user_id in (owner_id, inspector_id)]
+    transaction.on_commit(lambda: data_versions.bump_users(*user_ids, admin=True))
+    return restored
+
+
+@transaction.atomic
+def restore_messages(ids):
+    """Move archived messages back to the hot table."""
+    rows = list(ArchivedMessage.objects.filter(pk__in=ids).values_list('pk', 'sender_id', 'recipient_id'))
+    if not rows:
+        return 0
+    ids = [pk for pk, _, _ in rows]
+    _copy(ArchivedMessage, Message, ids)
+    restored = delete_ids(ArchivedMessage, ids)
+    Message.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+    user_ids = [user_id for _, sender_id, recipient_id in rows for user_id in (sender_id, recipient_id)]
+    transaction.on_commit(lambda: data_versions.bump_users(*user_ids))
+    return restored
+
+
+def merge_newest(hot, archived, limit, key='pk'):
+    """Merge two lists sorted newest first by ``key`` into one, at most ``limit`` long."""
+    merged = sorted([*hot, *archived], key=lambda row: getattr(row, key), reverse=True)
+    return merged[:limit] if limit is not None else merged
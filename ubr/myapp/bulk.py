@@ -0,0 +1,165 @@
+"""
+Set-based admin bulk actions.
+
+Each action changes all selected rows with ``UPDATE ... WHERE id IN (...)``
+(rejected inspectors are deactivated and purged in the background, see
+myapp/purge.py), split into chunks of ``CHUNK_SIZE`` ids to stay under
+database parameter limits, and writes a single AuditLog row for the whole
+batch. Side tables are maintained in bulk too: rollup deltas are summed
+before they are applied, notifications and sync tombstones are inserted
+with ``bulk_create``.
+
+``QuerySet.update()`` sends no signals, so every action bumps the data
+versions (page ETags) and sets ``updated_at`` (sync cursor) itself.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import data_versions, notifications, purge, rollups, scheduling, sync
+from .models import AuditLog, Complaint, InspectionRequest, Profile
+
+CHUNK_SIZE = 500
+
+
+def parse_ids(values):
+    """Turn submitted ``ids`` values into a sorted list of unique ints."""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return sorted(ids)
+
+
+def chunks(ids, size=CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _audit(actor, action, model, ids, affected, **details):
+    AuditLog.objects.create(actor=actor, action=action, target=model._meta.label_lower,
+                            object_ids=list(ids), affected=affected, details=details)
+
+
+def _bump_users_after_commit(user_ids):
+    # Every bulk action changes rows the admin pages list
+    transaction.on_commit(lambda: data_versions.bump_users(*user_ids, admin=True))
+
+
+@transaction.atomic
+def approve_inspectors(actor, profile_ids):
+    affected, user_ids = 0, []
+    for chunk in chunks(profile_ids):
+        rows = Profile.objects.filter(pk__in=chunk, user_type='Inspector', is_approved=False,
+                                      deactivated_at__isnull=True)
+        user_ids.extend(rows.values_list('user_id', flat=True))
+        # SQL: UPDATE profile SET is_approved = TRUE WHERE id IN (...) AND user_type = 'Inspector'
+        affected += rows.update(is_approved=True)
+    _audit(actor, 'approve_inspectors', Profile, profile_ids, affected)
+    _bump_users_after_commit(user_ids)
+    return affected
+
+
+@transaction.atomic
+def reject_inspectors(actor, profile_ids):
+    """Deactivate the users behind pending inspector profiles and queue their purge."""
+    affected = 0
+    for chunk in chunks(profile_ids):
+        user_ids = list(Profile.objects.filter(pk__in=chunk, user_type='Inspector', is_approved=False,
+                                               deactivated_at__isnull=True)
+                        .values_list('user_id', flat=True))
+        affected += purge.deactivate(user_ids)
+    _audit(actor, 'reject_inspectors', Profile, profile_ids, affected)
+    return affected
+
+
+@transaction.atomic
+def set_banned(actor, user_ids, banned):
+    affected = 0
+    for chunk in chunks(user_ids):
+        # SQL: UPDATE profile SET is_banned = %s WHERE user_id IN (...) AND is_banned <> %s
+        affected += Profile.objects.filter(user_id__in=chunk).exclude(is_banned=banned).update(is_banned=banned)
+    _audit(actor, 'ban_users' if banned else 'unban_users', User, user_ids, affected)
+    _bump_users_after_commit(user_ids)
+    return affected
+
+
+@transaction.atomic
+def resolve_complaints(actor, complaint_ids):
+    affected, inspector_ids, user_ids = 0, [], []
+    for chunk in chunks(complaint_ids):
+        rows = Complaint.objects.select_for_update().filter(pk__in=chunk, resolved=False)
+        found = list(rows.values_list('pk', 'against_inspector_id', 'reporter_id'))
+        # SQL: UPDATE complaint SET resolved = TRUE WHERE id IN (...)
+        affected += Complaint.objects.filter(pk__in=[pk for pk, _, _ in found]).update(resolved=True)
+        inspector_ids.extend(inspector_id for _, inspector_id, _ in found)
+        user_ids.extend(uid for _, inspector_id, reporter_id in found for uid in (inspector_id, reporter_id))
+    if inspector_ids:
+        rollups.record_complaints_resolved(inspector_ids)
+    _audit(actor, 'resolve_complaints', Complaint, complaint_ids, affected)
+    _bump_users_after_commit(user_ids)
+    return affected
+
+
+def parse_fee(value):
+    """Validate a submitted fee; raises ValueError."""
+    try:
+        fee = Decimal(value).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError):
+        raise ValueError('Invalid fee value.')
+    if fee < 0 or not fee.is_finite():
+        raise ValueError('Invalid fee value.')
+    return fee
+
+
+@transaction.atomic
+def set_fee(actor, request_ids, fee):
+    """Set a fee by hand; fee recomputation (myapp/fees.py) leaves these requests alone."""
+    affected, user_ids = 0, []
+    now = timezone.now()
+    for chunk in chunks(request_ids):
+        rows = InspectionRequest.objects.filter(pk__in=chunk)
+        user_ids.extend(uid for pair in rows.values_list('owner_id', 'inspector_id') for uid in pair)
+        # SQL: UPDATE inspection_request SET fee = %s, fee_overridden = TRUE, updated_at = %s WHERE id IN (...)
+        affected += rows.update(fee=fee, fee_overridden=True, updated_at=now)
+    _audit(actor, 'set_fee', InspectionRequest, request_ids, affected, fee=str(fee))
+    _bump_users_after_commit(user_ids)
+    return affected
+
+
+@transaction.atomic
+def assign_inspector(actor, request_ids, inspector):
+    """Assign ``inspector`` to every selected request and mark them Assigned.
+
+    Appointments booked with another inspector are dropped; the scheduler
+    books the requests with ``inspector`` after commit.
+    """
+    affected, changes, moves, user_ids = 0, [], [], [inspector.pk]
+    now = timezone.now()
+    for chunk in chunks(request_ids):
+        rows = InspectionRequest.objects.select_for_update().filter(pk__in=chunk)
+        before = list(rows.values_list('pk', 'status', 'inspector_id', 'owner_id'))
+        # SQL: UPDATE inspection_request SET appointment_start = NULL, appointment_end = NULL
+        #      WHERE id IN (...) AND inspector_id IS DISTINCT FROM %s
+        rows.exclude(inspector=inspector).update(appointment_start=None, appointment_end=None)
+        # SQL: UPDATE inspection_request SET inspector_id = %s, status = 'Assigned', updated_at = %s
+        #      WHERE id IN (...)
+        affected += rows.update(inspector=inspector, status='Assigned', updated_at=now)
+        for pk, old_status, old_inspector_id, owner_id in before:
+            # Unsaved stand-in carrying the new state, for the notification helpers
+            req = InspectionRequest(pk=pk, owner_id=owner_id, inspector_id=inspector.pk, status='Assigned')
+            changes.append((old_status, old_inspector_id, req))
+            moves.append((pk, old_inspector_id, inspector.pk))
+            user_ids.extend((owner_id, old_inspector_id))
+    rollups.record_status_changes([(old_status, old_inspector_id, req.status, req.inspector_id)
+                                   for old_status, old_inspector_id, req in changes])
+    notifications.record_status_changes(changes)
+    sync.record_reassignments(moves)
+    _audit(actor, 'assign_inspector', InspectionRequest, request_ids, affected, inspector_id=inspector.pk)
+    _bump_users_after_commit(user_ids)
+    transaction.on_commit(scheduling.schedule_soon)
+    return affected
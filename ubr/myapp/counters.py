@@ -0,0 +1,105 @@
+"""
+Denormalised per-user activity counters on Profile.
+
+==================  ==================================================
+requests_owned      inspection requests the user owns
+open_inspections    requests assigned to the user and still open
+reports_filed       inspection reports the user filed
+complaints_open     unresolved complaints against the user
+unread_messages     unread messages the user received
+==================  ==================================================
+
+Writes adjust them with ``UPDATE profile SET col = col + %s`` (F()
+expressions), so concurrent writers never lose an increment. The rollup
+helpers in myapp/rollups.py call ``adjust`` for requests, reports and
+complaints, so every write path that keeps the dashboard rollups right
+(single and bulk) keeps these right too. Messages are counted where they are
+sent and read.
+
+Deletes are only tracked by the account purge (myapp/purge.py).
+``manage.py repair_profile_counters`` recounts from the source tables and
+corrects any drift.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F
+
+from .models import (
+    ArchivedInspectionReport, ArchivedInspectionRequest, Complaint, InspectionReport, InspectionRequest,
+    Message, Profile,
+)
+
+FIELDS = ('requests_owned', 'open_inspections', 'reports_filed', 'complaints_open', 'unread_messages')
+
+
+def adjust(deltas):
+    """Apply ``{(user_id, field): delta}``, one UPDATE per user; None user ids are skipped."""
+    per_user = defaultdict(Counter)
+    for (user_id, field), delta in deltas.items():
+        if user_id and delta:
+            per_user[user_id][field] += delta
+    for user_id, changes in per_user.items():
+        changes = {field: F(field) + delta for field, delta in changes.items() if delta}
+        if changes:
+            # SQL: UPDATE profile SET open_inspections = open_inspections + %s, ... WHERE user_id = %s
+            Profile.objects.filter(user_id=user_id).update(**changes)
+
+
+def record_messages_sent(recipient_ids):
+    """Count new unread messages, one per entry of ``recipient_ids``."""
+    adjust(Counter((recipient_id, 'unread_messages') for recipient_id in recipient_ids))
+
+
+def record_message_read(recipient_id):
+    """Only call when the message was unread before this change."""
+    record_messages_read([recipient_id])
+
+
+def record_messages_read(recipient_ids):
+    """Uncount unread messages that were read or deleted, one per entry of ``recipient_ids``."""
+    adjust({(recipient_id, 'unread_messages'): -n for recipient_id, n in Counter(recipient_ids).items()})
+
+
+def actual_counts():
+    """Recount every counter from the source tables: ``{user_id: {field: n}}``."""
+    from .rollups import OPEN_STATUSES
+    # Archived requests and reports (myapp/archive.py) still count; only read
+    # messages are archived, and archived requests are never open
+    sources = [
+        ('requests_owned', InspectionRequest.objects.all(), 'owner_id'),
+        ('requests_owned', ArchivedInspectionRequest.objects.all(), 'owner_id'),
+        ('open_inspections', InspectionRequest.objects.filter(status__in=OPEN_STATUSES), 'inspector_id'),
+        ('reports_filed', InspectionReport.objects.all(), 'inspector_id'),
+        ('reports_filed', ArchivedInspectionReport.objects.all(), 'inspector_id'),
+        ('complaints_open', Complaint.objects.filter(resolved=False), 'against_inspector_id'),
+        ('unread_messages', Message.objects.filter(is_read=False), 'recipient_id'),
+    ]
+    counts = defaultdict(Counter)
+    for field, qs, user_field in sources:
+        # SQL: SELECT owner_id, COUNT(*) FROM inspection_request GROUP BY owner_id  (and alike)
+        rows = qs.filter(**{f'{user_field}__isnull': False}).values(user_field).annotate(n=Count('id'))
+        for user_id, n in rows.order_by().values_list(user_field, 'n'):
+            counts[user_id][field] += n
+    return counts
+
+
+def find_drift():
+    """Return ``[(user_id, field, stored, actual), ...]`` for every counter that is off."""
+    actual = actual_counts()
+    drift = []
+    for row in Profile.objects.values('user_id', *FIELDS).order_by('user_id').iterator():
+        expected = actual.get(row['user_id'], {})
+        for field in FIELDS:
+            if row[field] != expected.get(field, 0):
+                drift.append((row['user_id'], field, row[field], expected.get(field, 0)))
+    return drift
+
+
+def repair(drift):
+    """Correct the counters listed by ``find_drift``.
+
+    Applied as deltas rather than absolute values, so increments made by
+    writes running alongside the repair are kept.
+    """
+    adjust({(user_id, field): actual - stored for user_id, field, stored, actual in drift})
+    return len(drift)
@@ -0,0 +1,69 @@
+"""
+Cheap per-user data versions for revalidating authenticated pages.
+
+Every user has a version token in the cache that changes whenever a row
+shown on their pages changes (requests, reports, messages, payments,
+complaints, their profile). Admin pages additionally depend on the
+``admin`` scope, and everyone's pages on the ``global`` scope (broadcasts).
+The model signal receivers in models.py bump the affected scopes.
+
+``@revalidate`` (decorators.py) hashes these tokens into the ETag of a page,
+so deciding on a ``304 Not Modified`` costs one cache ``get_many`` instead
+of the page's queries and template rendering.
+
+The cache must be shared by all processes (see settings_production.py): with
+a per-process cache, a bump in one process would go unseen by the others.
+A token missing from the cache (evicted, cache cleared) is recreated with a
+fresh random value, which can only cause an extra full render.
+
+Changes made with ``QuerySet.update()`` send no signals; callers must bump
+the affected scopes themselves.
+"""
+import uuid
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'dataver:v1'
+GLOBAL = 'global'
+ADMIN = 'admin'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _key(scope):
+    return f'{KEY_PREFIX}:{scope}'
+
+
+def get(*scopes):
+    """Return the current tokens of ``scopes`` as a tuple, creating missing ones."""
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    tokens = []
+    for key in keys:
+        token = found.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            # add() keeps a token another process created in the meantime
+            if not cache.add(key, token, None):
+                token = cache.get(key, token)
+        tokens.append(token)
+    return tuple(tokens)
+
+
+def bump(*scopes):
+    """Invalidate every page depending on ``scopes``."""
+    cache.set_many({_key(scope): uuid.uuid4().hex for scope in scopes if scope}, None)
+
+
+def bump_users(*user_ids, admin=False):
+    """Bump the scopes of ``user_ids`` (None entries are ignored), and the admin scope with ``admin``.
+
+    Pass ``admin=True`` only for rows the admin pages list (requests, reports,
+    payments, complaints, profiles): every extra bump costs the staff their 304s.
+    """
+    scopes = [user_scope(user_id) for user_id in set(user_ids) if user_id]
+    if admin:
+        scopes.append(ADMIN)
+    bump(*scopes)
@@ -0,0 +1,118 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to a replica from
+``settings.DATABASE_REPLICAS`` only while a request for one of the
+``REPLICA_READ_VIEWS`` is being handled (dashboards, inbox, reports,
+exports) and the user is not pinned to the primary.
+
+A user is pinned for ``REPLICA_STICKY_SECONDS`` after any request that
+wrote to the database, so they read their own writes (a payment, a filed
+report) instead of a lagging replica. The pin is kept in a cookie set by
+``ReplicaRoutingMiddleware``, and for the rest of the writing request
+itself. Writes are detected from the SQL actually sent to the primary, so
+a get_or_create() that only reads does not pin anyone. Session and auth
+tables are always read from the primary.
+"""
+import contextvars
+import random
+import time
+
+from django.conf import settings
+
+# View names (URL names) whose reads may be served by a replica
+DEFAULT_REPLICA_READ_VIEWS = (
+    'owner_dashboard', 'inspector_dashboard', 'admin_dashboard', 'admin_dashboard_root',
+    'inbox', 'owner_payments', 'view_report', 'download_report',
+    'admin_analytics', 'admin_analytics_data', 'api_list', 'api_detail',
+)
+# Apps whose tables are never read from a replica
+PRIMARY_ONLY_APPS = ('sessions', 'auth', 'contenttypes', 'admin')
+PIN_COOKIE = 'ubr_primary_pin'
+
+
+class _RequestState:
+    __slots__ = ('replica_ok', 'pinned', 'wrote', 'replica_used')
+
+    def __init__(self, pinned=False):
+        self.replica_ok = False
+        self.pinned = pinned
+        self.wrote = False
+        self.replica_used = False
+
+
+_state = contextvars.ContextVar('ubr_db_routing', default=None)
+
+
+def replica_read_views():
+    return getattr(settings, 'REPLICA_READ_VIEWS', DEFAULT_REPLICA_READ_VIEWS)
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+
+
+def begin_request(pinned_until=None):
+    """Start routing state for a request; returns a token for ``end_request``."""
+    pinned = bool(pinned_until and pinned_until > time.time())
+    return _state.set(_RequestState(pinned=pinned))
+
+
+def allow_replica_reads():
+    state = _state.get()
+    if state is not None:
+        state.replica_ok = True
+
+
+def wrote_during_request():
+    state = _state.get()
+    return bool(state and state.wrote)
+
+
+def read_from_replica():
+    """Whether any read of the current request was routed to a replica (which may lag)."""
+    state = _state.get()
+    return bool(state and state.replica_used)
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def track_writes(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook that notices data-modifying SQL."""
+    state = _state.get()
+    if state is not None and not state.wrote and sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        # Everything after the first write in this request reads the primary
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_ok or state.pinned or state.wrote:
+            return 'default'
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas:
+            return 'default'
+        state.replica_used = True
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any of them may relate
+        databases = {'default', *getattr(settings, 'DATABASE_REPLICAS', ())}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -59,28 +59,91 @@
 
 
 
+import hashlib
 from functools import wraps
-from django.http import HttpResponseForbidden
+from django.conf import settings
+from django.contrib import messages
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views.decorators.cache import never_cache
 from django.utils.decorators import method_decorator
+from . import data_versions, db_router, ratelimit
 from .models import Profile
 
 
+# Bump to change every page ETag, e.g. after a template change
+PAGE_VERSION = 1
+
+
+def revalidating():
+    """True when AUTH_CACHE_MODE lets authenticated pages be revalidated."""
+    return getattr(settings, 'AUTH_CACHE_MODE', 'no-store') == 'revalidate'
+
+
+def set_private_cache_headers(response):
+    """Cache-Control for an authenticated response under AUTH_CACHE_MODE.
+
+    'revalidate': the browser may keep a response that has a validator but
+    must ask before reusing it (``private, no-cache``). Otherwise, and
+    always for responses without a validator: ``no-store``.
+    """
+    if revalidating() and (response.has_header('ETag') or response.has_header('Last-Modified')):
+        response['Cache-Control'] = 'private, no-cache'
+    else:
+        response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
+        response['Pragma'] = 'no-cache'
+        response['Expires'] = '0'
+    return response
+
+
 def no_cache(view_func):
     """
     Decorator to prevent caching of views.
     Use on dashboard and other sensitive views.
+    Responses with an ETag may still be revalidated, see set_private_cache_headers.
     """
     @wraps(view_func)
     def _wrapped(request, *args, **kwargs):
         response = view_func(request, *args, **kwargs)
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
+        return set_private_cache_headers(response)
     return _wrapped
 
 
+def revalidate(*scopes):
+    """Decorator giving an authenticated GET page an ETag from data versions.
+
+    The ETag hashes the page URL, the user, their CSRF cookie and the data
+    versions of the user, the global scope and ``scopes`` (e.g.
+    ``data_versions.ADMIN``). A matching If-None-Match gets a 304 before the
+    view runs. Falls back to ``no-store`` outside AUTH_CACHE_MODE
+    'revalidate', when flash messages are pending (they would be replayed
+    from the browser cache) and when the view read from a replica: the
+    versions are bumped on the primary's commit, so a lagging replica's
+    page must not be stored under them.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if not revalidating() or request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return set_private_cache_headers(view_func(request, *args, **kwargs))
+            user_id = request.user.pk
+            tokens = data_versions.get(data_versions.GLOBAL, data_versions.user_scope(user_id), *scopes)
+            parts = (PAGE_VERSION, request.get_full_path(), user_id,
+                     request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), *tokens)
+            etag = quote_etag(hashlib.sha1('\x1f'.join(map(str, parts)).encode('utf-8')).hexdigest())
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified['Cache-Control'] = 'private, no-cache'
+                return not_modified
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not db_router.read_from_replica():
+                response['ETag'] = etag
+            return set_private_cache_headers(response)
+        return _wrapped
+    return decorator
+
+
 def role_required(role):
     """Decorator to require a specific Profile.user_type for a view.
 
@@ -104,4 +167,50 @@ def role_required(role):
 
         return _wrapped
 
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def _rate_limit_key(kind, request):
+    if callable(kind):
+        return kind(request)
+    if kind == 'ip':
+        return ratelimit.client_ip(request)
+    if kind == 'user':
+        return str(request.user.pk) if request.user.is_authenticated else None
+    if kind.startswith('post:'):
+        # e.g. 'post:username' throttles attempts against one account from many IPs
+        return request.POST.get(kind[5:], '').strip().lower() or None
+    raise ValueError(f'Unknown rate limit key {kind!r}')
+
+
+def rate_limit(name, rate, key=('ip', 'user'), burst=None, methods=('POST',)):
+    """Decorator to throttle a view with token buckets.
+
+    ``rate`` is like ``'5/m'`` and can be overridden per ``name`` through
+    ``settings.RATELIMITS``. One bucket is kept per entry of ``key``
+    ('ip', 'user', 'post:<field>' or a callable returning a string); the
+    request must get a token from each. Only ``methods`` are counted, so
+    rendering the form stays free. Returns HTTP 429 with Retry-After when
+    a bucket is empty.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method in methods and getattr(settings, 'RATELIMIT_ENABLED', True):
+                view_rate = getattr(settings, 'RATELIMITS', {}).get(name, rate)
+                retry_after = 0
+                for kind in key:
+                    value = _rate_limit_key(kind, request)
+                    if value:
+                        label = kind if isinstance(kind, str) else kind.__name__
+                        retry_after = max(retry_after, ratelimit.hit(f'{name}:{label}:{value}', view_rate, burst))
+                if retry_after:
+                    response = HttpResponse('Too many requests, please try again later.',
+                                            status=429, content_type='text/plain')
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
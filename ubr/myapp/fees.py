@@ -0,0 +1,175 @@
+"""
+Rule-based inspection fees.
+
+Fees come from the FeeRule table: a rule matches by request type, zone (a
+name looked up in ``building_location``) and building size, within its
+effective dates, and prices the inspection as
+
+    base_fee + per_floor * floors + per_square_metre * floor_area
+
+rounded half-up to the cent, in Decimal throughout. Of the matching rules
+the one with the highest ``priority`` wins, then the most specific; with no
+match the fee is ``DEFAULT_INSPECTION_FEE``.
+
+The table is small and read on every request creation, so each process
+compiles it once into per-type candidate lists, already in precedence
+order, and keeps that in memory. A version token in the shared cache (see
+myapp/data_versions.py) is checked on each lookup; saving or deleting a
+rule bumps it (``invalidate_fee_rules`` in models.py), so every process
+recompiles on its next lookup. Rules changed with ``QuerySet.update()``
+need an explicit ``invalidate()``.
+
+Fees are computed when a request is created. ``recompute_pending`` reprices
+the Pending requests after the rules change, in chunks of ``CHUNK_SIZE``
+written with ``bulk_update``; fees an admin set by hand
+(``fee_overridden``) are left alone.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import data_versions, jobs
+from .models import FeeRule, InspectionRequest
+
+CENT = Decimal('0.01')
+CHUNK_SIZE = 500
+RECOMPUTE_TASK = 'recompute_fees'
+VERSION_SCOPE = 'fee_rules'
+
+# (version token, {req_type: [rule, ...]}) of this process
+_compiled = None
+
+
+def default_fee():
+    return Decimal(str(getattr(settings, 'DEFAULT_INSPECTION_FEE', '500.00')))
+
+
+class _Rule:
+    """A FeeRule reduced to what matching and pricing need."""
+    __slots__ = ('pk', 'zone', 'min_floors', 'max_floors', 'min_area', 'max_area',
+                 'base_fee', 'per_floor', 'per_square_metre', 'effective_from', 'effective_to', 'sort_key')
+
+    def __init__(self, rule):
+        self.pk = rule.pk
+        self.zone = rule.zone.strip().lower()
+        self.min_floors, self.max_floors = rule.min_floors, rule.max_floors
+        self.min_area, self.max_area = rule.min_area, rule.max_area
+        self.base_fee, self.per_floor = rule.base_fee, rule.per_floor
+        self.per_square_metre = rule.per_square_metre
+        self.effective_from, self.effective_to = rule.effective_from, rule.effective_to
+        criteria = (rule.req_type, self.zone, self.min_floors, self.max_floors, self.min_area, self.max_area)
+        specificity = sum(1 for value in criteria if value not in ('', None))
+        self.sort_key = (-rule.priority, -specificity, rule.pk)
+
+    def matches(self, location, floors, floor_area, day):
+        if day < self.effective_from or (self.effective_to is not None and day > self.effective_to):
+            return False
+        if self.zone and self.zone not in location:
+            return False
+        return (_within(floors, self.min_floors, self.max_floors)
+                and _within(floor_area, self.min_area, self.max_area))
+
+    def price(self, floors, floor_area):
+        fee = self.base_fee + self.per_floor * (floors or 0) + self.per_square_metre * (floor_area or 0)
+        return fee.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _within(value, low, high):
+    if low is None and high is None:
+        return True
+    # A bounded rule never matches a request that did not give the value
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def compile_rules(rules):
+    """Build ``{req_type: [rule, ...]}``, each list in precedence order; ``''`` holds the catch-alls."""
+    wildcard = [_Rule(rule) for rule in rules if not rule.req_type]
+    table = {'': sorted(wildcard, key=lambda rule: rule.sort_key)}
+    for req_type, _ in InspectionRequest.REQ_TYPES:
+        typed = [_Rule(rule) for rule in rules if rule.req_type == req_type]
+        table[req_type] = sorted(typed + wildcard, key=lambda rule: rule.sort_key)
+    return table
+
+
+def rule_table():
+    """This process's compiled rules, recompiled when the version token moved."""
+    global _compiled
+    token, = data_versions.get(VERSION_SCOPE)
+    if _compiled is None or _compiled[0] != token:
+        # SQL: SELECT * FROM fee_rule
+        _compiled = (token, compile_rules(list(FeeRule.objects.all())))
+    return _compiled[1]
+
+
+def invalidate():
+    global _compiled
+    _compiled = None
+    data_versions.bump(VERSION_SCOPE)
+
+
+def fee_for(req_type, building_location, floors=None, floor_area=None, day=None, table=None):
+    """The fee of an inspection as a Decimal with two places."""
+    table = table if table is not None else rule_table()
+    day = day or timezone.localdate()
+    location = (building_location or '').lower()
+    for rule in table.get(req_type, table['']):
+        if rule.matches(location, floors, floor_area, day):
+            return rule.price(floors, floor_area)
+    return default_fee().quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def compute(req, day=None, table=None):
+    """The fee ``req`` should have under the current rules."""
+    return fee_for(req.req_type, req.building_location, req.floors, req.floor_area, day, table)
+
+
+@transaction.atomic
+def recompute_chunk(after=0, table=None, day=None, chunk_size=CHUNK_SIZE):
+    """Reprice the next chunk of Pending requests with ``id > after``.
+
+    Returns ``(last id, number changed)``, last id being None when there was
+    nothing left.
+    """
+    table = table if table is not None else rule_table()
+    # SQL: SELECT id, owner_id, req_type, building_location, floors, floor_area, fee
+    #      FROM inspection_request WHERE status = 'Pending' AND NOT fee_overridden AND id > %s
+    #      ORDER BY id LIMIT %s FOR UPDATE
+    chunk = list(InspectionRequest.objects.select_for_update()
+                 .filter(status='Pending', fee_overridden=False, id__gt=after)
+                 .only('owner', 'req_type', 'building_location', 'floors', 'floor_area', 'fee')
+                 .order_by('id')[:chunk_size])
+    if not chunk:
+        return None, 0
+    now = timezone.now()
+    changed = []
+    for req in chunk:
+        fee = compute(req, day, table)
+        if fee != req.fee:
+            req.fee, req.updated_at = fee, now
+            changed.append(req)
+    # SQL: UPDATE inspection_request SET fee = CASE id WHEN %s THEN %s ... END, updated_at = ...
+    #      WHERE id IN (...)
+    InspectionRequest.objects.bulk_update(changed, ['fee', 'updated_at'])
+    owner_ids = [req.owner_id for req in changed]
+    transaction.on_commit(lambda: data_versions.bump_users(*owner_ids, admin=True))
+    return chunk[-1].pk, len(changed)
+
+
+def recompute_pending(chunk_size=CHUNK_SIZE):
+    """Reprice every Pending request, one transaction per chunk; returns how many changed."""
+    table, day = rule_table(), timezone.localdate()
+    after, total = 0, 0
+    while True:
+        after, changed = recompute_chunk(after, table, day, chunk_size)
+        if after is None:
+            return total
+        total += changed
+
+
+def schedule_recompute():
+    """Reprice the Pending requests in the background, one chunk per job run."""
+    jobs.enqueue(RECOMPUTE_TASK, {'after': 0}, priority=-5)
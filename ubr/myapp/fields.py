@@ -0,0 +1,86 @@
+"""
+Custom model fields.
+
+CompressedTextField behaves like a TextField in Python (values are ``str``)
+but stores long values zlib-compressed in a binary column. Stored format:
+
+* ``b'\\xff' + zlib stream`` for compressed values. ``0xff`` never starts a
+  valid UTF-8 sequence, so it cannot collide with plain text.
+* plain UTF-8 bytes for everything else: values shorter than
+  ``min_length``, all values while ``COMPRESSED_TEXT_ENABLED = False``, and
+  rows written before the column was converted.
+
+Compressed columns can't be searched or filtered with ``icontains`` and
+friends; only use it for large free-text fields that are displayed, not
+queried.
+"""
+import zlib
+
+from django import forms
+from django.conf import settings
+from django.db import models
+
+COMPRESSED_MARKER = b'\xff'
+
+
+def encode_text(value, min_length=256, level=6):
+    """Encode ``value`` into the stored byte format."""
+    raw = value.encode('utf-8')
+    if len(raw) < min_length or not getattr(settings, 'COMPRESSED_TEXT_ENABLED', True):
+        return raw
+    packed = COMPRESSED_MARKER + zlib.compress(raw, level)
+    # Incompressible text is kept as is
+    return packed if len(packed) < len(raw) else raw
+
+
+def decode_text(value):
+    """Decode a stored value (compressed, plain bytes or legacy ``str``) to ``str``."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(COMPRESSED_MARKER):
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value.decode('utf-8')
+
+
+class CompressedTextField(models.BinaryField):
+    description = 'Text stored zlib-compressed'
+
+    def __init__(self, *args, min_length=256, level=6, **kwargs):
+        self.min_length = min_length
+        self.level = level
+        # BinaryField is not editable by default; this one is edited as text
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.min_length != 256:
+            kwargs['min_length'] = self.min_length
+        if self.level != 6:
+            kwargs['level'] = self.level
+        if kwargs.get('editable') is True:
+            del kwargs['editable']
+        return name, path, args, kwargs
+
+    def get_default(self):
+        default = super().get_default()
+        return decode_text(default) if isinstance(default, (bytes, memoryview)) else default
+
+    def from_db_value(self, value, expression, connection):
+        return decode_text(value)
+
+    def to_python(self, value):
+        return decode_text(value)
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            return encode_text(value, self.min_length, self.level)
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj) or ''
+
+    def formfield(self, **kwargs):
+        # Skip BinaryField.formfield, edit it like a TextField
+        return models.Field.formfield(self, **{'widget': forms.Textarea, **kwargs})
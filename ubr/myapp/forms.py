@@ -16,6 +16,14 @@ class SignUpForm(UserCreationForm):
         model = User
         fields = ('username', 'email', 'password1', 'password2', 'user_type', 'nid', 'phone', 'location')
 
+    def clean_username(self):
+        from .notifications import sender_username
+        username = super().clean_username()
+        # Reserved for the system account that sends notifications
+        if username and username.lower() == sender_username().lower():
+            raise forms.ValidationError('This username is reserved.')
+        return username
+
     def save(self, commit=True):
         user = super().save(commit=False)
         if commit:
@@ -0,0 +1,33 @@
+"""
+Report filing shared by the inspector's HTML form and the offline sync API.
+
+Filing a report moves the request to the report's decision and updates the
+dashboard rollups, the inspector scorecard and the pending notifications in
+the same transaction, whichever client submitted it.
+"""
+from django.db import transaction
+
+from . import notifications, rollups
+from .models import InspectionReport
+
+DECISIONS = ('Approved', 'Rejected')
+
+
+@transaction.atomic
+def file_report(req, inspector, decision, **fields):
+    """Create the report of ``req`` with ``decision`` and move ``req`` to that status.
+
+    ``fields`` are further InspectionReport fields (structural_evaluation,
+    compliance_checklist, remarks, inspection_date).
+    """
+    if decision not in DECISIONS:
+        raise ValueError(f'decision must be one of {", ".join(DECISIONS)}')
+    report = InspectionReport.objects.create(inspection_request=req, inspector=inspector,
+                                             decision=decision, **fields)
+    old_status, old_inspector_id = req.status, req.inspector_id
+    req.status = decision
+    req.save()
+    rollups.record_status_change(old_status, old_inspector_id, req)
+    notifications.record_status_change(old_status, old_inspector_id, req)
+    rollups.record_report_filed(report)
+    return report
@@ -0,0 +1,186 @@
+"""
+Database-backed background job queue.
+
+Views call ``enqueue()`` to store a Job row and return immediately; the
+``run_workers`` management command runs a pool of threads or processes that
+claim due jobs and execute the registered handler.
+
+* Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database
+  supports it, so workers never wait on each other's rows. On SQLite each
+  candidate is claimed with a conditional ``UPDATE ... WHERE status =
+  'queued'``; only one worker can win that update.
+* A handler runs in the same transaction that marks its job done, so a job
+  whose side effects are database writes is applied exactly once.
+* A failed job is retried with exponential backoff until ``max_attempts``.
+* Jobs left ``running`` by a crashed worker are requeued after
+  ``JOBS_LOCK_TIMEOUT`` seconds; running workers sweep for them every
+  ``JOBS_REQUEUE_INTERVAL`` seconds.
+
+Handlers are registered with ``@task('name')``, see myapp/tasks.py.
+"""
+import logging
+import random
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+# Jobs enqueued while an eager job runs, drained by the outermost enqueue()
+_eager = threading.local()
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 60 * 60
+
+
+def task(name):
+    """Register the decorated function as the handler for jobs named ``name``."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def registered_tasks():
+    return dict(_registry)
+
+
+def enqueue(name, payload=None, priority=0, run_at=None, delay=None, max_attempts=5):
+    """Queue a job and return it.
+
+    ``payload`` must be JSON-serialisable and is passed to the handler as
+    keyword arguments. ``run_at`` or ``delay`` (seconds or timedelta)
+    schedule the job for later. With ``JOBS_EAGER = True`` the job runs
+    immediately in the calling thread instead (handy without a worker); a
+    job enqueued by an eager job runs after it, in its own transaction,
+    so handlers that queue their next batch loop instead of recursing.
+    """
+    if name not in _registry:
+        raise KeyError(f'No job handler registered for {name!r}')
+    if delay is not None:
+        run_at = timezone.now() + (delay if isinstance(delay, timedelta) else timedelta(seconds=delay))
+    job = Job.objects.create(task=name, payload=payload or {}, priority=priority,
+                             run_at=run_at or timezone.now(), max_attempts=max_attempts)
+    if getattr(settings, 'JOBS_EAGER', False):
+        pending = getattr(_eager, 'pending', None)
+        if pending is not None:
+            pending.append(job)
+            return job
+        _eager.pending = pending = [job]
+        try:
+            while pending:
+                run_job(pending.pop(0))
+        finally:
+            _eager.pending = None
+    return job
+
+
+def claim(worker_id, limit=1):
+    """Mark up to ``limit`` due jobs as running for ``worker_id`` and return them."""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('-priority', 'run_at', 'id')
+    claimed_fields = {'status': 'running', 'locked_by': worker_id, 'locked_at': now}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(due.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(**claimed_fields)
+    else:
+        jobs = []
+        # Over-fetch a little: other workers may win some of these rows
+        for job in due[:limit * 4]:
+            if Job.objects.filter(pk=job.pk, status='queued').update(**claimed_fields):
+                jobs.append(job)
+                if len(jobs) == limit:
+                    break
+    for job in jobs:
+        for field, value in claimed_fields.items():
+            setattr(job, field, value)
+    return jobs
+
+
+def backoff_seconds(attempts):
+    """Delay before retry number ``attempts``: exponential with jitter, capped."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(job):
+    """Execute one claimed job and record the outcome. Returns True on success."""
+    handler = _registry.get(job.task)
+    job.attempts += 1
+    try:
+        if handler is None:
+            raise KeyError(f'No job handler registered for {job.task!r}')
+        with transaction.atomic():
+            handler(**job.payload)
+            job.status = 'done'
+            job.finished_at = timezone.now()
+            job.last_error = ''
+            job.save(update_fields=['status', 'attempts', 'finished_at', 'last_error'])
+        return True
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        job.last_error = traceback.format_exc()[-4000:]
+        if handler is None or job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=backoff_seconds(job.attempts))
+        job.locked_by = ''
+        job.locked_at = None
+        job.save(update_fields=['status', 'attempts', 'last_error', 'finished_at', 'run_at',
+                                'locked_by', 'locked_at'])
+        return False
+
+
+def requeue_stale(timeout=None):
+    """Return jobs stuck in ``running`` longer than ``timeout`` seconds to the queue."""
+    timeout = timeout or getattr(settings, 'JOBS_LOCK_TIMEOUT', 15 * 60)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None)
+
+
+def work(worker_id, batch=1, stop=None, poll_interval=1.0, exit_when_idle=False):
+    """Claim and run jobs until ``stop`` is set (or the queue is empty with ``exit_when_idle``).
+
+    Returns the number of jobs processed.
+    """
+    processed = 0
+    requeue_interval = getattr(settings, 'JOBS_REQUEUE_INTERVAL', 60)
+    next_requeue = time.monotonic() + requeue_interval
+    while stop is None or not stop.is_set():
+        try:
+            if time.monotonic() >= next_requeue:
+                next_requeue = time.monotonic() + requeue_interval
+                # A worker that crashed mid-job leaves it 'running'; one
+                # conditional UPDATE, so every thread may run it
+                requeued = requeue_stale()
+                if requeued:
+                    logger.warning('Worker %s requeued %d stale jobs', worker_id, requeued)
+            jobs = claim(worker_id, batch)
+            for job in jobs:
+                run_job(job)
+                processed += 1
+        except DatabaseError:
+            # e.g. "database is locked" on SQLite; a job claimed but not
+            # finished here is picked up again by requeue_stale()
+            logger.exception('Worker %s hit a database error, backing off', worker_id)
+            jobs = None
+        if not jobs:
+            if exit_when_idle and jobs is not None:
+                break
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+    return processed
@@ -0,0 +1,140 @@
+"""
+Typeahead user lookup for the recipient and inspector pickers.
+
+The compose, complaint and assign forms used to render every Admin or
+Inspector account into a ``<select>``. They now ask
+``/lookup/users/?scope=...&q=...`` as the user types and get at most
+``LOOKUP_MAX_RESULTS`` matches back.
+
+Matching is by word prefix over the username, first and last name and the
+words of the profile location. Each user's words are kept lowercased in
+UserLookupTerm, reindexed when the User or Profile is saved, and searched
+with ``term LIKE 'abc%'`` on ``user_lookup_term_idx`` (user type first, so
+a scope only scans its own roles). Every word of the query must prefix one
+of the user's words. Approval, ban and deactivation are filtered on the
+joined profile, so they take effect without reindexing.
+
+Results are cached for ``LOOKUP_CACHE_SECONDS`` per scope and query; a
+rename or approval shows up in the typeahead within that time. Posted ids
+are checked against the same scope with ``choice()``.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import UserLookupTerm
+
+KEY_PREFIX = 'lookup:v1'
+TERM_LENGTH = 50
+# User/Profile fields the terms are built from
+INDEXED_FIELDS = {'username', 'first_name', 'last_name', 'user_type', 'location'}
+
+# scope: (roles, approved and unbanned only, order)
+SCOPES = {
+    # Message recipients
+    'recipients': (('Admin', 'Inspector'), False, ('username',)),
+    # Inspectors an owner can complain about
+    'inspectors': (('Inspector',), False, ('username',)),
+    # Inspectors an admin can assign, least loaded first (profile_type_workload_idx)
+    'assignable': (('Inspector',), True, ('profile__open_inspections', 'username')),
+}
+STAFF_SCOPES = ('assignable',)
+
+
+def max_results():
+    return getattr(settings, 'LOOKUP_MAX_RESULTS', 10)
+
+
+def cache_seconds():
+    return getattr(settings, 'LOOKUP_CACHE_SECONDS', 30)
+
+
+def words(text):
+    """Lowercased words of ``text``, as stored and as searched."""
+    return [word[:TERM_LENGTH] for word in re.findall(r'\w+', (text or '').lower())]
+
+
+def terms_for(username, first_name, last_name, location):
+    terms = {username.lower()[:TERM_LENGTH]}
+    for text in (username, first_name, last_name, location):
+        terms.update(words(text))
+    return terms
+
+
+def index_user(user_id):
+    """Rewrite ``user_id``'s lookup terms when they changed."""
+    row = (User.objects.filter(pk=user_id)
+           .values('username', 'first_name', 'last_name', 'profile__user_type', 'profile__location').first())
+    if row is None:
+        return
+    user_type = row['profile__user_type'] or ''
+    terms = terms_for(row['username'], row['first_name'], row['last_name'], row['profile__location'])
+    current = set(UserLookupTerm.objects.filter(user_id=user_id).values_list('user_type', 'term'))
+    if current == {(user_type, term) for term in terms}:
+        return
+    with transaction.atomic():
+        UserLookupTerm.objects.filter(user_id=user_id).delete()
+        UserLookupTerm.objects.bulk_create(
+            UserLookupTerm(user_id=user_id, user_type=user_type, term=term) for term in sorted(terms))
+
+
+def candidates(scope):
+    """Users ``scope`` may pick, before any search."""
+    roles, approved_only, order = SCOPES[scope]
+    users = User.objects.filter(is_active=True, profile__user_type__in=roles,
+                                profile__deactivated_at__isnull=True)
+    if approved_only:
+        users = users.filter(profile__is_approved=True, profile__is_banned=False)
+    return users.order_by(*order)
+
+
+def _matching(roles, word):
+    # SQL: EXISTS (SELECT 1 FROM user_lookup_term t
+    #              WHERE t.user_id = auth_user.id AND t.user_type IN (...) AND t.term LIKE 'abc%')
+    return Exists(UserLookupTerm.objects.filter(user_id=OuterRef('pk'), user_type__in=roles,
+                                                term__startswith=word))
+
+
+def search(scope, query, limit=None):
+    """Up to ``limit`` users of ``scope`` matching ``query``, as JSON-ready dicts."""
+    limit = limit or max_results()
+    query_words = words(query)
+    if not query_words:
+        return []
+    key = f'{KEY_PREFIX}:{scope}:{limit}:' + hashlib.sha256(' '.join(query_words).encode()).hexdigest()
+    results = cache.get(key)
+    if results is None:
+        roles = SCOPES[scope][0]
+        # Longest word first: the narrowest index range drives the scan
+        query_words.sort(key=len, reverse=True)
+        users = candidates(scope).select_related('profile')
+        for word in query_words:
+            users = users.filter(_matching(roles, word))
+        results = []
+        for user in users[:limit]:
+            row = {
+                'id': user.pk,
+                'username': user.username,
+                'name': user.get_full_name() or user.username,
+                'location': user.profile.location or '',
+            }
+            if scope in STAFF_SCOPES:
+                # Workload is for admins' eyes only
+                row['open_inspections'] = user.profile.open_inspections
+            results.append(row)
+        cache.set(key, results, cache_seconds())
+    return results
+
+
+def choice(scope, user_id):
+    """The User posted for ``scope``, or None if it isn't one of its candidates."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return candidates(scope).filter(pk=user_id).first()
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from myapp import archive
+
+
+class Command(BaseCommand):
+    help = ('Move closed requests older than ARCHIVE_AFTER_DAYS and read messages older than '
+            'ARCHIVE_MESSAGES_AFTER_DAYS to the archive tables, one batch per transaction')
+
+    def handle(self, *args, **options):
+        requests, messages = archive.archive_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {requests} request(s) and {messages} message(s).'))
@@ -0,0 +1,89 @@
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from myapp.models import InspectionRequest
+from myapp.scratch_db import scratch_database
+
+
+class Command(BaseCommand):
+    help = ('Measure requests per second on the owner dashboard with and without persistent DB connections, '
+            'against a scratch database on the configured server. The configured database is not touched.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per mode')
+        parser.add_argument('--host', default='localhost', help='Host header (must be in ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        # The bench account and its requests (created without their rollup
+        # and counter updates) must never land in the real database
+        with scratch_database('default'):
+            self._bench(options)
+        self.stdout.write(self.style.SUCCESS('Finished connection reuse benchmark.'))
+
+    def _bench(self, options):
+        n = options['requests']
+        owner = User.objects.create(username='conn_bench_owner')
+        InspectionRequest.objects.bulk_create(
+            InspectionRequest(owner=owner, building_location=f'Bench site {i}') for i in range(20))
+        # Log in once through the test client, then replay its session cookie
+        # against the real WSGI handler: unlike the test client, the handler
+        # closes connections at the end of each request as a server would.
+        client = Client(HTTP_HOST=options['host'])
+        client.force_login(owner)
+        session_cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        handler = WSGIHandler()
+
+        def get(path):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': options['host'], 'SERVER_PORT': '80', 'HTTP_HOST': options['host'],
+                'HTTP_COOKIE': session_cookie, 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.input': BytesIO(), 'wsgi.errors': self.stderr, 'wsgi.url_scheme': 'http',
+                'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            response = handler(environ, lambda s, headers: status.append(s))
+            b''.join(response)
+            response.close()  # fires request_finished, which closes expired connections
+            return status[0]
+
+        db = connections['default']
+        original = (db.settings_dict.get('CONN_MAX_AGE', 0), db.settings_dict.get('CONN_HEALTH_CHECKS', False))
+        modes = (
+            ('new connection per request (CONN_MAX_AGE=0)', 0, False),
+            ('persistent (CONN_MAX_AGE=600)', 600, False),
+            ('persistent + health checks', 600, True),
+        )
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        try:
+            for label, max_age, health_checks in modes:
+                # The lifetime is read when a connection opens, so start fresh
+                db.close()
+                db.settings_dict['CONN_MAX_AGE'] = max_age
+                db.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                get('/owner/dashboard/')  # warm up
+                opened.clear()
+                start = time.perf_counter()
+                for _ in range(n):
+                    status = get('/owner/dashboard/')
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'{label}: {n / elapsed:.0f} req/s '
+                                  f'({elapsed / n * 1000:.2f} ms/request, {len(opened)} connections opened, '
+                                  f'last status {status})')
+        finally:
+            connection_created.disconnect(count_connection)
+            db.close()
+            db.settings_dict['CONN_MAX_AGE'], db.settings_dict['CONN_HEALTH_CHECKS'] = original
@@ -1,17 +1,19 @@
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from myapp.models import Profile
+from myapp import jobs
+from myapp.tasks import fix_admin_profiles
 
 
 class Command(BaseCommand):
     help = 'Ensure staff/superuser users have Profile.user_type set to Admin'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--enqueue', action='store_true', help='Queue the fixup for run_workers instead')
+
     def handle(self, *args, **options):
-        users = User.objects.filter(is_staff=True)
-        for u in users:
-            profile, created = Profile.objects.get_or_create(user=u)
-            if profile.user_type != 'Admin':
-                profile.user_type = 'Admin'
-                profile.save()
-                self.stdout.write(self.style.SUCCESS(f"Set Admin for {u.username}"))
+        if options['enqueue']:
+            job = jobs.enqueue('fix_admin_profiles')
+            self.stdout.write(self.style.SUCCESS(f'Queued job #{job.pk}.'))
+            return
+        for username in fix_admin_profiles():
+            self.stdout.write(self.style.SUCCESS(f"Set Admin for {username}"))
         self.stdout.write(self.style.SUCCESS('Finished updating admin profiles.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from myapp import purge
+
+
+class Command(BaseCommand):
+    help = 'Queue the background purge of every deactivated account not yet removed'
+
+    def handle(self, *args, **options):
+        user_ids = purge.pending_user_ids()
+        for user_id in user_ids:
+            purge.schedule(user_id)
+        self.stdout.write(self.style.SUCCESS(f'Scheduled the purge of {len(user_ids)} deactivated account(s).'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from myapp.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete offline-sync tombstones older than SYNC_TOMBSTONE_DAYS'
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstone(s).'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from myapp.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard rollup tables from the source tables'
+
+    def handle(self, *args, **options):
+        counts = rebuild_rollups()
+        for table, n in counts.items():
+            self.stdout.write(f"{table}: {n}")
+        self.stdout.write(self.style.SUCCESS('Finished rebuilding rollups.'))
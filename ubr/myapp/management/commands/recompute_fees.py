@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from myapp import fees
+
+
+class Command(BaseCommand):
+    help = 'Reprice every Pending request with the current fee rules (hand-set fees are kept)'
+
+    def handle(self, *args, **options):
+        changed = fees.recompute_pending()
+        self.stdout.write(self.style.SUCCESS(f'Repriced {changed} request(s).'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the Profile activity counters from the source tables and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drifted counters; exit with status 1 if any are found')
+
+    def handle(self, *args, **options):
+        drift = counters.find_drift()
+        for user_id, field, stored, actual in drift:
+            self.stdout.write(f'user {user_id}: {field} is {stored}, should be {actual}')
+        if options['check']:
+            if drift:
+                raise CommandError(f'{len(drift)} counter(s) drifted.')
+            self.stdout.write(self.style.SUCCESS('No drift.'))
+            return
+        fixed = counters.repair(drift)
+        self.stdout.write(self.style.SUCCESS(f'Repaired {fixed} counter(s).'))
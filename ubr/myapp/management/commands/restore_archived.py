@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp import archive
+
+
+class Command(BaseCommand):
+    help = 'Move archived requests (with report and payments) or messages back to the live tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', nargs='+', type=int, default=[], metavar='ID')
+        parser.add_argument('--messages', nargs='+', type=int, default=[], metavar='ID')
+
+    def handle(self, *args, **options):
+        if not options['requests'] and not options['messages']:
+            raise CommandError('Pass --requests and/or --messages ids.')
+        requests = archive.restore_requests(options['requests']) if options['requests'] else 0
+        messages = archive.restore_messages(options['messages']) if options['messages'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored {requests} request(s) and {messages} message(s).'))
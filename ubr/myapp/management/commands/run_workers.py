@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from myapp import jobs
+
+
+def _run_threads(threads, batch, poll_interval, once, stop, prefix):
+    def target(n):
+        try:
+            jobs.work(f'{prefix}:{n}', batch=batch, stop=stop, poll_interval=poll_interval,
+                      exit_when_idle=once)
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=target, args=(n,), name=f'job-worker-{n}') for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+def _process_main(threads, batch, poll_interval, once, prefix):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    _run_threads(threads, batch, poll_interval, once, stop, f'{prefix}:{os.getpid()}')
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (see myapp/jobs.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Worker threads per process')
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes')
+        parser.add_argument('--batch', type=int, default=1, help='Jobs claimed per round trip')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once no due jobs are left')
+
+    def handle(self, *args, **options):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs.'))
+        self.stdout.write(f"Starting {options['processes']} process(es) x {options['threads']} thread(s); "
+                          f"tasks: {', '.join(sorted(jobs.registered_tasks()))}")
+        prefix = socket.gethostname()
+        worker_args = (options['threads'], options['batch'], options['poll_interval'], options['once'])
+        if options['processes'] <= 1:
+            _process_main(*worker_args, prefix)
+        else:
+            # Forked children must not share the parent's DB connections
+            connections.close_all()
+            children = [multiprocessing.Process(target=_process_main, args=(*worker_args, prefix))
+                        for _ in range(options['processes'])]
+            for child in children:
+                child.start()
+            try:
+                for child in children:
+                    child.join()
+            except KeyboardInterrupt:
+                for child in children:
+                    child.terminate()
+                    child.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from myapp import scheduling
+
+
+class Command(BaseCommand):
+    help = 'Book an appointment for every Assigned request that has none, within SCHEDULE_HORIZON_DAYS'
+
+    def handle(self, *args, **options):
+        booked, unbooked = scheduling.schedule_backlog()
+        if unbooked:
+            self.stdout.write(self.style.WARNING(f'{unbooked} request(s) found no free slot within the horizon.'))
+        self.stdout.write(self.style.SUCCESS(f'Booked {booked} appointment(s).'))
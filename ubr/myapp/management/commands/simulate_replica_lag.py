@@ -0,0 +1,58 @@
+import shutil
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from myapp.db_router import PIN_COOKIE
+from myapp.models import InspectionRequest
+from myapp.scratch_db import scratch_sqlite
+
+
+class Command(BaseCommand):
+    help = ('Show read-your-writes stickiness against a lagging SQLite replica. Needs UBR_REPLICA_DB '
+            'set so the replica alias exists; the demo itself runs on scratch primary and replica '
+            'files and leaves both configured databases untouched.')
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError('No replica configured; set UBR_REPLICA_DB to a scratch SQLite file.')
+        for alias in ('default', replicas[0]):
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError('This simulation only works with SQLite primary and replica.')
+        # The demo payment credits the admin balance, moves the rollups and
+        # queues jobs: keep all of it on throwaway files
+        with scratch_sqlite('default', replicas[0]):
+            self._simulate(settings.DATABASES['default']['NAME'], settings.DATABASES[replicas[0]]['NAME'])
+        self.stdout.write(self.style.SUCCESS('Finished replica lag simulation (scratch databases removed).'))
+
+    def _simulate(self, primary_path, replica_path):
+        def replicate():
+            # "Replication": copy the primary file over the replica
+            connections.close_all()
+            shutil.copyfile(primary_path, replica_path)
+
+        owner = User.objects.create(username='replica_lag_demo_owner')
+        req = InspectionRequest.objects.create(owner=owner, building_location='Replica lag demo', fee=500)
+        replicate()
+        self.stdout.write(f'Replica in sync; request #{req.pk} is Pending on both databases.')
+
+        writer = Client(HTTP_HOST='localhost')
+        writer.force_login(owner)
+        writer.post(f'/owner/payment/{req.pk}/', {'method': 'Demo'})
+        self.stdout.write(f'Owner paid; primary now says Paid, replica still lags. '
+                          f'Pin cookie set: {PIN_COOKIE in writer.cookies}')
+
+        def status_seen(client):
+            page = client.get('/owner/dashboard/').content
+            return 'Paid' if b'<td>Paid</td>' in page else 'Pending'
+
+        self.stdout.write(f'  dashboard with pin cookie:    {status_seen(writer)} (read from primary)')
+        reader = Client(HTTP_HOST='localhost')
+        reader.cookies[settings.SESSION_COOKIE_NAME] = writer.cookies[settings.SESSION_COOKIE_NAME].value
+        self.stdout.write(f'  dashboard without pin cookie: {status_seen(reader)} (read from lagging replica)')
+
+        replicate()
+        self.stdout.write(f'Replica caught up; without pin cookie: {status_seen(reader)}')
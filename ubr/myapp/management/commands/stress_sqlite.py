@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from myapp.models import AdminBalance, InspectionRequest, Message, Payment
+from myapp.scratch_db import scratch_sqlite
+
+
+class Command(BaseCommand):
+    help = ('Hammer a scratch copy of the SQLite schema from several threads with payment/message '
+            'writes and dashboard reads, once with default options and once with SQLITE_TUNED_OPTIONS, '
+            'and report throughput and "database is locked" error rates. The configured database '
+            'is not touched.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+        parser.add_argument('--write-ratio', type=float, default=0.3, help='Share of operations that write')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('stress_sqlite only runs against a SQLite default database.')
+        db_settings = connections.settings['default']
+        original_options = dict(db_settings.get('OPTIONS', {}))
+
+        # The writes credit AdminBalance and leave payments, messages and side
+        # rows behind: run them on a throwaway database, never the real one
+        with scratch_sqlite('default'):
+            owner = User.objects.create(username='sqlite_stress_owner')
+            requests = InspectionRequest.objects.bulk_create(
+                InspectionRequest(owner=owner, building_location=f'Stress site {i}', fee=500)
+                for i in range(options['threads']))
+            AdminBalance.objects.get_or_create(pk=1)
+            try:
+                # Baseline: rollback journal, DEFERRED transactions, sqlite3's 5 s timeout
+                self._set_options(db_settings, {}, journal_mode='DELETE')
+                self._report('default options', self._run(owner, requests, options))
+                self._set_options(db_settings, settings.SQLITE_TUNED_OPTIONS)
+                self._report('SQLITE_TUNED_OPTIONS', self._run(owner, requests, options))
+            finally:
+                self._set_options(db_settings, original_options)
+        self.stdout.write(self.style.SUCCESS('Finished SQLite stress run.'))
+
+    def _set_options(self, db_settings, new_options, journal_mode=None):
+        connections.close_all()
+        db_settings['OPTIONS'] = dict(new_options)
+        if journal_mode:
+            # journal_mode is stored in the database file, so reset it explicitly
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+            connection.close()
+
+    def _run(self, owner, requests, options):
+        deadline = time.perf_counter() + options['seconds']
+        stats = {'reads': 0, 'writes': 0, 'locked': 0, 'other_errors': 0}
+        lock = threading.Lock()
+
+        def worker(req):
+            local = dict.fromkeys(stats, 0)
+            rng = random.Random(req.pk)
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        if rng.random() < options['write_ratio']:
+                            self._write(owner, req, rng)
+                            local['writes'] += 1
+                        else:
+                            self._read(owner)
+                            local['reads'] += 1
+                    except OperationalError as exc:
+                        local['locked' if 'locked' in str(exc) else 'other_errors'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        stats[key] += value
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(req,)) for req in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats['elapsed'] = time.perf_counter() - start
+        return stats
+
+    def _write(self, owner, req, rng):
+        if rng.random() < 0.5:
+            # Same shape as the payment view: read, then write inside one transaction
+            with transaction.atomic():
+                current = InspectionRequest.objects.get(pk=req.pk)
+                Payment.objects.create(payer=owner, inspection_request=current, amount=current.fee)
+                InspectionRequest.objects.filter(pk=req.pk).update(status='Paid')
+                AdminBalance.objects.filter(pk=1).update(balance=F('balance') + current.fee)
+        else:
+            Message.objects.create(sender=owner, recipient=owner, subject='stress', body='x' * 200)
+
+    def _read(self, owner):
+        list(InspectionRequest.objects.for_listing().filter(owner=owner)[:50])
+        Message.objects.filter(recipient=owner, is_read=False).count()
+
+    def _report(self, label, stats):
+        ops = stats['reads'] + stats['writes']
+        attempts = ops + stats['locked'] + stats['other_errors']
+        self.stdout.write(
+            f"{label}: {ops / stats['elapsed']:.0f} ops/s "
+            f"({stats['reads']} reads, {stats['writes']} writes), "
+            f"{stats['locked']} locked errors ({stats['locked'] / attempts:.1%} of attempts), "
+            f"{stats['other_errors']} other errors")
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Length
+from myapp.fields import COMPRESSED_MARKER, decode_text
+from myapp.models import InspectionReport, InspectionRequest, Message, REPORT_TEXT_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Report stored vs. uncompressed size of compressed text columns and time list querysets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per listing query')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions per listing query')
+
+    def handle(self, *args, **options):
+        columns = [(InspectionReport, name) for name in REPORT_TEXT_FIELDS] + [(Message, 'body')]
+        total_stored = total_plain = 0
+        for model, name in columns:
+            stored = model.objects.aggregate(n=Sum(Length(name)))['n'] or 0
+            rows = compressed_rows = plain = 0
+            qn = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                # Raw column values, so compressed rows can be told apart
+                cursor.execute(f'SELECT {qn(name)} FROM {qn(model._meta.db_table)}')
+                for (raw,) in cursor:
+                    rows += 1
+                    if isinstance(raw, (bytes, memoryview)) and bytes(raw[:1]) == COMPRESSED_MARKER:
+                        compressed_rows += 1
+                    plain += len((decode_text(raw) or '').encode('utf-8'))
+            total_stored += stored
+            total_plain += plain
+            ratio = f'{stored / plain:.1%}' if plain else '-'
+            self.stdout.write(f'{model.__name__}.{name}: {rows} rows, {compressed_rows} compressed, '
+                              f'{plain} bytes text -> {stored} bytes stored ({ratio})')
+        if total_plain:
+            self.stdout.write(self.style.SUCCESS(
+                f'Total: {total_plain} -> {total_stored} bytes ({total_stored / total_plain:.1%})'))
+
+        rows, repeat = options['rows'], options['repeat']
+        listings = {
+            'full rows (select_related report)': lambda: list(
+                InspectionRequest.objects.select_related('owner', 'inspector', 'report')[:rows]),
+            'for_listing (report text deferred)': lambda: list(
+                InspectionRequest.objects.for_listing()[:rows]),
+        }
+        for label, run in listings.items():
+            run()  # warm up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                run()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            self.stdout.write(f'{label}: {elapsed:.2f} ms per {rows}-row page')
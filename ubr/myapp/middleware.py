@@ -1,3 +1,6 @@
+import time
+
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.deprecation import MiddlewareMixin
@@ -14,7 +17,9 @@ class SessionSecurityMiddleware(MiddlewareMixin):
         Add cache-control headers to prevent browser caching of sensitive pages.
         This prevents users from accessing pages via the back button after logout.
         """
-        if request.user.is_authenticated:
+        # Responses that set their own caching policy (e.g. the JSON API's
+        # revalidated ETags) keep it
+        if request.user.is_authenticated and not response.has_header('Cache-Control'):
             # For authenticated users, prevent caching of protected pages
             response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
             response['Pragma'] = 'no-cache'
@@ -55,4 +60,39 @@ class LoginRequiredMiddleware(MiddlewareMixin):
         if not request.user.is_authenticated:
             return redirect('login')
         
-        return None
\ No newline at end of file
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let read-only dashboard/report views read from a replica and pin users
+    to the primary for a short window after they write (see myapp/db_router.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from . import db_router
+        try:
+            pinned_until = float(request.COOKIES.get(db_router.PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        token = db_router.begin_request(pinned_until)
+        try:
+            with connections['default'].execute_wrapper(db_router.track_writes):
+                response = self.get_response(request)
+            if db_router.wrote_during_request():
+                window = db_router.sticky_seconds()
+                response.set_cookie(db_router.PIN_COOKIE, str(int(time.time() + window)),
+                                    max_age=window, httponly=True, samesite='Lax')
+        finally:
+            db_router.end_request(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        from . import db_router
+        match = request.resolver_match
+        if request.method in ('GET', 'HEAD') and match and match.url_name in db_router.replica_read_views():
+            db_router.allow_replica_reads()
+        return None
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('unresolved', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RequestStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, unique=True)),
+                ('total', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InspectorWorkloadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_requests', models.IntegerField(default=0)),
+                ('complaints_total', models.IntegerField(default=0)),
+                ('complaints_open', models.IntegerField(default=0)),
+                ('inspector', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='workload_rollup', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
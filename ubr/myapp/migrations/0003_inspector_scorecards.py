@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0002_dashboard_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InspectorScorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reports_filed', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('turnaround_seconds', models.BigIntegerField(default=0)),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scorecard', to='myapp.profile')),
+            ],
+        ),
+    ]
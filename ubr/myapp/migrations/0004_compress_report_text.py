@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:40
+
+import myapp.fields
+from django.db import migrations
+
+
+class AlterTextToBinary(migrations.AlterField):
+    """AlterField from a text column to CompressedTextField's binary column.
+
+    PostgreSQL has no implicit text -> bytea cast, so the column type is
+    changed there with an explicit ``USING convert_to(...)``; other
+    databases convert the column as AlterField does. Existing rows keep
+    their text as plain UTF-8 bytes, which CompressedTextField reads.
+    """
+
+    def _convert(self, app_label, schema_editor, state, sql_type, function):
+        model = state.apps.get_model(app_label, self.model_name)
+        qn = schema_editor.quote_name
+        column = qn(model._meta.get_field(self.name).column)
+        schema_editor.execute(
+            f"ALTER TABLE {qn(model._meta.db_table)} ALTER COLUMN {column} "
+            f"TYPE {sql_type} USING {function}({column}, 'UTF8')")
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self._convert(app_label, schema_editor, to_state, 'bytea', 'convert_to')
+        else:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            # Only valid before 0005 compressed the rows
+            self._convert(app_label, schema_editor, to_state, 'text', 'convert_from')
+        else:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_inspector_scorecards'),
+    ]
+
+    operations = [
+        AlterTextToBinary(
+            model_name='inspectionreport',
+            name='compliance_checklist',
+            field=myapp.fields.CompressedTextField(blank=True),
+        ),
+        AlterTextToBinary(
+            model_name='inspectionreport',
+            name='remarks',
+            field=myapp.fields.CompressedTextField(blank=True),
+        ),
+        AlterTextToBinary(
+            model_name='inspectionreport',
+            name='structural_evaluation',
+            field=myapp.fields.CompressedTextField(blank=True),
+        ),
+        AlterTextToBinary(
+            model_name='message',
+            name='body',
+            field=myapp.fields.CompressedTextField(),
+        ),
+    ]
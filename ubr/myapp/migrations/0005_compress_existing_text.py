@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:42
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 500
+
+COMPRESSED_COLUMNS = (
+    ('InspectionReport', ('structural_evaluation', 'compliance_checklist', 'remarks')),
+    ('Message', ('body',)),
+)
+
+
+def compress_existing(apps, schema_editor):
+    # Rows converted by 0004 still hold plain text; re-saving them through
+    # CompressedTextField writes the compressed form. Walk each table in
+    # primary key order and commit every batch on its own so a large table
+    # never holds one long write lock.
+    for model_name, fields in COMPRESSED_COLUMNS:
+        model = apps.get_model('myapp', model_name)
+        last_pk = 0
+        while True:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                batch = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', *fields)[:BATCH_SIZE])
+                if not batch:
+                    break
+                model.objects.bulk_update(batch, fields)
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('myapp', '0004_compress_report_text'),
+    ]
+
+    operations = [
+        # Compressed rows can't be turned back into a TEXT column by
+        # AlterField, so this step is one-way.
+        migrations.RunPython(compress_existing),
+    ]
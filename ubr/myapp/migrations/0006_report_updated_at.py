@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_compress_existing_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionreport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
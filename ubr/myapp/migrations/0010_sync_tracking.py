@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_broadcasts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionrequest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='inspectionreport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('requests', 'Inspection request'), ('reports', 'Inspection report'), ('messages', 'Message')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('user_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'deleted_at'], name='sync_tombstone_user_idx')],
+            },
+        ),
+    ]
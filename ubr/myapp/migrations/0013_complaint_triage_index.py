@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_admin_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['resolved', '-id'], name='complaint_triage_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_complaint_triage_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inspectionrequest',
+            index=models.Index(fields=['owner', '-id'], name='request_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionrequest',
+            index=models.Index(fields=['inspector', '-id'], name='request_inspector_idx'),
+        ),
+    ]
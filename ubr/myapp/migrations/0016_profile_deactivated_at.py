@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_profile_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:10
+
+import django.db.models.deletion
+import django.utils.timezone
+import myapp.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_profile_deactivated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedInspectionRequest',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('req_type', models.CharField(choices=[('New Construction', 'New Construction'), ('Reinspection', 'Reinspection')], max_length=30)),
+                ('building_location', models.CharField(max_length=255)),
+                ('fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Assigned', 'Assigned'), ('Approved', 'Approved'), ('Rejected', 'Rejected'), ('Completed', 'Completed'), ('Paid', 'Paid')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('inspector', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_inspections', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedInspectionReport',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('inspection_date', models.DateTimeField()),
+                ('structural_evaluation', myapp.fields.CompressedTextField(blank=True)),
+                ('compliance_checklist', myapp.fields.CompressedTextField(blank=True)),
+                ('decision', models.CharField(blank=True, choices=[('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=20)),
+                ('remarks', myapp.fields.CompressedTextField(blank=True)),
+                ('updated_at', models.DateTimeField()),
+                ('inspector', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_reports', to=settings.AUTH_USER_MODEL)),
+                ('inspection_request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='report', to='myapp.archivedinspectionrequest')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('body', myapp.fields.CompressedTextField()),
+                ('sent_at', models.DateTimeField()),
+                ('is_read', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_received_messages', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sent_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('inspection_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='myapp.archivedinspectionrequest')),
+                ('payer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_payments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedinspectionrequest',
+            index=models.Index(fields=['owner', '-id'], name='archived_request_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedinspectionrequest',
+            index=models.Index(fields=['inspector', '-id'], name='archived_request_inspector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmessage',
+            index=models.Index(fields=['recipient', '-sent_at'], name='archived_message_inbox_idx'),
+        ),
+    ]
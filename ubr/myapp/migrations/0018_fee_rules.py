@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_archive_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('req_type', models.CharField(blank=True, choices=[('New Construction', 'New Construction'), ('Reinspection', 'Reinspection')], max_length=30)),
+                ('zone', models.CharField(blank=True, max_length=100)),
+                ('min_floors', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('max_floors', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('min_area', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_area', models.PositiveIntegerField(blank=True, null=True)),
+                ('base_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('per_floor', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('per_square_metre', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('priority', models.IntegerField(default=0)),
+                ('effective_from', models.DateField(default=django.utils.timezone.localdate)),
+                ('effective_to', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedinspectionrequest',
+            name='fee_overridden',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='archivedinspectionrequest',
+            name='floor_area',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedinspectionrequest',
+            name='floors',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inspectionrequest',
+            name='fee_overridden',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='inspectionrequest',
+            name='floor_area',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inspectionrequest',
+            name='floors',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 500
+
+
+def index_existing_users(apps, schema_editor):
+    # Later saves keep the terms current (index_user_lookup_terms in models.py);
+    # existing accounts are indexed once here, a batch per transaction.
+    from myapp.lookup import terms_for
+    User = apps.get_model('auth', 'User')
+    UserLookupTerm = apps.get_model('myapp', 'UserLookupTerm')
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            batch = list(User.objects.filter(pk__gt=last_pk).order_by('pk')
+                         .values_list('pk', 'username', 'first_name', 'last_name',
+                                      'profile__user_type', 'profile__location')[:BATCH_SIZE])
+            if not batch:
+                break
+            UserLookupTerm.objects.bulk_create(
+                UserLookupTerm(user_id=pk, user_type=user_type or '', term=term)
+                for pk, username, first_name, last_name, user_type, location in batch
+                for term in sorted(terms_for(username, first_name, last_name, location))
+            )
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('myapp', '0018_fee_rules'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLookupTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_type', models.CharField(max_length=20)),
+                ('term', models.CharField(max_length=50)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lookup_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_type', 'term'], name='user_lookup_term_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'])],
+            },
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0019_user_lookup_terms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InspectorAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InspectorTimeOff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('reason', models.CharField(blank=True, max_length=200)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedinspectionrequest',
+            name='appointment_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedinspectionrequest',
+            name='appointment_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inspectionrequest',
+            name='appointment_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inspectionrequest',
+            name='appointment_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionrequest',
+            index=models.Index(fields=['inspector', 'appointment_start'], name='request_appointment_idx'),
+        ),
+        migrations.AddField(
+            model_name='inspectoravailability',
+            name='inspector',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='inspectortimeoff',
+            name='inspector',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_off', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='inspectoravailability',
+            index=models.Index(fields=['inspector', 'weekday'], name='availability_inspector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectortimeoff',
+            index=models.Index(fields=['inspector', 'end'], name='time_off_inspector_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0020_appointments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', '-sent_at', '-id'], name='message_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:05
+
+from django.conf import settings
+from django.contrib.auth.hashers import is_password_usable, make_password
+from django.db import migrations
+
+
+def create_sender(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    username = getattr(settings, 'NOTIFICATION_SENDER_USERNAME', 'notifications')
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        User.objects.create(username=username, is_active=False, password=make_password(None))
+    elif user.is_active or is_password_usable(user.password):
+        # Someone signed up with the name before it was reserved
+        raise RuntimeError(
+            f'A regular account is called {username!r}, the notification sender name. '
+            f'Rename it (or set NOTIFICATION_SENDER_USERNAME) and migrate again.')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0021_message_inbox_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sender, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
 # myapp/models.py
+from decimal import Decimal
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from .fields import CompressedTextField
 
 
 class Profile(models.Model):
@@ -26,6 +31,20 @@ class Profile(models.Model):
     # SQL: is_approved BOOLEAN DEFAULT TRUE
     is_banned = models.BooleanField(default=False)
     # SQL: is_banned BOOLEAN DEFAULT FALSE
+    deactivated_at = models.DateTimeField(null=True, blank=True)
+    # SQL: deactivated_at TIMESTAMP NULL  -- account removed, rows being purged in the background (myapp/purge.py)
+
+    # Activity counters, kept in step by myapp/counters.py (F() increments on every write)
+    requests_owned = models.IntegerField(default=0)
+    # SQL: requests_owned INTEGER DEFAULT 0
+    open_inspections = models.IntegerField(default=0)
+    # SQL: open_inspections INTEGER DEFAULT 0  -- assigned requests still open
+    reports_filed = models.IntegerField(default=0)
+    # SQL: reports_filed INTEGER DEFAULT 0
+    complaints_open = models.IntegerField(default=0)
+    # SQL: complaints_open INTEGER DEFAULT 0  -- unresolved complaints against this user
+    unread_messages = models.IntegerField(default=0)
+    # SQL: unread_messages INTEGER DEFAULT 0
 
     #CREATE TABLE profile (
     #id SERIAL PRIMARY KEY,
@@ -35,8 +54,21 @@ class Profile(models.Model):
     #phone VARCHAR(30),
     #location VARCHAR(255),
     #is_approved BOOLEAN DEFAULT TRUE,
-    #is_banned BOOLEAN DEFAULT FALSE
+    #is_banned BOOLEAN DEFAULT FALSE,
+    #deactivated_at TIMESTAMP,
+    #requests_owned INTEGER DEFAULT 0,
+    #open_inspections INTEGER DEFAULT 0,
+    #reports_filed INTEGER DEFAULT 0,
+    #complaints_open INTEGER DEFAULT 0,
+    #unread_messages INTEGER DEFAULT 0
     #  );
+    # CREATE INDEX profile_type_workload_idx ON profile (user_type, open_inspections, id);
+    # CREATE INDEX profile_workload_idx ON profile (open_inspections, id);
+    # CREATE INDEX profile_requests_idx ON profile (requests_owned, id);
+
+    # Least loaded approved inspectors first, for assignment (index scan)
+    # SELECT * FROM profile WHERE user_type = 'Inspector' AND is_approved AND NOT is_banned
+    # ORDER BY open_inspections LIMIT 20
     #Get all inspectors pending approval
     #SELECT u.username, p.phone
     #FROM profile p
@@ -48,11 +80,141 @@ class Profile(models.Model):
     
     # Update profile information
     # UPDATE profile SET phone=%s, location=%s WHERE user_id=%s
+
+    class Meta:
+        indexes = [
+            # Workload orderings (assignment, admin users page) read these instead of sorting
+            models.Index(fields=['user_type', 'open_inspections', 'id'], name='profile_type_workload_idx'),
+            models.Index(fields=['open_inspections', 'id'], name='profile_workload_idx'),
+            models.Index(fields=['requests_owned', 'id'], name='profile_requests_idx'),
+        ]
+
     def __str__(self):
         # SQL: SELECT CONCAT(u.username, ' (', p.user_type, ')') FROM profile p JOIN auth_user u ON p.user_id = u.id WHERE p.id = %s
         return f"{self.user.username} ({self.user_type})"
 
 
+class InspectorAvailability(models.Model):
+    """A weekly working window of an inspector, for appointment booking (see myapp/scheduling.py)."""
+    WEEKDAYS = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    inspector = models.ForeignKey(User, on_delete=models.CASCADE, related_name='availability')
+    # SQL: FOREIGN KEY (inspector_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    # SQL: weekday SMALLINT NOT NULL  -- 0 = Monday
+    start_time = models.TimeField()
+    # SQL: start_time TIME NOT NULL  -- local time (TIME_ZONE)
+    end_time = models.TimeField()
+    # SQL: end_time TIME NOT NULL
+    # CREATE TABLE inspector_availability (
+    #   id SERIAL PRIMARY KEY,
+    #   inspector_id INTEGER REFERENCES auth_user(id),
+    #   weekday SMALLINT,
+    #   start_time TIME,
+    #   end_time TIME
+    # );
+    # CREATE INDEX availability_inspector_idx ON inspector_availability (inspector_id, weekday);
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['inspector', 'weekday'], name='availability_inspector_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.inspector.username}: {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
+class InspectorTimeOff(models.Model):
+    """A stretch of time an inspector can't be booked (leave, training)."""
+    inspector = models.ForeignKey(User, on_delete=models.CASCADE, related_name='time_off')
+    # SQL: FOREIGN KEY (inspector_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    start = models.DateTimeField()
+    # SQL: start TIMESTAMP NOT NULL
+    end = models.DateTimeField()
+    # SQL: "end" TIMESTAMP NOT NULL
+    reason = models.CharField(max_length=200, blank=True)
+    # SQL: reason VARCHAR(200) NULL
+    # CREATE TABLE inspector_time_off (
+    #   id SERIAL PRIMARY KEY,
+    #   inspector_id INTEGER REFERENCES auth_user(id),
+    #   start TIMESTAMP,
+    #   "end" TIMESTAMP,
+    #   reason VARCHAR(200)
+    # );
+    # CREATE INDEX time_off_inspector_idx ON inspector_time_off (inspector_id, "end");
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['inspector', 'end'], name='time_off_inspector_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.inspector.username} off {self.start} - {self.end}"
+
+
+class UserLookupTerm(models.Model):
+    """One searchable word of a user, for the typeahead user lookup (see myapp/lookup.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='lookup_terms')
+    # SQL: FOREIGN KEY (user_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    user_type = models.CharField(max_length=20)
+    # SQL: user_type VARCHAR(20) NOT NULL  -- copy of profile.user_type, leads the index
+    term = models.CharField(max_length=50)
+    # SQL: term VARCHAR(50) NOT NULL  -- lowercased username, name or location word
+    # CREATE TABLE user_lookup_term (
+    #   id SERIAL PRIMARY KEY,
+    #   user_id INTEGER REFERENCES auth_user(id),
+    #   user_type VARCHAR(20),
+    #   term VARCHAR(50)
+    # );
+    # CREATE INDEX user_lookup_term_idx ON user_lookup_term (user_type varchar_pattern_ops, term varchar_pattern_ops);
+
+    # Prefix search: an index range scan
+    # SELECT DISTINCT user_id FROM user_lookup_term WHERE user_type IN (%s) AND term LIKE 'abc%';
+
+    class Meta:
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL use the index for LIKE 'abc%' under any collation
+            models.Index(fields=['user_type', 'term'], name='user_lookup_term_idx',
+                         opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ]
+
+
+# Large free-text columns of InspectionReport that listings never display
+REPORT_TEXT_FIELDS = ('structural_evaluation', 'compliance_checklist', 'remarks')
+
+
+class InspectionRequestQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Join owner, inspector and report for list pages, skipping report text columns."""
+        # SQL: SELECT ir.*, o.*, i.*, r.id, r.inspector_id, r.inspection_date, r.decision
+        #      FROM inspection_request ir
+        #      JOIN auth_user o ON o.id = ir.owner_id
+        #      LEFT JOIN auth_user i ON i.id = ir.inspector_id
+        #      LEFT JOIN inspection_report r ON r.inspection_request_id = ir.id
+        return (self.select_related('owner', 'inspector', 'report')
+                .defer(*(f'report__{name}' for name in REPORT_TEXT_FIELDS)))
+
+    def with_payments(self):
+        """Annotate ``amount_paid``, the sum of the request's payments (0 if none)."""
+        # SQL: SELECT ir.*, COALESCE((SELECT SUM(p.amount) FROM payment p
+        #                             WHERE p.inspection_request_id = ir.id), 0) AS amount_paid
+        # Payment, or ArchivedPayment on the archive table
+        payments = self.model._meta.get_field('payments').related_model
+        paid = (payments.objects.filter(inspection_request=OuterRef('pk'))
+                .order_by().values('inspection_request').annotate(total=Sum('amount')).values('total'))
+        return self.annotate(amount_paid=Coalesce(
+            Subquery(paid), Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+
+
 class InspectionRequest(models.Model):
     REQ_TYPES = (
         ('New Construction', 'New Construction'),
@@ -75,11 +237,25 @@ class InspectionRequest(models.Model):
     building_location = models.CharField(max_length=255)
     # SQL: building_location VARCHAR(255) NOT NULL
     fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    # SQL: fee DECIMAL(10,2) DEFAULT 0
+    # SQL: fee DECIMAL(10,2) DEFAULT 0  -- priced by the fee rules (myapp/fees.py)
+    fee_overridden = models.BooleanField(default=False)
+    # SQL: fee_overridden BOOLEAN DEFAULT FALSE  -- set by an admin, left alone by fee recomputation
+    floors = models.PositiveSmallIntegerField(null=True, blank=True)
+    # SQL: floors SMALLINT NULL
+    floor_area = models.PositiveIntegerField(null=True, blank=True)
+    # SQL: floor_area INTEGER NULL  -- square metres
+    appointment_start = models.DateTimeField(null=True, blank=True)
+    # SQL: appointment_start TIMESTAMP NULL  -- inspection visit, booked by myapp/scheduling.py
+    appointment_end = models.DateTimeField(null=True, blank=True)
+    # SQL: appointment_end TIMESTAMP NULL
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     # SQL: status VARCHAR(20) DEFAULT 'Pending' CHECK (status IN ('Pending', 'Assigned', 'Approved', 'Rejected', 'Completed', 'Paid'))
-    created_at = models.DateTimeField(auto_now_add=True)
-    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- indexed for the admin date drill-down
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # SQL: updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- bumped on every save, sync cursor
+
+    objects = InspectionRequestQuerySet.as_manager()
     # CREATE TABLE inspection_request (
     #   id SERIAL PRIMARY KEY,
     #   owner_id INTEGER REFERENCES auth_user(id),
@@ -87,6 +263,11 @@ class InspectionRequest(models.Model):
     #   req_type VARCHAR(30),
     #   building_location VARCHAR(255),
     #   fee DECIMAL(10,2),
+    #   fee_overridden BOOLEAN,
+    #   floors SMALLINT,
+    #   floor_area INTEGER,
+    #   appointment_start TIMESTAMP,
+    #   appointment_end TIMESTAMP,
     #   status VARCHAR(20),
     #   created_at TIMESTAMP
     # );
@@ -107,6 +288,23 @@ class InspectionRequest(models.Model):
     # Count requests by status
     # SELECT status, COUNT(*) FROM inspection_request GROUP BY status
 
+    # CREATE INDEX request_owner_idx ON inspection_request (owner_id, id DESC);
+    # CREATE INDEX request_inspector_idx ON inspection_request (inspector_id, id DESC);
+    # CREATE INDEX request_appointment_idx ON inspection_request (inspector_id, appointment_start);
+
+    # An inspector's calendar
+    # SELECT id, appointment_start, appointment_end FROM inspection_request
+    # WHERE inspector_id = %s AND appointment_start < %s AND appointment_end > %s;
+
+    class Meta:
+        indexes = [
+            # Dashboards page a user's requests newest first (keyset on id)
+            models.Index(fields=['owner', '-id'], name='request_owner_idx'),
+            models.Index(fields=['inspector', '-id'], name='request_inspector_idx'),
+            # Loading inspectors' booked appointments for scheduling
+            models.Index(fields=['inspector', 'appointment_start'], name='request_appointment_idx'),
+        ]
+
     def __str__(self):
         return f"{self.owner.username} - {self.building_location} ({self.status})"
         # SQL: SELECT CONCAT(u.username, ' - ', building_location, ' (', status, ')') FROM inspection_request ir JOIN auth_user u ON ir.owner_id = u.id WHERE ir.id = %s
@@ -119,14 +317,16 @@ class InspectionReport(models.Model):
     # SQL: FOREIGN KEY (inspector_id) REFERENCES auth_user(id) ON DELETE SET NULL
     inspection_date = models.DateTimeField(default=timezone.now)
     # SQL: inspection_date TIMESTAMP DEFAULT NOW()
-    structural_evaluation = models.TextField(blank=True)
-    # SQL: structural_evaluation TEXT NULL
-    compliance_checklist = models.TextField(blank=True)
-    # SQL: compliance_checklist TEXT NULL
+    structural_evaluation = CompressedTextField(blank=True)
+    # SQL: structural_evaluation BLOB NULL  -- zlib-compressed, see myapp/fields.py
+    compliance_checklist = CompressedTextField(blank=True)
+    # SQL: compliance_checklist BLOB NULL  -- zlib-compressed
     decision = models.CharField(max_length=20, choices=(('Approved','Approved'),('Rejected','Rejected')), blank=True)
     # SQL: decision VARCHAR(20) NULL CHECK (decision IN ('Approved', 'Rejected'))
-    remarks = models.TextField(blank=True)
-    # SQL: remarks TEXT NULL
+    remarks = CompressedTextField(blank=True)
+    # SQL: remarks BLOB NULL  -- zlib-compressed
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # SQL: updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- bumped on every save, sync cursor
     # CREATE TABLE inspection_report (
     #   id SERIAL PRIMARY KEY,
     #   inspection_request_id INTEGER UNIQUE REFERENCES inspection_request(id),
@@ -135,7 +335,8 @@ class InspectionReport(models.Model):
     #   structural_evaluation TEXT,
     #   compliance_checklist TEXT,
     #   decision VARCHAR(20),
-    #   remarks TEXT
+    #   remarks TEXT,
+    #   updated_at TIMESTAMP
     # );
 
     # Insert inspection report
@@ -166,8 +367,8 @@ class Complaint(models.Model):
     
     resolved = models.BooleanField(default=False)
     # SQL: resolved BOOLEAN DEFAULT FALSE
-    created_at = models.DateTimeField(auto_now_add=True)
-    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- indexed for the admin date drill-down
     # CREATE TABLE complaint (
     #   id SERIAL PRIMARY KEY,
     #   reporter_id INTEGER REFERENCES auth_user(id),
@@ -177,6 +378,13 @@ class Complaint(models.Model):
     #   resolved BOOLEAN DEFAULT FALSE,
     #   created_at TIMESTAMP
     # );
+    # CREATE INDEX complaint_triage_idx ON complaint (resolved, id DESC);
+
+    class Meta:
+        indexes = [
+            # Triage queue order: unresolved first, newest first (keyset on id)
+            models.Index(fields=['resolved', '-id'], name='complaint_triage_idx'),
+        ]
 
     # Get unresolved complaints
     # SELECT *
@@ -201,15 +409,17 @@ class Message(models.Model):
     # SQL: FOREIGN KEY (recipient_id) REFERENCES auth_user(id) ON DELETE CASCADE
     subject = models.CharField(max_length=200, blank=True)
      # SQL: subject VARCHAR(200) NULL
-    body = models.TextField()
-    # SQL: body TEXT NOT NULL
-    sent_at = models.DateTimeField(auto_now_add=True)
-    # SQL: sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    body = CompressedTextField()
+    # SQL: body BLOB NOT NULL  -- zlib-compressed
+    sent_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # SQL: sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- indexed for the admin date drill-down
     is_read = models.BooleanField(default=False)
         # SQL: sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     
     is_read = models.BooleanField(default=False)
     # SQL: is_read BOOLEAN DEFAULT FALSE
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # SQL: updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- bumped on every save, sync cursor
     # CREATE TABLE message (
     #   id SERIAL PRIMARY KEY,
     #   sender_id INTEGER REFERENCES auth_user(id),
@@ -220,11 +430,13 @@ class Message(models.Model):
     #   is_read BOOLEAN DEFAULT FALSE
     # );
 
-    # Inbox messages
+    # CREATE INDEX message_inbox_idx ON message (recipient_id, sent_at DESC, id DESC);
+
+    # Inbox messages, a page at a time
     # SELECT *
     # FROM message
-    # WHERE recipient_id = 3
-    # ORDER BY sent_at DESC;
+    # WHERE recipient_id = 3 AND (sent_at < %s OR (sent_at = %s AND id < %s))
+    # ORDER BY sent_at DESC, id DESC LIMIT 26;
     
     # Send new message
     # INSERT INTO message (sender_id, recipient_id, subject, body) VALUES (%s, %s, %s, %s)
@@ -235,6 +447,12 @@ class Message(models.Model):
     # Get unread count
     # SELECT COUNT(*) FROM message WHERE recipient_id=%s AND is_read=FALSE
 
+    class Meta:
+        indexes = [
+            # Inbox pages (keyset on sent_at, id)
+            models.Index(fields=['recipient', '-sent_at', '-id'], name='message_inbox_idx'),
+        ]
+
     def __str__(self):
          # SQL: SELECT CONCAT('Message from user #', sender_id, ' to user #', recipient_id) FROM message WHERE id = %s
         return f"Message from {self.sender.username} to {self.recipient.username}"
@@ -247,8 +465,8 @@ class Payment(models.Model):
     # SQL: FOREIGN KEY (inspection_request_id) REFERENCES inspection_request(id) ON DELETE SET NULL
     amount = models.DecimalField(max_digits=10, decimal_places=2)
      # SQL: amount DECIMAL(10,2) NOT NULL
-    created_at = models.DateTimeField(auto_now_add=True)
-    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- indexed for the admin date drill-down
     # CREATE TABLE payment (
     #   id SERIAL PRIMARY KEY,
     #   payer_id INTEGER REFERENCES auth_user(id),
@@ -301,6 +519,67 @@ class AdminBalance(models.Model):
         return f"Admin Balance: {self.balance}"
 
 
+class FeeRule(models.Model):
+    """
+    How much an inspection costs (see myapp/fees.py).
+
+    A rule matches a request by type, zone and building size; blank or null
+    criteria match anything. Of the rules in effect on a date the highest
+    ``priority`` wins, then the most specific one.
+    """
+    name = models.CharField(max_length=100)
+    # SQL: name VARCHAR(100) NOT NULL
+    req_type = models.CharField(max_length=30, choices=InspectionRequest.REQ_TYPES, blank=True)
+    # SQL: req_type VARCHAR(30) NULL  -- '' matches every type
+    zone = models.CharField(max_length=100, blank=True)
+    # SQL: zone VARCHAR(100) NULL  -- matched case-insensitively inside building_location
+    min_floors = models.PositiveSmallIntegerField(null=True, blank=True)
+    # SQL: min_floors SMALLINT NULL
+    max_floors = models.PositiveSmallIntegerField(null=True, blank=True)
+    # SQL: max_floors SMALLINT NULL
+    min_area = models.PositiveIntegerField(null=True, blank=True)
+    # SQL: min_area INTEGER NULL  -- square metres
+    max_area = models.PositiveIntegerField(null=True, blank=True)
+    # SQL: max_area INTEGER NULL
+    base_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    # SQL: base_fee DECIMAL(10,2) NOT NULL
+    per_floor = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # SQL: per_floor DECIMAL(10,2) DEFAULT 0
+    per_square_metre = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+    # SQL: per_square_metre DECIMAL(10,4) DEFAULT 0
+    priority = models.IntegerField(default=0)
+    # SQL: priority INTEGER DEFAULT 0
+    effective_from = models.DateField(default=timezone.localdate)
+    # SQL: effective_from DATE NOT NULL
+    effective_to = models.DateField(null=True, blank=True)
+    # SQL: effective_to DATE NULL  -- last day the rule applies, NULL for open-ended
+    updated_at = models.DateTimeField(auto_now=True)
+    # SQL: updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # CREATE TABLE fee_rule (
+    #   id SERIAL PRIMARY KEY,
+    #   name VARCHAR(100),
+    #   req_type VARCHAR(30),
+    #   zone VARCHAR(100),
+    #   min_floors SMALLINT,
+    #   max_floors SMALLINT,
+    #   min_area INTEGER,
+    #   max_area INTEGER,
+    #   base_fee DECIMAL(10,2),
+    #   per_floor DECIMAL(10,2),
+    #   per_square_metre DECIMAL(10,4),
+    #   priority INTEGER,
+    #   effective_from DATE,
+    #   effective_to DATE,
+    #   updated_at TIMESTAMP
+    # );
+
+    # The whole table is read at once and compiled in memory
+    # SELECT * FROM fee_rule;
+
+    def __str__(self):
+        return self.name
+
+
 @receiver(post_save, sender=User)
 def ensure_user_profile(sender, instance, created, **kwargs):
     # SQL equivalent for get_or_create:
@@ -317,3 +596,633 @@ def ensure_user_profile(sender, instance, created, **kwargs):
         if profile.user_type != 'Admin':
             profile.user_type = 'Admin'
             profile.save()
+
+
+@receiver(post_save, sender=FeeRule)
+@receiver(post_delete, sender=FeeRule)
+def invalidate_fee_rules(sender, instance, **kwargs):
+    # Every process recompiles its fee rule table on its next lookup
+    from .fees import invalidate
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def index_user_lookup_terms(sender, instance, update_fields=None, **kwargs):
+    # Logins save User with update_fields={'last_login'}: nothing to reindex
+    from . import lookup
+    if update_fields is not None and not set(update_fields) & lookup.INDEXED_FIELDS:
+        return
+    lookup.index_user(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(post_save, sender=InspectionReport)
+@receiver(post_delete, sender=InspectionReport)
+def invalidate_report_artifacts(sender, instance, **kwargs):
+    # Drop cached text/HTML renderings of the report (see myapp/report_cache.py)
+    from .report_cache import invalidate
+    invalidate(instance.pk)
+
+
+class RequestStatusRollup(models.Model):
+    # One row per InspectionRequest.status, kept in step by the write paths
+    # in views.py via myapp.rollups and rebuilt by `manage.py rebuild_rollups`.
+    status = models.CharField(max_length=20, unique=True)
+    # SQL: status VARCHAR(20) UNIQUE NOT NULL
+    total = models.IntegerField(default=0)
+    # SQL: total INTEGER DEFAULT 0
+    # CREATE TABLE request_status_rollup (
+    #   id SERIAL PRIMARY KEY,
+    #   status VARCHAR(20) UNIQUE,
+    #   total INTEGER DEFAULT 0
+    # );
+
+    # Replaces: SELECT status, COUNT(*) FROM inspection_request GROUP BY status
+    # SELECT status, total FROM request_status_rollup
+
+    # Move one request between statuses
+    # UPDATE request_status_rollup SET total = total - 1 WHERE status = 'Pending';
+    # UPDATE request_status_rollup SET total = total + 1 WHERE status = 'Assigned';
+
+    def __str__(self):
+        return f"{self.status}: {self.total}"
+
+
+class DailyRevenueRollup(models.Model):
+    day = models.DateField(unique=True)
+    # SQL: day DATE UNIQUE NOT NULL
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # SQL: amount DECIMAL(14,2) DEFAULT 0
+    payments = models.IntegerField(default=0)
+    # SQL: payments INTEGER DEFAULT 0
+    # CREATE TABLE daily_revenue_rollup (
+    #   id SERIAL PRIMARY KEY,
+    #   day DATE UNIQUE,
+    #   amount DECIMAL(14,2) DEFAULT 0,
+    #   payments INTEGER DEFAULT 0
+    # );
+
+    # Replaces: SELECT DATE(created_at), SUM(amount), COUNT(*) FROM payment GROUP BY DATE(created_at)
+    # SELECT day, amount, payments FROM daily_revenue_rollup WHERE day >= %s ORDER BY day DESC
+
+    # Record a payment
+    # UPDATE daily_revenue_rollup SET amount = amount + %s, payments = payments + 1 WHERE day = %s
+
+    def __str__(self):
+        return f"{self.day}: {self.amount} ({self.payments} payments)"
+
+
+class InspectorWorkloadRollup(models.Model):
+    inspector = models.OneToOneField(User, on_delete=models.CASCADE, related_name='workload_rollup')
+    # SQL: FOREIGN KEY (inspector_id) REFERENCES auth_user(id) ON DELETE CASCADE UNIQUE
+    open_requests = models.IntegerField(default=0)
+    # SQL: open_requests INTEGER DEFAULT 0
+    complaints_total = models.IntegerField(default=0)
+    # SQL: complaints_total INTEGER DEFAULT 0
+    complaints_open = models.IntegerField(default=0)
+    # SQL: complaints_open INTEGER DEFAULT 0
+    # CREATE TABLE inspector_workload_rollup (
+    #   id SERIAL PRIMARY KEY,
+    #   inspector_id INTEGER UNIQUE REFERENCES auth_user(id),
+    #   open_requests INTEGER DEFAULT 0,
+    #   complaints_total INTEGER DEFAULT 0,
+    #   complaints_open INTEGER DEFAULT 0
+    # );
+
+    # Replaces: SELECT inspector_id, COUNT(*) FROM inspection_request WHERE status = 'Assigned' GROUP BY inspector_id
+    # SELECT * FROM inspector_workload_rollup ORDER BY open_requests DESC LIMIT 10
+
+    def __str__(self):
+        return f"Workload for {self.inspector_id}: {self.open_requests} open"
+
+
+class ComplaintRollup(models.Model):
+    # Single-row table, same convention as AdminBalance (pk=1)
+    total = models.IntegerField(default=0)
+    # SQL: total INTEGER DEFAULT 0
+    unresolved = models.IntegerField(default=0)
+    # SQL: unresolved INTEGER DEFAULT 0
+    # CREATE TABLE complaint_rollup (
+    #   id SERIAL PRIMARY KEY,
+    #   total INTEGER DEFAULT 0,
+    #   unresolved INTEGER DEFAULT 0
+    # );
+
+    # Replaces: SELECT COUNT(*), SUM(CASE WHEN resolved THEN 0 ELSE 1 END) FROM complaint
+    # SELECT total, unresolved FROM complaint_rollup WHERE id = 1
+
+    def __str__(self):
+        return f"Complaints: {self.unresolved} open / {self.total} total"
+
+
+class InspectorScorecard(models.Model):
+    # Report-derived metrics per inspector, bumped when a report is filed.
+    # Workload and complaint counts live on InspectorWorkloadRollup.
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, related_name='scorecard')
+    # SQL: FOREIGN KEY (profile_id) REFERENCES profile(id) ON DELETE CASCADE UNIQUE
+    reports_filed = models.IntegerField(default=0)
+    # SQL: reports_filed INTEGER DEFAULT 0
+    approved = models.IntegerField(default=0)
+    # SQL: approved INTEGER DEFAULT 0
+    rejected = models.IntegerField(default=0)
+    # SQL: rejected INTEGER DEFAULT 0
+    turnaround_seconds = models.BigIntegerField(default=0)
+    # SQL: turnaround_seconds BIGINT DEFAULT 0
+    # CREATE TABLE inspector_scorecard (
+    #   id SERIAL PRIMARY KEY,
+    #   profile_id INTEGER UNIQUE REFERENCES profile(id),
+    #   reports_filed INTEGER DEFAULT 0,
+    #   approved INTEGER DEFAULT 0,
+    #   rejected INTEGER DEFAULT 0,
+    #   turnaround_seconds BIGINT DEFAULT 0
+    # );
+
+    # Record a filed report
+    # UPDATE inspector_scorecard
+    # SET reports_filed = reports_filed + 1, approved = approved + 1, turnaround_seconds = turnaround_seconds + %s
+    # WHERE profile_id = %s;
+
+    @property
+    def approval_rate(self):
+        return self.approved / self.reports_filed if self.reports_filed else None
+
+    @property
+    def avg_turnaround_hours(self):
+        return self.turnaround_seconds / self.reports_filed / 3600 if self.reports_filed else None
+
+    def __str__(self):
+        return f"Scorecard for profile #{self.profile_id}: {self.reports_filed} reports"
+
+
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    task = models.CharField(max_length=100)
+    # SQL: task VARCHAR(100) NOT NULL  -- name registered with myapp.jobs.task
+    payload = models.JSONField(default=dict, blank=True)
+    # SQL: payload JSON DEFAULT '{}'
+    priority = models.IntegerField(default=0)
+    # SQL: priority INTEGER DEFAULT 0  -- higher runs first
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    # SQL: status VARCHAR(10) DEFAULT 'queued'
+    run_at = models.DateTimeField(default=timezone.now)
+    # SQL: run_at TIMESTAMP DEFAULT NOW()  -- not claimed before this time
+    attempts = models.IntegerField(default=0)
+    # SQL: attempts INTEGER DEFAULT 0
+    max_attempts = models.IntegerField(default=5)
+    # SQL: max_attempts INTEGER DEFAULT 5
+    last_error = models.TextField(blank=True)
+    # SQL: last_error TEXT NULL
+    locked_by = models.CharField(max_length=100, blank=True)
+    # SQL: locked_by VARCHAR(100) NULL
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # SQL: locked_at TIMESTAMP NULL
+    created_at = models.DateTimeField(auto_now_add=True)
+    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # SQL: finished_at TIMESTAMP NULL
+    # CREATE TABLE job (
+    #   id SERIAL PRIMARY KEY,
+    #   task VARCHAR(100),
+    #   payload JSON,
+    #   priority INTEGER DEFAULT 0,
+    #   status VARCHAR(10) DEFAULT 'queued',
+    #   run_at TIMESTAMP,
+    #   attempts INTEGER DEFAULT 0,
+    #   max_attempts INTEGER DEFAULT 5,
+    #   last_error TEXT,
+    #   locked_by VARCHAR(100),
+    #   locked_at TIMESTAMP,
+    #   created_at TIMESTAMP,
+    #   finished_at TIMESTAMP
+    # );
+    # CREATE INDEX job_claim_idx ON job (status, run_at, priority);
+
+    # Claim the next due jobs (PostgreSQL/MySQL 8)
+    # SELECT * FROM job
+    # WHERE status = 'queued' AND run_at <= NOW()
+    # ORDER BY priority DESC, run_at, id
+    # LIMIT %s
+    # FOR UPDATE SKIP LOCKED;
+
+    # Claim one job atomically (SQLite)
+    # UPDATE job SET status = 'running', locked_by = %s, locked_at = NOW()
+    # WHERE id = %s AND status = 'queued';
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'priority'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.pk} {self.task} ({self.status})"
+
+
+class PendingNotification(models.Model):
+    """A status change waiting to be delivered to ``recipient`` (see notifications.py)."""
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_notifications')
+    # SQL: FOREIGN KEY (recipient_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    inspection_request = models.ForeignKey(InspectionRequest, on_delete=models.CASCADE, related_name='+')
+    # SQL: FOREIGN KEY (inspection_request_id) REFERENCES inspection_request(id) ON DELETE CASCADE
+    old_status = models.CharField(max_length=20)
+    # SQL: old_status VARCHAR(20) NOT NULL
+    new_status = models.CharField(max_length=20)
+    # SQL: new_status VARCHAR(20) NOT NULL
+    created_at = models.DateTimeField(auto_now_add=True)
+    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # CREATE TABLE pending_notification (
+    #   id SERIAL PRIMARY KEY,
+    #   recipient_id INTEGER REFERENCES auth_user(id),
+    #   inspection_request_id INTEGER REFERENCES inspection_request(id),
+    #   old_status VARCHAR(20),
+    #   new_status VARCHAR(20),
+    #   created_at TIMESTAMP
+    # );
+
+    # Take the next batch, oldest first; rows are deleted once delivered
+    # SELECT * FROM pending_notification ORDER BY id LIMIT %s;
+    # DELETE FROM pending_notification WHERE id IN (...);
+
+    def __str__(self):
+        return f"{self.recipient} #{self.inspection_request_id}: {self.old_status} -> {self.new_status}"
+
+
+class BroadcastQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """Broadcasts addressed to ``user``, each annotated with ``is_read``."""
+        # SQL: SELECT b.*, EXISTS(SELECT 1 FROM broadcast_receipt r
+        #                         WHERE r.broadcast_id = b.id AND r.user_id = %s) AS is_read
+        #      FROM broadcast b WHERE b.audience IN ('All', %s) ORDER BY b.sent_at DESC
+        profile = getattr(user, 'profile', None)
+        audiences = ['All']
+        if profile is not None:
+            audiences.append(profile.user_type)
+        read = BroadcastReceipt.objects.filter(broadcast=models.OuterRef('pk'), user=user)
+        return (self.filter(audience__in=audiences)
+                .annotate(is_read=models.Exists(read))
+                .order_by('-sent_at'))
+
+
+class Broadcast(models.Model):
+    """An announcement stored once and shown in the inbox of every user in ``audience``."""
+    AUDIENCES = (
+        ('All', 'Everyone'),
+        ('Owner', 'All owners'),
+        ('Inspector', 'All inspectors'),
+    )
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcasts')
+    # SQL: FOREIGN KEY (sender_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    audience = models.CharField(max_length=20, choices=AUDIENCES, default='All')
+    # SQL: audience VARCHAR(20) DEFAULT 'All' CHECK (audience IN ('All', 'Owner', 'Inspector'))
+    subject = models.CharField(max_length=200)
+    # SQL: subject VARCHAR(200) NOT NULL
+    body = CompressedTextField()
+    # SQL: body BLOB NOT NULL  -- zlib-compressed
+    sent_at = models.DateTimeField(auto_now_add=True)
+    # SQL: sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+
+    objects = BroadcastQuerySet.as_manager()
+    # CREATE TABLE broadcast (
+    #   id SERIAL PRIMARY KEY,
+    #   sender_id INTEGER REFERENCES auth_user(id),
+    #   audience VARCHAR(20),
+    #   subject VARCHAR(200),
+    #   body BLOB,
+    #   sent_at TIMESTAMP
+    # );
+    # CREATE INDEX broadcast_audience_idx ON broadcast (audience, sent_at);
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['audience', '-sent_at'], name='broadcast_audience_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_audience_display()})"
+
+
+class BroadcastReceipt(models.Model):
+    """Read marker, created the first time a user opens a broadcast."""
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='receipts')
+    # SQL: FOREIGN KEY (broadcast_id) REFERENCES broadcast(id) ON DELETE CASCADE
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcast_receipts')
+    # SQL: FOREIGN KEY (user_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    read_at = models.DateTimeField(auto_now_add=True)
+    # SQL: read_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # CREATE TABLE broadcast_receipt (
+    #   id SERIAL PRIMARY KEY,
+    #   broadcast_id INTEGER REFERENCES broadcast(id),
+    #   user_id INTEGER REFERENCES auth_user(id),
+    #   read_at TIMESTAMP,
+    #   UNIQUE (broadcast_id, user_id)
+    # );
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['broadcast', 'user'], name='broadcast_receipt_unique'),
+        ]
+
+
+class SyncTombstone(models.Model):
+    """Tells a user's offline client to drop a row it can no longer see (see sync.py)."""
+    KINDS = (
+        ('requests', 'Inspection request'),
+        ('reports', 'Inspection report'),
+        ('messages', 'Message'),
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    # SQL: kind VARCHAR(20) NOT NULL
+    object_id = models.BigIntegerField()
+    # SQL: object_id BIGINT NOT NULL
+    # Plain column, not a foreign key: tombstones are written while users
+    # themselves may be being deleted
+    user_id = models.IntegerField()
+    # SQL: user_id INTEGER NOT NULL
+    deleted_at = models.DateTimeField(default=timezone.now)
+    # SQL: deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # CREATE TABLE sync_tombstone (
+    #   id SERIAL PRIMARY KEY,
+    #   kind VARCHAR(20),
+    #   object_id BIGINT,
+    #   user_id INTEGER,
+    #   deleted_at TIMESTAMP
+    # );
+    # CREATE INDEX sync_tombstone_user_idx ON sync_tombstone (user_id, deleted_at);
+
+    # Deletions a client has not seen yet
+    # SELECT kind, object_id FROM sync_tombstone WHERE user_id = %s AND deleted_at >= %s;
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at'], name='sync_tombstone_user_idx'),
+        ]
+
+
+@receiver(post_delete, sender=InspectionRequest)
+@receiver(post_delete, sender=InspectionReport)
+@receiver(post_delete, sender=Message)
+def record_sync_tombstones(sender, instance, **kwargs):
+    from . import sync
+    sync.record_deletion(instance)
+
+
+
+class AuditLog(models.Model):
+    """One row per admin bulk action, however many rows it changed (see bulk.py)."""
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='audit_entries')
+    # SQL: FOREIGN KEY (actor_id) REFERENCES auth_user(id) ON DELETE SET NULL
+    action = models.CharField(max_length=50)
+    # SQL: action VARCHAR(50) NOT NULL
+    target = models.CharField(max_length=50)
+    # SQL: target VARCHAR(50) NOT NULL  -- e.g. 'myapp.profile'
+    object_ids = models.JSONField(default=list)
+    # SQL: object_ids JSON NOT NULL  -- ids the action was requested for
+    affected = models.PositiveIntegerField(default=0)
+    # SQL: affected INTEGER DEFAULT 0  -- rows actually changed
+    details = models.JSONField(default=dict, blank=True)
+    # SQL: details JSON NOT NULL  -- action parameters, e.g. {"fee": "250.00"}
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # SQL: created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # CREATE TABLE audit_log (
+    #   id SERIAL PRIMARY KEY,
+    #   actor_id INTEGER REFERENCES auth_user(id),
+    #   action VARCHAR(50),
+    #   target VARCHAR(50),
+    #   object_ids JSON,
+    #   affected INTEGER,
+    #   details JSON,
+    #   created_at TIMESTAMP
+    # );
+
+    def __str__(self):
+        return f"{self.action} on {self.affected} {self.target} by {self.actor}"
+
+
+class ArchivedInspectionRequest(models.Model):
+    """
+    A closed InspectionRequest moved out of the hot table (see myapp/archive.py).
+
+    Same columns and same id as the row it replaces, plus ``archived_at``, so
+    pages can list both tables with the same code.
+    """
+    is_archived = True
+    id = models.IntegerField(primary_key=True)
+    # SQL: id INTEGER PRIMARY KEY  -- the id it had in inspection_request
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_requests')
+    # SQL: FOREIGN KEY (owner_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    inspector = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_inspections')
+    # SQL: FOREIGN KEY (inspector_id) REFERENCES auth_user(id) ON DELETE SET NULL
+    req_type = models.CharField(max_length=30, choices=InspectionRequest.REQ_TYPES)
+    # SQL: req_type VARCHAR(30) NOT NULL
+    building_location = models.CharField(max_length=255)
+    # SQL: building_location VARCHAR(255) NOT NULL
+    fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # SQL: fee DECIMAL(10,2) DEFAULT 0
+    fee_overridden = models.BooleanField(default=False)
+    # SQL: fee_overridden BOOLEAN DEFAULT FALSE
+    floors = models.PositiveSmallIntegerField(null=True, blank=True)
+    # SQL: floors SMALLINT NULL
+    floor_area = models.PositiveIntegerField(null=True, blank=True)
+    # SQL: floor_area INTEGER NULL
+    appointment_start = models.DateTimeField(null=True, blank=True)
+    # SQL: appointment_start TIMESTAMP NULL
+    appointment_end = models.DateTimeField(null=True, blank=True)
+    # SQL: appointment_end TIMESTAMP NULL
+    status = models.CharField(max_length=20, choices=InspectionRequest.STATUS_CHOICES)
+    # SQL: status VARCHAR(20) NOT NULL
+    created_at = models.DateTimeField()
+    # SQL: created_at TIMESTAMP NOT NULL
+    updated_at = models.DateTimeField()
+    # SQL: updated_at TIMESTAMP NOT NULL
+    archived_at = models.DateTimeField(default=timezone.now)
+    # SQL: archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+
+    objects = InspectionRequestQuerySet.as_manager()
+    # CREATE TABLE archived_inspection_request (
+    #   id INTEGER PRIMARY KEY,
+    #   owner_id INTEGER REFERENCES auth_user(id),
+    #   inspector_id INTEGER REFERENCES auth_user(id),
+    #   req_type VARCHAR(30),
+    #   building_location VARCHAR(255),
+    #   fee DECIMAL(10,2),
+    #   fee_overridden BOOLEAN,
+    #   floors SMALLINT,
+    #   floor_area INTEGER,
+    #   appointment_start TIMESTAMP,
+    #   appointment_end TIMESTAMP,
+    #   status VARCHAR(20),
+    #   created_at TIMESTAMP,
+    #   updated_at TIMESTAMP,
+    #   archived_at TIMESTAMP
+    # );
+    # CREATE INDEX archived_request_owner_idx ON archived_inspection_request (owner_id, id DESC);
+    # CREATE INDEX archived_request_inspector_idx ON archived_inspection_request (inspector_id, id DESC);
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], name='archived_request_owner_idx'),
+            models.Index(fields=['inspector', '-id'], name='archived_request_inspector_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner.username} - {self.building_location} ({self.status}, archived)"
+
+
+class ArchivedInspectionReport(models.Model):
+    """The report of an archived request, moved with it."""
+    is_archived = True
+    id = models.IntegerField(primary_key=True)
+    # SQL: id INTEGER PRIMARY KEY  -- the id it had in inspection_report
+    inspection_request = models.OneToOneField(ArchivedInspectionRequest, on_delete=models.CASCADE, related_name='report')
+    # SQL: FOREIGN KEY (inspection_request_id) REFERENCES archived_inspection_request(id) ON DELETE CASCADE UNIQUE
+    inspector = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='archived_reports')
+    # SQL: FOREIGN KEY (inspector_id) REFERENCES auth_user(id) ON DELETE SET NULL
+    inspection_date = models.DateTimeField()
+    # SQL: inspection_date TIMESTAMP NOT NULL
+    structural_evaluation = CompressedTextField(blank=True)
+    # SQL: structural_evaluation BLOB NULL  -- zlib-compressed, copied as is
+    compliance_checklist = CompressedTextField(blank=True)
+    # SQL: compliance_checklist BLOB NULL  -- zlib-compressed
+    decision = models.CharField(max_length=20, choices=(('Approved','Approved'),('Rejected','Rejected')), blank=True)
+    # SQL: decision VARCHAR(20) NULL
+    remarks = CompressedTextField(blank=True)
+    # SQL: remarks BLOB NULL  -- zlib-compressed
+    updated_at = models.DateTimeField()
+    # SQL: updated_at TIMESTAMP NOT NULL
+    # CREATE TABLE archived_inspection_report (
+    #   id INTEGER PRIMARY KEY,
+    #   inspection_request_id INTEGER UNIQUE REFERENCES archived_inspection_request(id),
+    #   inspector_id INTEGER REFERENCES auth_user(id),
+    #   inspection_date TIMESTAMP,
+    #   structural_evaluation BLOB,
+    #   compliance_checklist BLOB,
+    #   decision VARCHAR(20),
+    #   remarks BLOB,
+    #   updated_at TIMESTAMP
+    # );
+
+    def __str__(self):
+        return f"Report for {self.inspection_request}"
+
+
+class ArchivedPayment(models.Model):
+    """A payment of an archived request, moved with it."""
+    id = models.IntegerField(primary_key=True)
+    # SQL: id INTEGER PRIMARY KEY  -- the id it had in payment
+    payer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_payments')
+    # SQL: FOREIGN KEY (payer_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    inspection_request = models.ForeignKey(ArchivedInspectionRequest, on_delete=models.CASCADE, related_name='payments')
+    # SQL: FOREIGN KEY (inspection_request_id) REFERENCES archived_inspection_request(id) ON DELETE CASCADE
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # SQL: amount DECIMAL(10,2) NOT NULL
+    created_at = models.DateTimeField()
+    # SQL: created_at TIMESTAMP NOT NULL
+    # CREATE TABLE archived_payment (
+    #   id INTEGER PRIMARY KEY,
+    #   payer_id INTEGER REFERENCES auth_user(id),
+    #   inspection_request_id INTEGER REFERENCES archived_inspection_request(id),
+    #   amount DECIMAL(10,2),
+    #   created_at TIMESTAMP
+    # );
+
+    def __str__(self):
+        return f"Payment {self.amount} by {self.payer.username} (archived)"
+
+
+class ArchivedMessage(models.Model):
+    """An old, read Message moved out of the hot table (see myapp/archive.py)."""
+    is_archived = True
+    id = models.IntegerField(primary_key=True)
+    # SQL: id INTEGER PRIMARY KEY  -- the id it had in message
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_sent_messages')
+    # SQL: FOREIGN KEY (sender_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_received_messages')
+    # SQL: FOREIGN KEY (recipient_id) REFERENCES auth_user(id) ON DELETE CASCADE
+    subject = models.CharField(max_length=200, blank=True)
+    # SQL: subject VARCHAR(200) NULL
+    body = CompressedTextField()
+    # SQL: body BLOB NOT NULL  -- zlib-compressed, copied as is
+    sent_at = models.DateTimeField()
+    # SQL: sent_at TIMESTAMP NOT NULL
+    is_read = models.BooleanField(default=True)
+    # SQL: is_read BOOLEAN DEFAULT TRUE  -- only read messages are archived
+    updated_at = models.DateTimeField()
+    # SQL: updated_at TIMESTAMP NOT NULL
+    archived_at = models.DateTimeField(default=timezone.now)
+    # SQL: archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    # CREATE TABLE archived_message (
+    #   id INTEGER PRIMARY KEY,
+    #   sender_id INTEGER REFERENCES auth_user(id),
+    #   recipient_id INTEGER REFERENCES auth_user(id),
+    #   subject VARCHAR(200),
+    #   body BLOB,
+    #   sent_at TIMESTAMP,
+    #   is_read BOOLEAN,
+    #   updated_at TIMESTAMP,
+    #   archived_at TIMESTAMP
+    # );
+    # CREATE INDEX archived_message_inbox_idx ON archived_message (recipient_id, sent_at DESC);
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-sent_at'], name='archived_message_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"Message from {self.sender.username} to {self.recipient.username} (archived)"
+
+
+# Models whose rows the admin pages list; their changes bump the admin scope too
+ADMIN_LISTED_MODELS = (InspectionRequest, InspectionReport, Payment, Complaint, Profile)
+
+
+def _page_audience(instance):
+    """User ids whose pages show ``instance``; ``None`` means everyone's."""
+    if isinstance(instance, InspectionRequest):
+        return (instance.owner_id, instance.inspector_id)
+    if isinstance(instance, InspectionReport):
+        owner_id = (InspectionRequest.objects.filter(pk=instance.inspection_request_id)
+                    .values_list('owner_id', flat=True).first())
+        return (owner_id, instance.inspector_id)
+    if isinstance(instance, Message):
+        return (instance.sender_id, instance.recipient_id)
+    if isinstance(instance, Payment):
+        return (instance.payer_id,)
+    if isinstance(instance, Complaint):
+        return (instance.reporter_id, instance.against_inspector_id)
+    if isinstance(instance, (Profile, BroadcastReceipt)):
+        return (instance.user_id,)
+    if isinstance(instance, User):
+        return (instance.pk,)
+    return None
+
+
+@receiver(post_save, sender=InspectionRequest)
+@receiver(post_delete, sender=InspectionRequest)
+@receiver(post_save, sender=InspectionReport)
+@receiver(post_delete, sender=InspectionReport)
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Complaint)
+@receiver(post_delete, sender=Complaint)
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Broadcast)
+@receiver(post_delete, sender=Broadcast)
+@receiver(post_save, sender=BroadcastReceipt)
+def bump_data_versions(sender, instance, **kwargs):
+    # Change the ETags of the pages showing this row (see myapp/data_versions.py),
+    # after commit so no request can pair the new version with old data
+    from . import data_versions
+    user_ids = _page_audience(instance)
+    if user_ids is None:
+        transaction.on_commit(lambda: data_versions.bump(data_versions.GLOBAL))
+    else:
+        # Logins (User.last_login), messages and receipts leave the admin pages alone
+        admin = isinstance(instance, ADMIN_LISTED_MODELS)
+        transaction.on_commit(lambda: data_versions.bump_users(*user_ids, admin=admin))
@@ -0,0 +1,177 @@
+"""
+Batched status-change notifications.
+
+``record_status_change()`` is called by the write paths in views.py next to
+``rollups.record_status_change`` and only inserts PendingNotification rows
+for the owner and/or inspector. Delivery is left to the
+``flush_notifications`` job (myapp/tasks.py), queued
+``NOTIFICATION_BATCH_SECONDS`` after the first pending event. So a burst of
+assignments becomes:
+
+* one inbox Message per recipient (several events are coalesced into one
+  message body), written with a single ``bulk_create``;
+* optionally one email per recipient, all sent over one backend connection
+  (one SMTP session per batch instead of one per event).
+
+Emails are best effort: the inbox Message is the record, and a failing mail
+server does not hold up or repeat in-app delivery.
+
+Messages are sent from a system account (``NOTIFICATION_SENDER_USERNAME``)
+created by migration 0022: inactive, with no usable password, and its name
+is refused at signup. Delivery fails loudly if it is missing rather than
+adopting some other account of that name.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+
+from . import counters, data_versions, jobs
+from .models import Job, Message, PendingNotification
+
+logger = logging.getLogger(__name__)
+
+FLUSH_TASK = 'flush_notifications'
+DEFAULT_SENDER_USERNAME = 'notifications'
+
+
+def batch_seconds():
+    return getattr(settings, 'NOTIFICATION_BATCH_SECONDS', 30)
+
+
+def batch_size():
+    return getattr(settings, 'NOTIFICATION_BATCH_SIZE', 500)
+
+
+def recipients_for(req):
+    """Users told about a status change of ``req``."""
+    users = [req.owner_id]
+    # The inspector hears about assignments and payments for their requests
+    if req.inspector_id and req.status in ('Assigned', 'Paid'):
+        users.append(req.inspector_id)
+    return users
+
+
+def record_status_change(old_status, old_inspector_id, req):
+    """Queue notifications for a saved change of ``req``.
+
+    Takes the same arguments as ``rollups.record_status_change``. Call inside
+    the transaction that saved ``req``, so the notification is dropped along
+    with the change if it rolls back.
+    """
+    record_status_changes([(old_status, old_inspector_id, req)])
+
+
+def record_status_changes(changes):
+    """Queue notifications for many ``(old_status, old_inspector_id, req)`` changes at once."""
+    pending = []
+    for old_status, old_inspector_id, req in changes:
+        if old_status != req.status:
+            user_ids = recipients_for(req)
+        elif old_inspector_id != req.inspector_id and req.inspector_id:
+            # Reassigned without a status change: only the new inspector needs to know
+            user_ids = [req.inspector_id]
+        else:
+            continue
+        pending.extend(
+            PendingNotification(recipient_id=user_id, inspection_request_id=req.pk,
+                                old_status=old_status, new_status=req.status)
+            for user_id in user_ids
+        )
+    if pending:
+        PendingNotification.objects.bulk_create(pending)
+        schedule_flush()
+
+
+def schedule_flush(delay=None):
+    """Queue a flush job unless one is already waiting to run."""
+    # Racing writers may both queue one; the second flush just finds less to do
+    if Job.objects.filter(task=FLUSH_TASK, status='queued').exists():
+        return
+    jobs.enqueue(FLUSH_TASK, delay=batch_seconds() if delay is None else delay)
+
+
+def sender_username():
+    return getattr(settings, 'NOTIFICATION_SENDER_USERNAME', DEFAULT_SENDER_USERNAME)
+
+
+def _sender():
+    username = sender_username()
+    user = User.objects.filter(username=username).first()
+    # Nobody can log in as the system account; anything else is an impostor
+    if user is None or user.is_active or user.has_usable_password():
+        raise ImproperlyConfigured(
+            f'The notification sender {username!r} is missing or is a regular account. '
+            f'Run migrations, or rename that account and run them again.')
+    return user
+
+
+def _describe(event):
+    req = event.inspection_request
+    return f"Request #{req.pk} ({req.building_location}): {event.old_status} -> {event.new_status}"
+
+
+def _compose(events):
+    """Subject and body of the one message that covers ``events`` for a recipient."""
+    if len(events) == 1:
+        req = events[0].inspection_request
+        subject = f"Request #{req.pk} is now {events[0].new_status}"
+    else:
+        subject = f"{len(events)} updates to inspection requests"
+    lines = [_describe(event) for event in events]
+    lines.append("")
+    lines.append("See your dashboard for details.")
+    return subject, "\n".join(lines)
+
+
+def flush():
+    """Deliver up to ``batch_size()`` pending notifications; returns how many."""
+    with transaction.atomic():
+        pending = list(
+            PendingNotification.objects.select_for_update(skip_locked=True)
+            .select_related('recipient', 'inspection_request')
+            .order_by('id')[:batch_size()]
+        )
+        if not pending:
+            return 0
+        grouped = {}
+        for event in pending:
+            grouped.setdefault(event.recipient, []).append(event)
+        sender = _sender()
+        composed = {recipient: _compose(events) for recipient, events in grouped.items()}
+        # SQL: INSERT INTO message (sender_id, recipient_id, subject, body, ...) VALUES (...), (...), ...
+        Message.objects.bulk_create([
+            Message(sender=sender, recipient=recipient, subject=subject, body=body)
+            for recipient, (subject, body) in composed.items()
+        ])
+        PendingNotification.objects.filter(pk__in=[event.pk for event in pending]).delete()
+        # bulk_create sends no post_save; refresh the recipients' inbox ETags
+        recipient_ids = [recipient.pk for recipient in composed]
+        counters.record_messages_sent(recipient_ids)
+        transaction.on_commit(lambda: data_versions.bump_users(*recipient_ids))
+        if getattr(settings, 'NOTIFICATION_EMAILS', False):
+            # Only mail once the messages are committed
+            transaction.on_commit(lambda: send_emails(composed))
+    if len(pending) == batch_size():
+        # More were waiting; keep draining without the coalescing delay
+        schedule_flush(delay=0)
+    return len(pending)
+
+
+def send_emails(composed):
+    """Email ``{recipient: (subject, body)}`` over a single backend connection."""
+    emails = [
+        EmailMessage(subject, body, to=[recipient.email])
+        for recipient, (subject, body) in composed.items() if recipient.email
+    ]
+    if not emails:
+        return 0
+    try:
+        # send_messages() opens the connection once for the whole list
+        return get_connection().send_messages(emails) or 0
+    except Exception:
+        logger.exception('Sending %s notification emails failed', len(emails))
+        return 0
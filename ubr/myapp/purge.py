@@ -0,0 +1,295 @@
+"""
+Background removal of rejected or removed accounts.
+
+Deleting a User in the request used to run Django's cascade collector,
+which loads every related request, report, payment, complaint and message
+into memory and deletes them in one long transaction. Instead the request
+only calls ``deactivate()``: the user is made inactive (logged out, hidden
+from approval and assignment lists), ``Profile.deactivated_at`` is set and a
+``purge_user`` job is queued.
+
+Each run of the job processes one batch of at most ``PURGE_BATCH_SIZE`` rows
+of the first step that still has rows, in the job's own short transaction,
+then queues the next run ``PURGE_PAUSE_SECONDS`` later, so other writers get
+the tables in between. Steps only look at the rows still there: a purge
+interrupted anywhere continues where it stopped when its job is retried, and
+``manage.py purge_deactivated_users`` queues purges that were lost.
+
+Rows are removed with plain ``DELETE ... WHERE id IN (...)`` and foreign keys
+cleared with ``UPDATE ... SET col = NULL``, bypassing the collector and the
+model signals. The steps do what the signal receivers would have done for
+the users who stay: sync tombstones, rollup and counter corrections, report
+cache invalidation and data version bumps. Requests the user was still
+assigned to go back to 'Pending' for an admin to reassign. Every table
+referencing the user has a step; the last batch deletes the Profile and
+the User row together (the Profile is how ``pending_user_ids`` finds
+interrupted purges), leaving the ORM's delete nothing to cascade into.
+"""
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import counters, data_versions, jobs, notifications, rollups
+from .models import (
+    ArchivedInspectionReport, ArchivedInspectionRequest, ArchivedMessage, ArchivedPayment, AuditLog, Broadcast,
+    BroadcastReceipt, Complaint, InspectionReport, InspectionRequest, InspectorAvailability, InspectorScorecard,
+    InspectorTimeOff, InspectorWorkloadRollup, Job, Message, Payment, PendingNotification, Profile, SyncTombstone,
+    UserLookupTerm,
+)
+
+PURGE_TASK = 'purge_user'
+
+
+def batch_size():
+    return getattr(settings, 'PURGE_BATCH_SIZE', 1000)
+
+
+def pause_seconds():
+    return getattr(settings, 'PURGE_PAUSE_SECONDS', 1)
+
+
+def deactivate(user_ids):
+    """Deactivate accounts and queue their purge; returns how many were deactivated."""
+    user_ids = list(user_ids)
+    with transaction.atomic():
+        # SQL: UPDATE auth_user SET is_active = FALSE WHERE id IN (...)
+        User.objects.filter(pk__in=user_ids).update(is_active=False)
+        affected = (Profile.objects.filter(user_id__in=user_ids, deactivated_at__isnull=True)
+                    .update(deactivated_at=timezone.now()))
+        for user_id in user_ids:
+            schedule(user_id)
+        transaction.on_commit(lambda: data_versions.bump_users(*user_ids, admin=True))
+    return affected
+
+
+def schedule(user_id, delay=None):
+    """Queue the purge of ``user_id`` unless it is already queued or running."""
+    pending = Job.objects.filter(task=PURGE_TASK, status__in=('queued', 'running'),
+                                 payload__user_id=user_id)
+    if not pending.exists():
+        jobs.enqueue(PURGE_TASK, {'user_id': user_id}, priority=-10, delay=delay)
+
+
+def _ids(qs, *fields):
+    """The first batch of ``qs``: ``[(pk, *fields), ...]``."""
+    return list(qs.order_by().values_list('pk', *fields)[:batch_size()])
+
+
+def delete_ids(model, ids):
+    """``DELETE FROM <table> WHERE id IN (...)``, no collector, no signals."""
+    if not ids:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', list(ids))
+        return cursor.rowcount
+
+
+def _tombstones(kind, rows):
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(kind=kind, object_id=object_id, user_id=user_id)
+        for object_id, user_id in rows if user_id
+    ])
+
+
+def _owned_reports(Report):
+    def step(user_id):
+        reports = list(Report.objects.filter(inspection_request__owner_id=user_id)
+                       .select_related('inspection_request')
+                       .only('inspector_id', 'decision', 'inspection_date', 'inspection_request__created_at')
+                       .order_by()[:batch_size()])
+        rows = [(report.pk, report.inspector_id) for report in reports]
+        if rows:
+            rollups.record_reports_deleted(reports)
+            _tombstones('reports', rows)
+            delete_ids(Report, [pk for pk, _ in rows])
+            from .report_cache import invalidate
+            transaction.on_commit(lambda: [invalidate(pk) for pk, _ in rows])
+        return rows, [inspector_id for _, inspector_id in rows]
+    return step
+
+
+def _pending_notifications(user_id):
+    rows = _ids(PendingNotification.objects.filter(inspection_request__owner_id=user_id)
+                | PendingNotification.objects.filter(recipient_id=user_id))
+    if rows:
+        delete_ids(PendingNotification, [pk for pk, in rows])
+    return rows, []
+
+
+def _payments(user_id):
+    rows = _ids(Payment.objects.filter(payer_id=user_id), 'created_at', 'amount')
+    if rows:
+        rollups.record_payments_deleted([(created_at, amount) for _, created_at, amount in rows])
+        delete_ids(Payment, [pk for pk, _, _ in rows])
+        return rows, []
+    # Other payers' payments keep their amount, without the request
+    rows = _ids(Payment.objects.filter(inspection_request__owner_id=user_id), 'payer_id')
+    if rows:
+        Payment.objects.filter(pk__in=[pk for pk, _ in rows]).update(inspection_request=None)
+    return rows, [payer_id for _, payer_id in rows]
+
+
+def _archived_payments(user_id):
+    # Archived payments always belong to an archived request: they go with it
+    rows = _ids(ArchivedPayment.objects.filter(payer_id=user_id)
+                | ArchivedPayment.objects.filter(inspection_request__owner_id=user_id),
+                'created_at', 'amount', 'payer_id')
+    if rows:
+        rollups.record_payments_deleted([(created_at, amount) for _, created_at, amount, _ in rows])
+        delete_ids(ArchivedPayment, [pk for pk, _, _, _ in rows])
+    return rows, [payer_id for _, _, _, payer_id in rows if payer_id != user_id]
+
+
+def _owned_requests(Request):
+    def step(user_id):
+        rows = _ids(Request.objects.filter(owner_id=user_id), 'status', 'inspector_id')
+        if rows:
+            rollups.record_requests_deleted([(status, inspector_id) for _, status, inspector_id in rows])
+            _tombstones('requests', [(pk, inspector_id) for pk, _, inspector_id in rows])
+            delete_ids(Request, [pk for pk, _, _ in rows])
+        return rows, [inspector_id for _, _, inspector_id in rows]
+    return step
+
+
+def _assigned_requests(Request):
+    def step(user_id):
+        rows = _ids(Request.objects.filter(inspector_id=user_id), 'owner_id', 'status')
+        if rows:
+            # updated_at moves so the owners' offline clients pick the change up
+            Request.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+                inspector=None, updated_at=timezone.now())
+            # Open work goes back to the queue admins assign from, off the calendar.
+            # Archived requests are all closed, so this only ever touches hot ones.
+            reopened = [row for row in rows if row[2] in rollups.OPEN_STATUSES]
+            if reopened:
+                Request.objects.filter(pk__in=[pk for pk, _, _ in reopened]).update(
+                    status='Pending', appointment_start=None, appointment_end=None)
+                rollups.record_status_changes([(status, user_id, 'Pending', None) for _, _, status in reopened])
+                notifications.record_status_changes([
+                    (status, user_id, Request(pk=pk, owner_id=owner_id, status='Pending'))
+                    for pk, owner_id, status in reopened])
+        return rows, [owner_id for _, owner_id, _ in rows]
+    return step
+
+
+def _filed_reports(Report):
+    def step(user_id):
+        rows = _ids(Report.objects.filter(inspector_id=user_id), 'inspection_request__owner_id')
+        if rows:
+            Report.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+                inspector=None, updated_at=timezone.now())
+        return rows, [owner_id for _, owner_id in rows]
+    return step
+
+
+def _filed_complaints(user_id):
+    rows = _ids(Complaint.objects.filter(reporter_id=user_id), 'resolved', 'against_inspector_id')
+    if rows:
+        rollups.record_complaints_deleted([(resolved, inspector_id) for _, resolved, inspector_id in rows])
+        delete_ids(Complaint, [pk for pk, _, _ in rows])
+    return rows, [inspector_id for _, _, inspector_id in rows]
+
+
+def _received_complaints(user_id):
+    rows = _ids(Complaint.objects.filter(against_inspector_id=user_id), 'reporter_id')
+    if rows:
+        Complaint.objects.filter(pk__in=[pk for pk, _ in rows]).update(against_inspector=None)
+    return rows, [reporter_id for _, reporter_id in rows]
+
+
+def _sent_messages(Message):
+    def step(user_id):
+        rows = _ids(Message.objects.filter(sender_id=user_id).exclude(recipient_id=user_id),
+                    'recipient_id', 'is_read')
+        if rows:
+            counters.record_messages_read([recipient_id for _, recipient_id, is_read in rows if not is_read])
+            _tombstones('messages', [(pk, recipient_id) for pk, recipient_id, _ in rows])
+            delete_ids(Message, [pk for pk, _, _ in rows])
+        return rows, [recipient_id for _, recipient_id, _ in rows]
+    return step
+
+
+def _own_rows(model, lookup):
+    def step(user_id):
+        rows = _ids(model.objects.filter(**{lookup: user_id}))
+        if rows:
+            delete_ids(model, [pk for pk, in rows])
+        return rows, []
+    return step
+
+
+def _audit_entries(user_id):
+    rows = _ids(AuditLog.objects.filter(actor_id=user_id))
+    if rows:
+        AuditLog.objects.filter(pk__in=[pk for pk, in rows]).update(actor=None)
+    return rows, []
+
+
+def _sent_broadcasts(user_id):
+    # Their receipts are gone already (the step before)
+    rows = _ids(Broadcast.objects.filter(sender_id=user_id))
+    if rows:
+        delete_ids(Broadcast, [pk for pk, in rows])
+        # Broadcasts show on everyone's pages
+        transaction.on_commit(lambda: data_versions.bump(data_versions.GLOBAL))
+    return rows, []
+
+
+# Children before parents: the raw DELETEs don't cascade, foreign keys would refuse.
+# Archived rows (myapp/archive.py) are purged like the hot ones.
+STEPS = (
+    _owned_reports(InspectionReport),
+    _owned_reports(ArchivedInspectionReport),
+    _pending_notifications,
+    _payments,
+    _archived_payments,
+    _owned_requests(InspectionRequest),
+    _owned_requests(ArchivedInspectionRequest),
+    _assigned_requests(InspectionRequest),
+    _assigned_requests(ArchivedInspectionRequest),
+    _filed_reports(InspectionReport),
+    _filed_reports(ArchivedInspectionReport),
+    _filed_complaints,
+    _received_complaints,
+    _sent_messages(Message),
+    _sent_messages(ArchivedMessage),
+    _own_rows(Message, 'recipient_id'),
+    _own_rows(ArchivedMessage, 'recipient_id'),
+    _own_rows(BroadcastReceipt, 'user_id'),
+    _own_rows(SyncTombstone, 'user_id'),
+    _audit_entries,
+    _own_rows(BroadcastReceipt, 'broadcast__sender_id'),
+    _sent_broadcasts,
+    _own_rows(InspectorAvailability, 'inspector_id'),
+    _own_rows(InspectorTimeOff, 'inspector_id'),
+    _own_rows(UserLookupTerm, 'user_id'),
+    _own_rows(LogEntry, 'user_id'),
+    _own_rows(InspectorWorkloadRollup, 'inspector_id'),
+    _own_rows(InspectorScorecard, 'profile__user_id'),
+    _own_rows(User.groups.through, 'user_id'),
+    _own_rows(User.user_permissions.through, 'user_id'),
+)
+
+
+@transaction.atomic
+def purge_batch(user_id):
+    """Purge one batch of ``user_id``'s rows; returns False once the account is gone."""
+    for step in STEPS:
+        rows, other_user_ids = step(user_id)
+        if rows:
+            transaction.on_commit(lambda: data_versions.bump_users(*other_user_ids, admin=True))
+            return True
+    # Profile and User go in one transaction, so an interrupted purge stays findable
+    delete_ids(Profile, list(Profile.objects.filter(user_id=user_id).values_list('pk', flat=True)))
+    User.objects.filter(pk=user_id).delete()
+    return False
+
+
+def pending_user_ids():
+    """Accounts deactivated but not purged yet."""
+    return list(Profile.objects.filter(deactivated_at__isnull=False).values_list('user_id', flat=True))
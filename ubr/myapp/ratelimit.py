@@ -0,0 +1,86 @@
+"""
+Token-bucket rate limiting, used through ``decorators.rate_limit``.
+
+Each bucket holds up to ``burst`` tokens and refills at ``count / period``
+tokens per second; a request takes one token or is refused with the time
+until the next token is available. Bucket state is a ``(tokens, timestamp)``
+pair stored in the default cache, so all processes share it. If the cache
+backend is unreachable, buckets fall back to a per-process dictionary so a
+cache outage degrades to per-process limits instead of failing requests.
+
+The read-modify-write is not atomic across processes: two requests racing
+on the same bucket may both get the last token. For throttling abuse that
+slack is fine and it keeps a check at one cache get and one set.
+
+Rates are written ``'<count>/<period>'`` with period ``s``, ``m``, ``h`` or
+``d`` (optionally prefixed with a number, e.g. ``'10/5m'``).
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+KEY_PREFIX = 'ratelimit:v1'
+# Cap on fallback buckets kept per process before they are dropped wholesale
+LOCAL_MAX_BUCKETS = 10000
+
+_local_buckets = {}
+_local_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """``'10/m'`` -> ``(10, 60)``; ``'10/5m'`` -> ``(10, 300)``."""
+    count, _, period = rate.partition('/')
+    multiplier = period[:-1] or '1'
+    return int(count), int(multiplier) * PERIODS[period[-1]]
+
+
+def client_ip(request):
+    """Client address, taken from ``RATELIMIT_IP_HEADER`` when behind a proxy."""
+    header = getattr(settings, 'RATELIMIT_IP_HEADER', None)
+    if header and request.META.get(header):
+        # X-Forwarded-For: client, proxy1, proxy2
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _take(state, now, count, period, burst):
+    """Apply one request to ``state``; returns ``(new_state, retry_after)``."""
+    refill = count / period
+    tokens, stamp = state if state else (burst, now)
+    tokens = min(burst, tokens + (now - stamp) * refill)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / refill
+
+
+def hit(key, rate, burst=None):
+    """Take a token from bucket ``key``.
+
+    Returns 0 when the request is allowed, otherwise the number of seconds
+    (rounded up) until it would be.
+    """
+    count, period = parse_rate(rate)
+    burst = burst or count
+    now = time.time()
+    cache_key = f'{KEY_PREFIX}:{key}'
+    # Idle buckets are full again after this long and can be forgotten
+    ttl = math.ceil(burst * period / count) + 1
+    try:
+        state, retry_after = _take(cache.get(cache_key), now, count, period, burst)
+        cache.set(cache_key, state, ttl)
+    except Exception:
+        logger.warning('Rate limit cache unavailable, using in-process buckets')
+        with _local_lock:
+            if len(_local_buckets) > LOCAL_MAX_BUCKETS:
+                _local_buckets.clear()
+            state, retry_after = _take(_local_buckets.get(cache_key), now, count, period, burst)
+            _local_buckets[cache_key] = state
+    return math.ceil(retry_after)
+
@@ -0,0 +1,103 @@
+"""
+On-disk, content-addressed cache of rendered inspection reports.
+
+A filed report rarely changes, so its plain-text download and its HTML body
+are rendered once and stored under ``REPORT_CACHE_DIR`` as
+``<report pk>-<digest>.<kind>``. The digest is a SHA-256 over everything the
+rendering reads from the database besides the report text itself (that is
+covered by ``updated_at``), so it doubles as the ETag and can be computed
+without loading the large text columns. Saving or deleting a report removes
+its files (see ``invalidate_report_artifacts`` in models.py).
+
+Callers must run their permission checks before asking for an artifact.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from .models import REPORT_TEXT_FIELDS
+
+# Bump when render_text() or the report body template changes
+RENDER_VERSION = 1
+KINDS = ('txt', 'html')
+
+
+def cache_dir():
+    return Path(getattr(settings, 'REPORT_CACHE_DIR', settings.BASE_DIR / 'cache' / 'reports'))
+
+
+def report_digest(report):
+    """Hash the rendering inputs of ``report`` (text columns may stay deferred)."""
+    req = report.inspection_request
+    owner = req.owner
+    parts = (
+        RENDER_VERSION, report.pk, report.updated_at.isoformat(), report.inspection_date.isoformat(),
+        report.decision, req.building_location, owner.username, owner.email, owner.get_full_name(),
+    )
+    return hashlib.sha256('\x1f'.join(map(str, parts)).encode('utf-8')).hexdigest()
+
+
+def render_text(report):
+    """Plain-text rendering used by download_report."""
+    lines = []
+    lines.append(f"Inspection Report #{report.pk}")
+    lines.append(f"Owner: {report.inspection_request.owner.username} ({report.inspection_request.owner.email})")
+    lines.append(f"Building location: {report.inspection_request.building_location}")
+    lines.append(f"Inspection date: {report.inspection_date}")
+    lines.append("")
+    lines.append("Structural safety evaluation:")
+    lines.append(report.structural_evaluation or '(none)')
+    lines.append("")
+    lines.append("Compliance checklist:")
+    lines.append(report.compliance_checklist or '(none)')
+    lines.append("")
+    lines.append(f"Decision: {report.decision}")
+    lines.append("")
+    lines.append("Remarks:")
+    lines.append(report.remarks or '(none)')
+    return "\n".join(lines)
+
+
+def render_html(report):
+    """User-independent HTML body of the report page."""
+    return render_to_string('inspector/_report_body.html', {'report': report})
+
+
+def _load_text(report):
+    # One query for all deferred text columns instead of one per column
+    deferred = report.get_deferred_fields()
+    fields = [name for name in REPORT_TEXT_FIELDS if name in deferred]
+    if fields:
+        report.refresh_from_db(fields=fields)
+
+
+def get_artifact(report, kind, digest=None):
+    """Return the rendered ``kind`` of ``report`` as bytes, rendering on a miss."""
+    digest = digest or report_digest(report)
+    path = cache_dir() / f'{report.pk}-{digest}.{kind}'
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    _load_text(report)
+    content = (render_text(report) if kind == 'txt' else render_html(report)).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(content)
+    os.replace(tmp, path)
+    return content
+
+
+def invalidate(report_pk):
+    """Delete every cached artifact of a report."""
+    directory = cache_dir()
+    if not directory.is_dir():
+        return
+    for path in directory.glob(f'{report_pk}-*'):
+        path.unlink(missing_ok=True)
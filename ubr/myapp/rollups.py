@@ -0,0 +1,321 @@
+"""
+Incrementally maintained dashboard statistics.
+
+The write paths in views.py call the ``record_*`` helpers next to the row
+they change, so the admin dashboard can read its KPIs from a handful of
+small rollup rows instead of aggregating the source tables on every hit.
+``rebuild_rollups`` recomputes everything from scratch and is exposed as
+``manage.py rebuild_rollups`` for reconciliation after out-of-band edits
+(Django admin, shell, data imports).
+
+The same helpers keep the per-user Profile counters (myapp/counters.py) in
+step.
+"""
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from . import counters, data_versions
+
+from .models import (
+    ArchivedInspectionReport,
+    ArchivedInspectionRequest,
+    ArchivedPayment,
+    Complaint,
+    ComplaintRollup,
+    DailyRevenueRollup,
+    InspectionReport,
+    InspectionRequest,
+    InspectorScorecard,
+    InspectorWorkloadRollup,
+    Payment,
+    Profile,
+    RequestStatusRollup,
+)
+
+# Statuses that count towards an inspector's open workload
+OPEN_STATUSES = ('Assigned',)
+
+
+def _bump(model, lookup, **deltas):
+    """Add ``deltas`` to the row matching ``lookup``, creating it if missing."""
+    # SQL: UPDATE <rollup> SET col = col + %s WHERE <lookup>
+    changes = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    # First event for this key: create the row, then apply the delta so two
+    # concurrent first writers still both land their increment.
+    model.objects.get_or_create(**lookup)
+    model.objects.filter(**lookup).update(**changes)
+
+
+def record_request_created(req):
+    """Count a newly created InspectionRequest."""
+    _bump(RequestStatusRollup, {'status': req.status}, total=1)
+    if req.inspector_id and req.status in OPEN_STATUSES:
+        _bump(InspectorWorkloadRollup, {'inspector_id': req.inspector_id}, open_requests=1)
+    counters.adjust({
+        (req.owner_id, 'requests_owned'): 1,
+        (req.inspector_id, 'open_inspections'): 1 if req.status in OPEN_STATUSES else 0,
+    })
+
+
+def record_status_change(old_status, old_inspector_id, req):
+    """Move a request between status buckets and inspector workloads.
+
+    Call after ``req`` has been saved, passing the status and inspector it
+    had before the change.
+    """
+    record_status_changes([(old_status, old_inspector_id, req.status, req.inspector_id)])
+
+
+def record_status_changes(changes):
+    """Apply many ``(old_status, old_inspector_id, new_status, new_inspector_id)`` moves.
+
+    Deltas are summed first, so a bulk action costs one UPDATE per touched
+    rollup row rather than per request.
+    """
+    status_deltas = Counter()
+    workload_deltas = Counter()
+    for old_status, old_inspector_id, new_status, new_inspector_id in changes:
+        if old_status != new_status:
+            status_deltas[old_status] -= 1
+            status_deltas[new_status] += 1
+        was_open = old_inspector_id and old_status in OPEN_STATUSES
+        is_open = new_inspector_id and new_status in OPEN_STATUSES
+        if was_open and (not is_open or old_inspector_id != new_inspector_id):
+            workload_deltas[old_inspector_id] -= 1
+        if is_open and (not was_open or old_inspector_id != new_inspector_id):
+            workload_deltas[new_inspector_id] += 1
+    for status, delta in status_deltas.items():
+        if delta:
+            _bump(RequestStatusRollup, {'status': status}, total=delta)
+    for inspector_id, delta in workload_deltas.items():
+        if delta:
+            _bump(InspectorWorkloadRollup, {'inspector_id': inspector_id}, open_requests=delta)
+    counters.adjust({(inspector_id, 'open_inspections'): delta
+                     for inspector_id, delta in workload_deltas.items()})
+
+
+def record_requests_deleted(rows):
+    """Drop deleted requests, given as ``(status, inspector_id)`` pairs, from the rollups."""
+    status_deltas = Counter(status for status, _ in rows)
+    workload_deltas = Counter(inspector_id for status, inspector_id in rows
+                              if inspector_id and status in OPEN_STATUSES)
+    for status, n in status_deltas.items():
+        _bump(RequestStatusRollup, {'status': status}, total=-n)
+    for inspector_id, n in workload_deltas.items():
+        _bump(InspectorWorkloadRollup, {'inspector_id': inspector_id}, open_requests=-n)
+    counters.adjust({(inspector_id, 'open_inspections'): -n for inspector_id, n in workload_deltas.items()})
+
+
+def record_payment(payment):
+    """Add a Payment to its day's revenue bucket."""
+    day = timezone.localdate(payment.created_at)
+    _bump(DailyRevenueRollup, {'day': day}, amount=payment.amount, payments=1)
+
+
+def record_payments_deleted(rows):
+    """Take deleted payments, given as ``(created_at, amount)`` pairs, off their days' revenue."""
+    days = {}
+    for created_at, amount in rows:
+        amount_n = days.setdefault(timezone.localdate(created_at), [Decimal('0'), 0])
+        amount_n[0] += amount
+        amount_n[1] += 1
+    for day, (amount, n) in days.items():
+        _bump(DailyRevenueRollup, {'day': day}, amount=-amount, payments=-n)
+
+
+def record_report_filed(report):
+    """Add a filed InspectionReport to its inspector's scorecard."""
+    if not report.inspector_id:
+        return
+    counters.adjust({(report.inspector_id, 'reports_filed'): 1})
+    profile_id = Profile.objects.filter(user_id=report.inspector_id).values_list('pk', flat=True).first()
+    if profile_id is None:
+        return
+    turnaround = report.inspection_date - report.inspection_request.created_at
+    _bump(InspectorScorecard, {'profile_id': profile_id},
+          reports_filed=1,
+          approved=1 if report.decision == 'Approved' else 0,
+          rejected=1 if report.decision == 'Rejected' else 0,
+          turnaround_seconds=max(int(turnaround.total_seconds()), 0))
+
+
+def record_reports_deleted(reports):
+    """Take deleted reports off their inspectors' scorecards.
+
+    ``reports`` are InspectionReport instances (or stand-ins) carrying
+    ``inspector_id``, ``decision``, ``inspection_date`` and
+    ``inspection_request.created_at``.
+    """
+    filed = Counter(report.inspector_id for report in reports if report.inspector_id)
+    if not filed:
+        return
+    counters.adjust({(inspector_id, 'reports_filed'): -n for inspector_id, n in filed.items()})
+    profile_ids = dict(Profile.objects.filter(user_id__in=filed).values_list('user_id', 'pk'))
+    cards = {}
+    for report in reports:
+        if report.inspector_id not in profile_ids:
+            continue
+        card = cards.setdefault(profile_ids[report.inspector_id], Counter())
+        turnaround = report.inspection_date - report.inspection_request.created_at
+        card['reports_filed'] -= 1
+        card['approved'] -= 1 if report.decision == 'Approved' else 0
+        card['rejected'] -= 1 if report.decision == 'Rejected' else 0
+        card['turnaround_seconds'] -= max(int(turnaround.total_seconds()), 0)
+    for profile_id, deltas in cards.items():
+        _bump(InspectorScorecard, {'profile_id': profile_id}, **deltas)
+
+
+def record_complaint_created(complaint):
+    """Count a newly filed Complaint."""
+    open_delta = 0 if complaint.resolved else 1
+    _bump(ComplaintRollup, {'pk': 1}, total=1, unresolved=open_delta)
+    if complaint.against_inspector_id:
+        _bump(InspectorWorkloadRollup, {'inspector_id': complaint.against_inspector_id},
+              complaints_total=1, complaints_open=open_delta)
+        counters.adjust({(complaint.against_inspector_id, 'complaints_open'): open_delta})
+
+
+def record_complaint_resolved(complaint):
+    """Move a Complaint from open to resolved.
+
+    Only call when the complaint was unresolved before this save.
+    """
+    record_complaints_resolved([complaint.against_inspector_id])
+
+
+def record_complaints_resolved(inspector_ids):
+    """Move complaints from open to resolved, given their ``against_inspector_id``s."""
+    _bump(ComplaintRollup, {'pk': 1}, unresolved=-len(inspector_ids))
+    resolved = Counter(inspector_ids)
+    for inspector_id, n in resolved.items():
+        if inspector_id:
+            _bump(InspectorWorkloadRollup, {'inspector_id': inspector_id}, complaints_open=-n)
+    counters.adjust({(inspector_id, 'complaints_open'): -n for inspector_id, n in resolved.items()})
+
+
+def record_complaints_deleted(rows):
+    """Drop deleted complaints, given as ``(resolved, against_inspector_id)`` pairs."""
+    open_ids = [inspector_id for resolved, inspector_id in rows if not resolved]
+    _bump(ComplaintRollup, {'pk': 1}, total=-len(rows), unresolved=-len(open_ids))
+    totals = Counter(inspector_id for _, inspector_id in rows if inspector_id)
+    opened = Counter(inspector_id for inspector_id in open_ids if inspector_id)
+    for inspector_id, n in totals.items():
+        _bump(InspectorWorkloadRollup, {'inspector_id': inspector_id},
+              complaints_total=-n, complaints_open=-opened[inspector_id])
+    counters.adjust({(inspector_id, 'complaints_open'): -n for inspector_id, n in opened.items()})
+
+
+def dashboard_stats(top_inspectors=10, revenue_days=7):
+    """Read the admin KPIs from the rollup tables (no source-table scans)."""
+    today = timezone.localdate()
+    since = today - timedelta(days=revenue_days - 1)
+    status_counts = dict(RequestStatusRollup.objects.values_list('status', 'total'))
+    revenue = list(DailyRevenueRollup.objects.filter(day__gte=since).order_by('-day'))
+    complaints = ComplaintRollup.objects.filter(pk=1).first()
+    workloads = (InspectorWorkloadRollup.objects.select_related('inspector')
+                 .filter(Q(open_requests__gt=0) | Q(complaints_open__gt=0))
+                 .order_by('-open_requests', '-complaints_open')[:top_inspectors])
+    return {
+        'status_counts': [(status, status_counts.get(status, 0))
+                          for status, _ in InspectionRequest.STATUS_CHOICES],
+        'total_requests': sum(status_counts.values()),
+        'revenue_today': next((r.amount for r in revenue if r.day == today), Decimal('0')),
+        'revenue_period': sum((r.amount for r in revenue), Decimal('0')),
+        'revenue_days': revenue,
+        'complaints_total': complaints.total if complaints else 0,
+        'complaints_unresolved': complaints.unresolved if complaints else 0,
+        'inspector_workloads': workloads,
+    }
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """Recompute every rollup table from the source tables.
+
+    Returns a dict of row counts written per rollup table.
+    """
+    # Archived rows (myapp/archive.py) still count: archival only moves them
+    statuses = Counter()
+    for model in (InspectionRequest, ArchivedInspectionRequest):
+        for row in model.objects.values('status').annotate(n=Count('id')).order_by():
+            statuses[row['status']] += row['n']
+    RequestStatusRollup.objects.all().delete()
+    RequestStatusRollup.objects.bulk_create(
+        RequestStatusRollup(status=status, total=n) for status, n in statuses.items()
+    )
+
+    days = {}
+    for model in (Payment, ArchivedPayment):
+        rows = (model.objects.annotate(day=TruncDate('created_at'))
+                .values('day').annotate(amount=Sum('amount'), n=Count('id')).order_by())
+        for row in rows:
+            rollup = days.setdefault(row['day'], DailyRevenueRollup(day=row['day'], amount=Decimal('0')))
+            rollup.amount += row['amount']
+            rollup.payments += row['n']
+    DailyRevenueRollup.objects.all().delete()
+    DailyRevenueRollup.objects.bulk_create(days.values())
+
+    workloads = {}
+    open_rows = (InspectionRequest.objects
+                 .filter(inspector__isnull=False, status__in=OPEN_STATUSES)
+                 .values('inspector_id').annotate(n=Count('id')).order_by())
+    for row in open_rows:
+        workloads.setdefault(row['inspector_id'], InspectorWorkloadRollup(
+            inspector_id=row['inspector_id'])).open_requests = row['n']
+    complaint_rows = (Complaint.objects.filter(against_inspector__isnull=False)
+                      .values('against_inspector_id')
+                      .annotate(n=Count('id'), n_open=Count('id', filter=Q(resolved=False)))
+                      .order_by())
+    for row in complaint_rows:
+        rollup = workloads.setdefault(row['against_inspector_id'], InspectorWorkloadRollup(
+            inspector_id=row['against_inspector_id']))
+        rollup.complaints_total = row['n']
+        rollup.complaints_open = row['n_open']
+    InspectorWorkloadRollup.objects.all().delete()
+    InspectorWorkloadRollup.objects.bulk_create(workloads.values())
+
+    # Clamped at zero per report, like record_report_filed
+    turnaround = Greatest(
+        ExpressionWrapper(F('inspection_date') - F('inspection_request__created_at'), output_field=DurationField()),
+        Value(timedelta(0), output_field=DurationField()))
+    scorecards = {}
+    for model in (InspectionReport, ArchivedInspectionReport):
+        report_rows = (model.objects.filter(inspector__profile__isnull=False)
+                       .values('inspector__profile__id')
+                       .annotate(n=Count('id'),
+                                 n_ok=Count('id', filter=Q(decision='Approved')),
+                                 n_rej=Count('id', filter=Q(decision='Rejected')),
+                                 turnaround=Sum(turnaround))
+                       .order_by())
+        for row in report_rows:
+            seconds = row['turnaround'].total_seconds() if row['turnaround'] else 0
+            card = scorecards.setdefault(row['inspector__profile__id'], InspectorScorecard(
+                profile_id=row['inspector__profile__id']))
+            card.reports_filed += row['n']
+            card.approved += row['n_ok']
+            card.rejected += row['n_rej']
+            card.turnaround_seconds += int(seconds)
+    InspectorScorecard.objects.all().delete()
+    InspectorScorecard.objects.bulk_create(scorecards.values())
+
+    totals = Complaint.objects.aggregate(n=Count('id'), n_open=Count('id', filter=Q(resolved=False)))
+    ComplaintRollup.objects.update_or_create(
+        pk=1, defaults={'total': totals['n'], 'unresolved': totals['n_open']})
+    # Admin pages read these tables; drop their cached ETags
+    transaction.on_commit(lambda: data_versions.bump(data_versions.ADMIN))
+
+    return {
+        'request_status': RequestStatusRollup.objects.count(),
+        'daily_revenue': DailyRevenueRollup.objects.count(),
+        'inspector_workload': len(workloads),
+        'inspector_scorecards': len(scorecards),
+        'complaints': totals['n'],
+    }
@@ -0,0 +1,321 @@
+"""
+Inspection appointment booking.
+
+Every Assigned request gets an appointment: ``APPOINTMENT_MINUTES`` long,
+inside one of its inspector's working windows and clear of the inspector's
+other appointments and time off.
+
+Working windows are the weekly InspectorAvailability rows (local time,
+``TIME_ZONE``); an inspector without any works ``DEFAULT_WEEK``. Busy time
+(booked appointments and InspectorTimeOff) is kept per inspector in an
+``IntervalTree``, so checking a slot for conflicts and finding the next free
+one costs O(log n) per step however full the calendar is.
+
+``schedule_backlog`` books every Assigned request that has no appointment
+yet, oldest first, in one transaction: the backlog, the inspectors'
+availability, time off and appointments are read in four queries, slots are
+found in memory, and the appointments are written with one UPDATE per
+distinct start time. All
+appointments are the same length, so each inspector's search resumes where
+their previous booking ended and the pass is linear in the backlog. It runs
+from ``manage.py schedule_appointments`` and, after an admin assigns
+inspectors, as a background job.
+
+Inspectors can also book or move a single appointment from the inspection
+page (``book``). Both paths lock the inspectors' profile rows first, so two
+bookings for the same inspector never interleave.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import data_versions, jobs
+from .models import InspectionRequest, InspectorAvailability, InspectorTimeOff, Job, Profile
+
+SCHEDULE_TASK = 'schedule_appointments'
+CHUNK_SIZE = 500
+# Requests whose appointment still takes up the inspector's time
+BOOKED_STATUSES = ('Assigned',)
+# Slots start on a quarter hour unless a busy interval ends off it
+SLOT_MINUTES = 15
+# weekday: [(start, end), ...] for inspectors with no InspectorAvailability rows
+DEFAULT_WEEK = {weekday: [(time(9), time(17))] for weekday in range(5)}
+
+
+def appointment_length():
+    return timedelta(minutes=getattr(settings, 'APPOINTMENT_MINUTES', 60))
+
+
+def horizon():
+    return timedelta(days=getattr(settings, 'SCHEDULE_HORIZON_DAYS', 30))
+
+
+class _Node:
+    __slots__ = ('start', 'end', 'key', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, start, end, key):
+        self.start, self.end, self.key = start, end, key
+        self.priority = random.random()
+        self.max_end = end
+        self.left = self.right = None
+
+    def update(self):
+        self.max_end = self.end
+        for child in (self.left, self.right):
+            if child is not None and child.max_end > self.max_end:
+                self.max_end = child.max_end
+
+
+class IntervalTree:
+    """Half-open intervals ``[start, end)`` with overlap queries.
+
+    A treap ordered by start, each node holding the largest end in its
+    subtree; a query skips every subtree that ends before the queried start.
+    Insertion and queries take O(log n) expected.
+    """
+
+    def __init__(self, intervals=()):
+        self._root = None
+        self._size = 0
+        for start, end, key in intervals:
+            self.insert(start, end, key)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        """``(start, end, key)`` in start order."""
+        stack, node = [], self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.key
+            node = node.right
+
+    def insert(self, start, end, key=None):
+        if not start < end:
+            raise ValueError('An interval must end after it starts.')
+        self._root = self._insert(self._root, _Node(start, end, key))
+        self._size += 1
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if new.start < node.start:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        node.update()
+        return node
+
+    @staticmethod
+    def _rotate_right(node):
+        top = node.left
+        node.left, top.right = top.right, node
+        node.update()
+        top.update()
+        return top
+
+    @staticmethod
+    def _rotate_left(node):
+        top = node.right
+        node.right, top.left = top.left, node
+        node.update()
+        top.update()
+        return top
+
+    def first_overlap(self, start, end):
+        """The overlapping interval with the earliest start as ``(start, end, key)``, or None."""
+        node = self._first_overlap(self._root, start, end)
+        return (node.start, node.end, node.key) if node else None
+
+    def _first_overlap(self, node, start, end):
+        # Nothing in this subtree ends after ``start``
+        if node is None or node.max_end <= start:
+            return None
+        found = self._first_overlap(node.left, start, end)
+        if found is not None:
+            return found
+        # This node and everything right of it start too late
+        if node.start >= end:
+            return None
+        if node.end > start:
+            return node
+        return self._first_overlap(node.right, start, end)
+
+
+def _round_up(moment, minutes=SLOT_MINUTES):
+    step = timedelta(minutes=minutes)
+    floor = moment.replace(second=0, microsecond=0)
+    floor -= timedelta(minutes=floor.minute % minutes)
+    return floor if floor == moment else floor + step
+
+
+class Calendar:
+    """One inspector's working windows and busy time."""
+
+    def __init__(self, week=None, busy=()):
+        self.week = week or DEFAULT_WEEK
+        self.busy = IntervalTree(busy)
+
+    def windows(self, since, until):
+        """Working windows overlapping ``[since, until)`` as aware ``(start, end)`` pairs, in order."""
+        day = timezone.localtime(since).date()
+        last = timezone.localtime(until).date()
+        while day <= last:
+            for start, end in self.week.get(day.weekday(), ()):
+                window = (timezone.make_aware(datetime.combine(day, start)),
+                          timezone.make_aware(datetime.combine(day, end)))
+                if window[1] > since and window[0] < until:
+                    yield window
+            day += timedelta(days=1)
+
+    def fits(self, start, end):
+        """Whether ``[start, end)`` lies in one working window and is free."""
+        in_window = any(low <= start and end <= high for low, high in self.windows(start, end))
+        return in_window and self.busy.first_overlap(start, end) is None
+
+    def next_free(self, earliest, length, until):
+        """Start of the first free slot of ``length`` at or after ``earliest``, or None before ``until``."""
+        earliest = _round_up(earliest)
+        for low, high in self.windows(earliest, until):
+            start = max(low, earliest)
+            while start + length <= min(high, until):
+                conflict = self.busy.first_overlap(start, start + length)
+                if conflict is None:
+                    return start
+                # Nothing free before the conflicting interval ends
+                start = max(start, conflict[1])
+        return None
+
+    def book(self, start, end, key=None):
+        self.busy.insert(start, end, key)
+
+
+def load_calendars(inspector_ids, since, until, exclude=()):
+    """``{inspector_id: Calendar}`` with the busy time between ``since`` and ``until``.
+
+    Three queries whatever the number of inspectors. Appointments of request
+    ids in ``exclude`` are left out (they are being rebooked).
+    """
+    inspector_ids = list(inspector_ids)
+    weeks = {inspector_id: {} for inspector_id in inspector_ids}
+    # SQL: SELECT inspector_id, weekday, start_time, end_time FROM inspector_availability
+    #      WHERE inspector_id IN (...) ORDER BY inspector_id, weekday, start_time
+    for inspector_id, weekday, start, end in (InspectorAvailability.objects
+                                              .filter(inspector_id__in=inspector_ids)
+                                              .order_by('inspector_id', 'weekday', 'start_time')
+                                              .values_list('inspector_id', 'weekday', 'start_time', 'end_time')):
+        weeks[inspector_id].setdefault(weekday, []).append((start, end))
+    calendars = {inspector_id: Calendar(weeks[inspector_id]) for inspector_id in inspector_ids}
+    # SQL: SELECT inspector_id, start, "end" FROM inspector_time_off
+    #      WHERE inspector_id IN (...) AND "end" > %s AND start < %s
+    for inspector_id, start, end in (InspectorTimeOff.objects
+                                     .filter(inspector_id__in=inspector_ids, end__gt=since, start__lt=until)
+                                     .values_list('inspector_id', 'start', 'end')):
+        calendars[inspector_id].book(start, end)
+    # SQL: SELECT id, inspector_id, appointment_start, appointment_end FROM inspection_request
+    #      WHERE inspector_id IN (...) AND status = 'Assigned'
+    #        AND appointment_end > %s AND appointment_start < %s  -- request_appointment_idx
+    for pk, inspector_id, start, end in (InspectionRequest.objects
+                                         .filter(inspector_id__in=inspector_ids, status__in=BOOKED_STATUSES,
+                                                 appointment_end__gt=since, appointment_start__lt=until)
+                                         .exclude(pk__in=exclude)
+                                         .values_list('pk', 'inspector_id', 'appointment_start', 'appointment_end')):
+        calendars[inspector_id].book(start, end, pk)
+    return calendars
+
+
+def _lock_inspectors(inspector_ids):
+    # SQL: SELECT id FROM profile WHERE user_id IN (...) ORDER BY user_id FOR UPDATE
+    list(Profile.objects.select_for_update().filter(user_id__in=inspector_ids)
+         .order_by('user_id').values_list('pk', flat=True))
+
+
+def suggest(req, now=None):
+    """The next free slot of ``req``'s inspector as an aware datetime, or None."""
+    if req.inspector_id is None:
+        return None
+    now = now or timezone.now()
+    calendar = load_calendars([req.inspector_id], now, now + horizon(), exclude=[req.pk])[req.inspector_id]
+    return calendar.next_free(now, appointment_length(), now + horizon())
+
+
+@transaction.atomic
+def book(req, start, now=None):
+    """Book (or move) ``req``'s appointment to ``start``; raises ValueError if the slot is not free."""
+    now = now or timezone.now()
+    if req.status not in BOOKED_STATUSES or req.inspector_id is None:
+        raise ValueError('Only assigned requests can be scheduled.')
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    end = start + appointment_length()
+    if start < now or start > now + horizon():
+        raise ValueError('Choose a time within the scheduling horizon.')
+    _lock_inspectors([req.inspector_id])
+    calendar = load_calendars([req.inspector_id], start, end, exclude=[req.pk])[req.inspector_id]
+    if not calendar.fits(start, end):
+        raise ValueError('That time is outside working hours or clashes with another appointment.')
+    req.appointment_start, req.appointment_end = start, end
+    req.save(update_fields=['appointment_start', 'appointment_end', 'updated_at'])
+    return req
+
+
+@transaction.atomic
+def schedule_backlog(now=None):
+    """Book every Assigned request without an appointment; returns ``(booked, left unbooked)``."""
+    now = now or timezone.now()
+    length, until = appointment_length(), now + horizon()
+    # SQL: SELECT id, owner_id, inspector_id FROM inspection_request
+    #      WHERE status = 'Assigned' AND appointment_start IS NULL AND inspector_id IS NOT NULL
+    #      ORDER BY created_at, id FOR UPDATE
+    backlog = list(InspectionRequest.objects.select_for_update()
+                   .filter(status__in=BOOKED_STATUSES, appointment_start__isnull=True, inspector__isnull=False)
+                   .only('owner', 'inspector').order_by('created_at', 'id'))
+    if not backlog:
+        return 0, 0
+    inspector_ids = sorted({req.inspector_id for req in backlog})
+    _lock_inspectors(inspector_ids)
+    calendars = load_calendars(inspector_ids, now, until)
+    # Same length for every appointment: no gap before an inspector's last booking fits another
+    cursors = dict.fromkeys(inspector_ids, now)
+    by_start = {}
+    for req in backlog:
+        calendar = calendars[req.inspector_id]
+        start = calendar.next_free(cursors[req.inspector_id], length, until)
+        if start is None:
+            # Fully booked up to the horizon; later requests of this inspector won't fit either
+            cursors[req.inspector_id] = until
+            continue
+        calendar.book(start, start + length, req.pk)
+        cursors[req.inspector_id] = start + length
+        by_start.setdefault(start, []).append(req.pk)
+    # Inspectors share slot times, so there are far fewer distinct starts than
+    # requests (at most one per SLOT_MINUTES of the horizon): one plain UPDATE
+    # per start beats a CASE over every row.
+    for start, ids in by_start.items():
+        for offset in range(0, len(ids), CHUNK_SIZE):
+            # SQL: UPDATE inspection_request SET appointment_start = %s, appointment_end = %s, updated_at = %s
+            #      WHERE id IN (...)
+            (InspectionRequest.objects.filter(pk__in=ids[offset:offset + CHUNK_SIZE])
+             .update(appointment_start=start, appointment_end=start + length, updated_at=now))
+    booked = {pk for ids in by_start.values() for pk in ids}
+    user_ids = [user_id for req in backlog if req.pk in booked for user_id in (req.owner_id, req.inspector_id)]
+    transaction.on_commit(lambda: data_versions.bump_users(*user_ids, admin=True))
+    return len(booked), len(backlog) - len(booked)
+
+
+def schedule_soon():
+    """Queue a backlog scheduling run unless one is already waiting."""
+    if Job.objects.filter(task=SCHEDULE_TASK, status='queued').exists():
+        return
+    jobs.enqueue(SCHEDULE_TASK)
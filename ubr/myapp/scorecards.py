@@ -0,0 +1,73 @@
+"""
+Inspector scorecards built from precomputed rows.
+
+Each scorecard combines the inspector's InspectorScorecard (report counts,
+approval ratio, turnaround) with their InspectorWorkloadRollup (open work,
+complaints). Both are maintained by myapp.rollups, so listing scorecards
+only reads Profile and the two metrics tables, never reports or complaints.
+"""
+from statistics import mean, pstdev
+
+from .models import Profile
+
+# Inspectors with fewer reports than this are shown but never flagged
+MIN_REPORTS_FOR_FLAGS = 5
+# Flag a metric when it is this many standard deviations from the peer mean
+OUTLIER_Z = 1.5
+
+
+def _metric_rows(profiles):
+    rows = []
+    for profile in profiles:
+        card = getattr(profile, 'scorecard', None)
+        workload = getattr(profile.user, 'workload_rollup', None)
+        reports = card.reports_filed if card else 0
+        complaints = workload.complaints_total if workload else 0
+        rows.append({
+            'profile': profile,
+            'user': profile.user,
+            'reports_filed': reports,
+            'approved': card.approved if card else 0,
+            'rejected': card.rejected if card else 0,
+            'approval_rate': card.approval_rate if card else None,
+            'avg_turnaround_hours': card.avg_turnaround_hours if card else None,
+            'open_requests': workload.open_requests if workload else 0,
+            'complaints_total': complaints,
+            'complaints_open': workload.complaints_open if workload else 0,
+            'complaints_per_report': complaints / reports if reports else None,
+            'flags': [],
+        })
+    return rows
+
+
+def _flag_outliers(rows, key, label, high_only=False):
+    peers = [r for r in rows if r['reports_filed'] >= MIN_REPORTS_FOR_FLAGS and r[key] is not None]
+    if len(peers) < 3:
+        return
+    values = [r[key] for r in peers]
+    avg, spread = mean(values), pstdev(values)
+    if not spread:
+        return
+    for r in peers:
+        z = (r[key] - avg) / spread
+        if z >= OUTLIER_Z:
+            r['flags'].append(f'high {label}')
+        elif z <= -OUTLIER_Z and not high_only:
+            r['flags'].append(f'low {label}')
+
+
+def inspector_scorecards():
+    """Return one scorecard dict per inspector, outliers flagged, busiest first."""
+    # SQL: SELECT p.*, u.*, s.*, w.* FROM profile p
+    #      JOIN auth_user u ON u.id = p.user_id
+    #      LEFT JOIN inspector_scorecard s ON s.profile_id = p.id
+    #      LEFT JOIN inspector_workload_rollup w ON w.inspector_id = u.id
+    #      WHERE p.user_type = 'Inspector'
+    profiles = (Profile.objects.filter(user_type='Inspector')
+                .select_related('user', 'scorecard', 'user__workload_rollup'))
+    rows = _metric_rows(profiles)
+    _flag_outliers(rows, 'approval_rate', 'approval rate')
+    _flag_outliers(rows, 'avg_turnaround_hours', 'turnaround', high_only=True)
+    _flag_outliers(rows, 'complaints_per_report', 'complaint rate', high_only=True)
+    rows.sort(key=lambda r: (-r['open_requests'], r['user'].username))
+    return rows
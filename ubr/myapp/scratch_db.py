@@ -0,0 +1,59 @@
+"""
+Throwaway databases for the stress, demo and benchmark management commands.
+
+``stress_sqlite`` and ``simulate_replica_lag`` post payments and messages,
+which credit the admin balance, move the rollups and queue jobs. They run
+against fresh, migrated files in a temporary directory instead of the
+configured database, and the files are removed afterwards.
+
+``bench_connection_reuse`` has to measure the configured server's connection
+cost, so ``scratch_database`` creates Django's test database (``test_<NAME>``)
+on that server instead when it is not SQLite.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.db import connections
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+
+@contextmanager
+def scratch_sqlite(*aliases):
+    """Point the SQLite ``aliases`` at new, migrated files for the duration; yields the directory."""
+    for alias in aliases:
+        if connections.settings[alias]['ENGINE'] != SQLITE_ENGINE:
+            raise ValueError(f'Database {alias!r} is not SQLite.')
+    connections.close_all()
+    # connections.settings holds the dicts the connections read their NAME from
+    saved = {alias: connections.settings[alias]['NAME'] for alias in aliases}
+    with tempfile.TemporaryDirectory(prefix='ubr-scratch-') as directory:
+        try:
+            for alias in aliases:
+                connections.settings[alias]['NAME'] = os.path.join(directory, f'{alias}.sqlite3')
+                call_command('migrate', database=alias, interactive=False, verbosity=0)
+            connections.close_all()
+            yield directory
+        finally:
+            connections.close_all()
+            for alias, name in saved.items():
+                connections.settings[alias]['NAME'] = name
+
+
+@contextmanager
+def scratch_database(alias='default'):
+    """A migrated, empty copy of ``alias`` for the duration, on the same server unless it is SQLite."""
+    if connections.settings[alias]['ENGINE'] == SQLITE_ENGINE:
+        with scratch_sqlite(alias):
+            yield
+        return
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    # Same as the test runner: CREATE DATABASE test_<NAME>, migrate, switch the alias to it
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
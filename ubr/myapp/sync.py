@@ -0,0 +1,247 @@
+"""
+Delta sync for offline clients (``/api/v1/sync/``).
+
+A client keeps the opaque ``cursor`` from its last sync and sends it back.
+The response holds only the requests, reports and messages visible to the
+user whose ``updated_at`` is at or after the cursor, plus the ids of rows
+that were deleted or stopped being visible (tombstones). Clients upsert
+changes by id, so rows sent twice are harmless.
+
+* The next cursor lags the server clock by ``SYNC_CURSOR_LAG_SECONDS``, so a
+  transaction that committed late with an earlier ``updated_at`` is still
+  picked up by the next sync.
+* The cursor keeps a position per kind, a keyset on ``(updated_at, id)``.
+  A change set larger than ``SYNC_PAGE_SIZE`` per kind is cut after the
+  last returned row and flagged ``has_more``; the client syncs again at once
+  with the new cursor. Bulk writes give many rows the same ``updated_at``,
+  so the id is what lets a page end inside a run of equal timestamps.
+* Archived rows (myapp/archive.py) are read from the archive tables too.
+  Archiving keeps ids and ``updated_at``, so moving a row there neither
+  resends nor deletes it on clients.
+* Tombstones are kept for ``SYNC_TOMBSTONE_DAYS``
+  (``manage.py purge_sync_tombstones``). A cursor older than that gets
+  ``reset: true`` and a full download instead.
+
+Offline report submissions use optimistic concurrency: each item names the
+``updated_at`` of the request the inspector last saw, and is refused as a
+conflict (with the server's current version) if the request changed since.
+
+Bulk ``QuerySet.update()`` calls do not bump ``auto_now`` fields; callers
+updating synced models that way must set ``updated_at`` themselves.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import inspections
+from .api import RESOURCES
+from .models import InspectionReport, InspectionRequest, SyncTombstone
+
+# Kinds synced to offline clients; rows carry every field of the v1 API resource
+SYNC_KINDS = ('requests', 'reports', 'messages')
+REPORT_TEXT = ('structural_evaluation', 'compliance_checklist', 'remarks')
+
+
+def page_size():
+    return getattr(settings, 'SYNC_PAGE_SIZE', 500)
+
+
+def cursor_lag():
+    return timedelta(seconds=getattr(settings, 'SYNC_CURSOR_LAG_SECONDS', 10))
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+
+
+def visible_rows(kind, user):
+    """Rows of ``kind`` an offline client of ``user`` keeps: the live table's, then the archive's."""
+    if kind == 'requests':
+        q = Q(owner=user) | Q(inspector=user)
+    elif kind == 'reports':
+        q = Q(inspection_request__owner=user) | Q(inspector=user)
+    else:
+        q = Q(recipient=user)
+    resource = RESOURCES[kind]
+    return [model.objects.filter(q) for model in (resource.model, resource.archive_model)]
+
+
+def _audience(instance):
+    """Ids of the users who could see ``instance`` before it was deleted."""
+    if isinstance(instance, InspectionRequest):
+        return 'requests', {instance.owner_id, instance.inspector_id}
+    if isinstance(instance, InspectionReport):
+        # The request may be going away in the same cascade; read the id only
+        owner_id = (InspectionRequest.objects.filter(pk=instance.inspection_request_id)
+                    .values_list('owner_id', flat=True).first())
+        return 'reports', {owner_id, instance.inspector_id}
+    return 'messages', {instance.recipient_id}
+
+
+def record_deletion(instance):
+    """Write tombstones for a deleted request, report or message."""
+    kind, user_ids = _audience(instance)
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(kind=kind, object_id=instance.pk, user_id=user_id)
+        for user_id in user_ids if user_id
+    ])
+
+
+def record_reassignment(req, old_inspector_id):
+    """Tell the previous inspector's client to drop a reassigned request."""
+    record_reassignments([(req.pk, old_inspector_id, req.inspector_id)])
+
+
+def record_reassignments(moves):
+    """Bulk form of record_reassignment: ``(request_id, old_inspector_id, new_inspector_id)``."""
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(kind='requests', object_id=request_id, user_id=old_inspector_id)
+        for request_id, old_inspector_id, new_inspector_id in moves
+        if old_inspector_id and old_inspector_id != new_inspector_id
+    ])
+
+
+def encode_cursor(positions):
+    """``{kind: (updated_at, id)}`` as ``<timestamp>/<id>,...`` in SYNC_KINDS order."""
+    return ','.join(f'{positions[kind][0].isoformat()}/{positions[kind][1]}' for kind in SYNC_KINDS)
+
+
+def decode_cursor(cursor):
+    """Parse a cursor into ``{kind: (updated_at, id)}``; raises ValueError for anything we didn't issue.
+
+    A bare timestamp (cursors issued before positions were kept per kind)
+    stands for that time in every kind.
+    """
+    cursor = cursor or ''
+    parts = cursor.split(',') if '/' in cursor else [f'{cursor}/0'] * len(SYNC_KINDS)
+    if len(parts) != len(SYNC_KINDS):
+        raise ValueError('Invalid cursor.')
+    positions = {}
+    for kind, part in zip(SYNC_KINDS, parts):
+        moment, _, after_id = part.rpartition('/')
+        try:
+            moment = parse_datetime(moment) if moment else None
+        except ValueError:
+            moment = None
+        if moment is None or timezone.is_naive(moment) or not after_id.isdigit():
+            raise ValueError('Invalid cursor.')
+        positions[kind] = (moment, int(after_id))
+    return positions
+
+
+def changes_since(user, since=None):
+    """Build the sync payload for ``user`` from cursor positions ``since`` (None: everything)."""
+    now = timezone.now()
+    reset = since is None or min(moment for moment, _ in since.values()) < now - tombstone_retention()
+    limit = page_size()
+    changes, positions, tombstones, has_more = {}, {}, Q(), False
+    for kind in SYNC_KINDS:
+        fields = RESOURCES[kind].fields
+        rows = []
+        for qs in visible_rows(kind, user):
+            if not reset:
+                moment, after_id = since[kind]
+                # SQL: ... WHERE updated_at > %s OR (updated_at = %s AND id > %s)
+                #      ORDER BY updated_at, id LIMIT %s
+                qs = qs.filter(Q(updated_at__gt=moment) | Q(updated_at=moment, id__gt=after_id))
+            rows.extend(qs.order_by('updated_at', 'id').values(*fields.values())[:limit + 1])
+        # Archiving keeps ids and updated_at: merge both tables into one keyset order
+        rows.sort(key=lambda row: (row['updated_at'], row['id']))
+        truncated = len(rows) > limit
+        if truncated:
+            # Resume right after the last row sent
+            rows = rows[:limit]
+            positions[kind] = (rows[-1]['updated_at'], rows[-1]['id'])
+            has_more = True
+        else:
+            positions[kind] = (now - cursor_lag(), 0)
+        changes[kind] = [{name: row[path] for name, path in fields.items()} for row in rows]
+        if not reset:
+            # Tombstones up to where this kind's rows stopped, so a later
+            # re-add never arrives before the removal
+            window = Q(kind=kind, deleted_at__gte=since[kind][0])
+            if truncated:
+                window &= Q(deleted_at__lte=positions[kind][0])
+            tombstones |= window
+
+    deleted = {kind: [] for kind in SYNC_KINDS}
+    if not reset:
+        # SQL: SELECT kind, object_id FROM sync_tombstone
+        #      WHERE user_id = %s AND ((kind = 'requests' AND deleted_at >= %s ...) OR ...)
+        for kind, object_id in (SyncTombstone.objects.filter(tombstones, user_id=user.pk)
+                                .values_list('kind', 'object_id')):
+            deleted[kind].append(object_id)
+    return {
+        'cursor': encode_cursor(positions),
+        'reset': reset,
+        'has_more': has_more,
+        'changes': changes,
+        'deleted': deleted,
+    }
+
+
+def _same_version(server_value, client_value):
+    # JSON timestamps are millisecond precision; compare at that precision
+    if client_value is None:
+        return False
+    return abs(server_value - client_value) < timedelta(milliseconds=1)
+
+
+def _request_version(req):
+    fields = RESOURCES['requests'].fields
+    row = (InspectionRequest.objects.filter(pk=req.pk)
+           .values(*fields.values()).first())
+    return {name: row[path] for name, path in fields.items()}
+
+
+def apply_report(user, item):
+    """File one offline report; returns a result dict for the response."""
+    result = {'client_id': item.get('client_id'), 'request_id': item.get('request_id')}
+    try:
+        base = parse_datetime(item.get('base_updated_at') or '')
+    except ValueError:
+        base = None
+    if base is not None and timezone.is_naive(base):
+        base = None
+    try:
+        request_id = int(item.get('request_id'))
+    except (TypeError, ValueError):
+        return {**result, 'status': 'error', 'error': 'request_id must be an integer.'}
+    decision = item.get('decision')
+    if decision not in inspections.DECISIONS:
+        return {**result, 'status': 'error', 'error': 'decision must be Approved or Rejected.'}
+    fields = {name: item.get(name) or '' for name in REPORT_TEXT}
+    if item.get('inspection_date'):
+        try:
+            inspection_date = parse_datetime(item['inspection_date'])
+        except ValueError:
+            inspection_date = None
+        if inspection_date is None:
+            return {**result, 'status': 'error', 'error': 'Invalid inspection_date.'}
+        if timezone.is_naive(inspection_date):
+            inspection_date = timezone.make_aware(inspection_date)
+        fields['inspection_date'] = inspection_date
+    with transaction.atomic():
+        # Row lock on databases that have one; SQLite serialises writers anyway
+        req = (InspectionRequest.objects.select_for_update()
+               .filter(pk=request_id, inspector=user).first())
+        if req is None:
+            return {**result, 'status': 'error', 'error': 'Not an inspection assigned to you.'}
+        has_report = InspectionReport.objects.filter(inspection_request=req).exists()
+        if has_report or req.status != 'Assigned' or not _same_version(req.updated_at, base):
+            # Someone changed the request since the client last synced it
+            return {**result, 'status': 'conflict', 'server': _request_version(req)}
+        report = inspections.file_report(req, user, decision, **fields)
+    return {**result, 'status': 'created', 'report_id': report.pk,
+            'request': _request_version(req)}
+
+
+def purge_tombstones():
+    """Delete tombstones older than the retention window; returns how many."""
+    cutoff = timezone.now() - tombstone_retention()
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,72 @@
+"""
+Background job handlers, registered on import from MyappConfig.ready().
+
+Queue them with ``myapp.jobs.enqueue('<name>', {...})``; the payload is
+passed as keyword arguments.
+"""
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+
+from . import data_versions, fees, jobs, notifications, purge, scheduling
+from .jobs import task
+from .models import AdminBalance, Profile
+
+
+@task('credit_admin_balance')
+def credit_admin_balance(amount):
+    """Add a payment to the single AdminBalance row."""
+    # SQL: UPDATE admin_balance SET balance = balance + %s WHERE id = 1
+    if not AdminBalance.objects.filter(pk=1).update(balance=F('balance') + Decimal(amount)):
+        AdminBalance.objects.get_or_create(pk=1)
+        AdminBalance.objects.filter(pk=1).update(balance=F('balance') + Decimal(amount))
+    # update() sends no signals; the admin dashboard shows the balance
+    transaction.on_commit(lambda: data_versions.bump(data_versions.ADMIN))
+
+
+@task('fix_admin_profiles')
+def fix_admin_profiles():
+    """Ensure staff/superuser users have Profile.user_type set to Admin.
+
+    Returns the usernames that were changed.
+    """
+    changed = []
+    for u in User.objects.filter(is_staff=True):
+        profile, _ = Profile.objects.get_or_create(user=u)
+        if profile.user_type != 'Admin':
+            profile.user_type = 'Admin'
+            profile.save()
+            changed.append(u.username)
+    return changed
+
+
+@task(notifications.FLUSH_TASK)
+def flush_notifications():
+    """Deliver pending status-change notifications in one batch."""
+    return notifications.flush()
+
+
+@task(purge.PURGE_TASK)
+def purge_user(user_id):
+    """Purge one batch of a deactivated account's rows, then queue the next batch."""
+    if purge.purge_batch(user_id):
+        # Low priority and spaced out: purges yield to every other job and writer
+        jobs.enqueue(purge.PURGE_TASK, {'user_id': user_id}, priority=-10, delay=purge.pause_seconds())
+
+
+@task(fees.RECOMPUTE_TASK)
+def recompute_fees(after=0):
+    """Reprice one chunk of Pending requests, then queue the next chunk."""
+    last_id, changed = fees.recompute_chunk(after)
+    if last_id is not None:
+        jobs.enqueue(fees.RECOMPUTE_TASK, {'after': last_id}, priority=-5)
+    return changed
+
+
+@task(scheduling.SCHEDULE_TASK)
+def schedule_appointments():
+    """Book every Assigned request that has no appointment yet."""
+    booked, unbooked = scheduling.schedule_backlog()
+    return {'booked': booked, 'unbooked': unbooked}
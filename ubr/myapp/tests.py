@@ -1,3 +1,1008 @@
-from django.test import TestCase
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    analytics, api, archive, bulk, counters, data_versions, db_router, fees, inspections, jobs, lookup, notifications,
+    purge, ratelimit, rollups, scorecards, sync, triage,
+)
+from .paginators import EstimatedCountPaginator
+from .decorators import revalidate
+from .forms import SignUpForm
+from .models import (
+    ArchivedInspectionReport, ArchivedInspectionRequest, ArchivedMessage, ArchivedPayment, AuditLog, Broadcast,
+    BroadcastReceipt,
+    Complaint, ComplaintRollup, DailyRevenueRollup, FeeRule, InspectionReport, InspectionRequest, InspectorAvailability,
+    InspectorScorecard, InspectorTimeOff, InspectorWorkloadRollup, Job, Message, Payment, PendingNotification, Profile,
+    RequestStatusRollup, UserLookupTerm,
+)
+from .scheduling import Calendar, IntervalTree
+
+
+class SyncCursorTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+
+    def _sync_all(self, cursor=None, max_pages=20):
+        """Follow ``has_more`` to the end; returns (request ids in order received, last payload)."""
+        seen = []
+        for _ in range(max_pages):
+            since = sync.decode_cursor(cursor) if cursor else None
+            payload = sync.changes_since(self.owner, since)
+            seen.extend(row['id'] for row in payload['changes']['requests'])
+            cursor = payload['cursor']
+            if not payload['has_more']:
+                return seen, payload
+        self.fail('sync never finished')
+
+    @override_settings(SYNC_PAGE_SIZE=5)
+    def test_pages_through_rows_sharing_one_timestamp(self):
+        requests = InspectionRequest.objects.bulk_create(
+            InspectionRequest(owner=self.owner, building_location=f'site {i}') for i in range(12))
+        ids = [req.pk for req in requests]
+        # One bulk write: every row gets the same updated_at
+        InspectionRequest.objects.filter(pk__in=ids).update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        first = sync.changes_since(self.owner)
+        self.assertTrue(first['has_more'])
+        seen, last = self._sync_all(first['cursor'])
+        self.assertEqual([row['id'] for row in first['changes']['requests']] + seen, ids)
+        self.assertFalse(last['has_more'])
+
+    @override_settings(SYNC_PAGE_SIZE=5)
+    def test_incremental_sync_sees_later_changes(self):
+        req = InspectionRequest.objects.create(owner=self.owner, building_location='site')
+        InspectionRequest.objects.filter(pk=req.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        _, payload = self._sync_all()
+
+        InspectionRequest.objects.filter(pk=req.pk).update(status='Assigned', updated_at=timezone.now())
+        seen, _ = self._sync_all(payload['cursor'])
+        self.assertEqual(seen, [req.pk])
+
+    def test_bare_timestamp_cursor_is_accepted(self):
+        moment = timezone.now() - timedelta(hours=1)
+        positions = sync.decode_cursor(moment.isoformat())
+        self.assertEqual(positions, {kind: (moment, 0) for kind in sync.SYNC_KINDS})
+        with self.assertRaises(ValueError):
+            sync.decode_cursor('not-a-cursor/1')
+
+    def test_full_download_includes_archived_rows(self):
+        live = InspectionRequest.objects.create(owner=self.owner, building_location='live')
+        closed = InspectionRequest.objects.create(owner=self.owner, building_location='closed', status='Completed')
+        archive.archive_requests_batch(cutoff=timezone.now() + timedelta(seconds=1))
+        self.assertTrue(ArchivedInspectionRequest.objects.filter(pk=closed.pk).exists())
+
+        seen, _ = self._sync_all()
+        self.assertEqual(sorted(seen), [live.pk, closed.pk])
+
+        self.client.force_login(self.owner)
+        response = self.client.get(f'/api/v1/requests/{closed.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['id'], closed.pk)
+        listed = self.client.get('/api/v1/requests/').json()['results']
+        self.assertEqual([row['id'] for row in listed], [closed.pk, live.pk])
+
+    @override_settings(AUTH_CACHE_MODE='revalidate')
+    def test_api_etag_follows_data_versions(self):
+        self.client.force_login(self.owner)
+        etag = self.client.get('/api/v1/requests/')['ETag']
+        self.assertEqual(self.client.get('/api/v1/requests/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InspectionRequest.objects.create(owner=self.owner, building_location='new')
+        response = self.client.get('/api/v1/requests/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+
+    def test_sync_upload_needs_the_csrf_token_from_sync(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.owner)
+        upload = reverse('api_sync_reports')
+        body = '{"reports": []}'
+        self.assertEqual(client.post(upload, body, content_type='application/json').status_code, 403)
+
+        token = client.get(reverse('api_sync')).cookies['csrftoken'].value
+        response = client.post(upload, body, content_type='application/json', HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    @override_settings(AUTH_CACHE_MODE='no-store')
+    def test_etag_hashes_the_body_without_shared_versions(self):
+        self.client.force_login(self.owner)
+        url = reverse('api_list', args=['requests'])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A change whose version bump this process never saw
+        InspectionRequest.objects.create(owner=self.owner, building_location='new')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_fields_are_selectable(self):
+        req = InspectionRequest.objects.create(owner=self.owner, building_location='site')
+        self.client.force_login(self.owner)
+        url = reverse('api_detail', args=['requests', req.pk])
+        self.assertEqual(self.client.get(url, {'fields': 'status,location'}).json()['result'],
+                         {'status': 'Pending', 'location': 'site'})
+        self.assertEqual(set(self.client.get(url).json()['result']), set(api.RESOURCES['requests'].default_fields))
+        response = self.client.get(url, {'fields': 'status,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_before_pages_through_own_rows(self):
+        other = User.objects.create_user('other')
+        InspectionRequest.objects.create(owner=other, building_location='not mine')
+        mine = [InspectionRequest.objects.create(owner=self.owner, building_location=f's{i}').pk for i in range(5)]
+        self.client.force_login(self.owner)
+        seen, url = [], reverse('api_list', args=['requests']) + '?limit=2&fields=location'
+        while url:
+            payload = self.client.get(url).json()
+            self.assertLessEqual(len(payload['results']), 2)
+            seen.extend(row['location'] for row in payload['results'])
+            url = payload['next']
+        self.assertEqual(seen, ['s4', 's3', 's2', 's1', 's0'])
+        older = self.client.get(reverse('api_list', args=['requests']), {'before': mine[1]}).json()['results']
+        self.assertEqual([row['id'] for row in older], [mine[0]])
+
+    @override_settings(AUTH_CACHE_MODE='revalidate')
+    def test_not_modified_before_any_row_is_read(self):
+        InspectionRequest.objects.create(owner=self.owner, building_location='site')
+        self.client.force_login(self.owner)
+        url = reverse('api_list', args=['requests'])
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual([query['sql'] for query in queries if 'myapp_' in query['sql']], [])
+
+
+class AnalyticsTests(TestCase):
+    def test_archived_rows_still_count(self):
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        for decision in ('Approved', 'Approved', 'Rejected'):
+            req = InspectionRequest.objects.create(owner=owner, inspector=inspector, building_location='site',
+                                                   status='Assigned', fee=100)
+            inspections.file_report(req, inspector, decision)
+            Payment.objects.create(payer=owner, inspection_request=req, amount=100)
+        before = analytics.time_series('day', 2)['buckets'][-1]
+
+        InspectionRequest.objects.filter(status='Approved').update(status='Paid')
+        # Requests with undelivered notifications stay hot
+        notifications.flush()
+        archive.archive_requests_batch(cutoff=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(InspectionRequest.objects.count(), 0)
+        cache.clear()
+        after = analytics.time_series('day', 2)['buckets'][-1]
+
+        self.assertEqual(after, before)
+        self.assertEqual((after['payments'], after['revenue'], after['reports_filed']), (3, '300.00', 3))
+        self.assertEqual(after['inspectors'][0]['approval_rate'], 0.6667)
+
+    def test_inspectors_ranked_like_rank(self):
+        owner = User.objects.create_user('owner')
+        decisions = {'carol': ('Approved', 'Rejected'), 'bob': ('Approved',), 'alice': ('Approved', 'Approved')}
+        for username, filed in decisions.items():
+            inspector = User.objects.create_user(username)
+            for decision in filed:
+                req = InspectionRequest.objects.create(owner=owner, inspector=inspector, building_location='site',
+                                                       status='Assigned')
+                inspections.file_report(req, inspector, decision)
+        ranked = analytics.time_series('day', 1)['buckets'][-1]['inspectors']
+        # Ties share a rank and are ordered by username; the next rank skips
+        self.assertEqual([(row['username'], row['rank']) for row in ranked],
+                         [('alice', 1), ('bob', 1), ('carol', 3)])
+
+    def test_bucket_starts(self):
+        today = date(2026, 3, 4)
+        self.assertEqual(analytics.bucket_starts('week', 2, today), [date(2026, 2, 23), date(2026, 3, 2)])
+        self.assertEqual(analytics.bucket_starts('month', 3, today),
+                         [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)])
+        self.assertEqual(analytics.next_bucket(date(2025, 12, 1), 'month'), date(2026, 1, 1))
+        with self.assertRaises(ValueError):
+            analytics.time_series('year')
+
+    def test_closed_buckets_come_from_the_cache(self):
+        cache.clear()
+        self.assertEqual(analytics.time_series('day', 7)['cached_buckets'], 0)
+        # Only the open bucket is queried: payments, requests and reports (two), live and archived
+        with self.assertNumQueries(8):
+            series = analytics.time_series('day', 7)
+        self.assertEqual(series['cached_buckets'], 6)
+        self.assertEqual(len(series['buckets']), 7)
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = Path(directory.name)
+        self.enterContext(override_settings(REPORT_CACHE_DIR=self.cache_dir))
+        self.owner = User.objects.create_user('owner')
+        self.inspector = User.objects.create_user('inspector')
+        req = InspectionRequest.objects.create(owner=self.owner, inspector=self.inspector,
+                                               building_location='site', status='Assigned')
+        self.report = inspections.file_report(req, self.inspector, 'Approved', remarks='sound')
+        self.client.force_login(self.owner)
+
+    def test_download_is_cached_and_revalidated(self):
+        url = reverse('download_report', args=[self.report.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'sound', response.content)
+        etag = response['ETag']
+        digest = etag.strip('"')
+        self.assertEqual([path.name for path in self.cache_dir.iterdir()], [f'{self.report.pk}-{digest}.txt'])
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        # Saving the report drops its artifacts and moves the ETag
+        self.report.remarks = 'cracked'
+        self.report.save()
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'cracked', response.content)
+
+    def test_page_etag_is_per_user(self):
+        url = reverse('view_report', args=[self.report.pk])
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.inspector)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_strangers_render_nothing(self):
+        self.client.force_login(User.objects.create_user('stranger'))
+        response = self.client.get(reverse('download_report', args=[self.report.pk]))
+        self.assertRedirects(response, reverse('dashboard_redirect'), fetch_redirect_response=False)
+        self.assertFalse(self.cache_dir.exists() and any(self.cache_dir.iterdir()))
+
+
+class RouterTests(TestCase):
+    def _route(self, model, pinned_until=None, replica_view=True, wrote=False):
+        token = db_router.begin_request(pinned_until)
+        try:
+            if replica_view:
+                db_router.allow_replica_reads()
+            if wrote:
+                db_router.track_writes(lambda *args: None, 'UPDATE myapp_payment SET amount = 1', (), False, {})
+            return db_router.PrimaryReplicaRouter().db_for_read(model), db_router.read_from_replica()
+        finally:
+            db_router.end_request(token)
+
+    @override_settings(DATABASE_REPLICAS=('replica',))
+    def test_reads_routing(self):
+        self.assertEqual(self._route(InspectionRequest), ('replica', True))
+        self.assertEqual(self._route(InspectionRequest, replica_view=False), ('default', False))
+        self.assertEqual(self._route(User), ('default', False))
+        self.assertEqual(self._route(InspectionRequest, wrote=True), ('default', False))
+        self.assertEqual(self._route(InspectionRequest, pinned_until=time.time() + 10), ('default', False))
+        self.assertEqual(self._route(InspectionRequest, pinned_until=time.time() - 1), ('replica', True))
+        # Outside a request (workers, shell) everything reads the primary
+        self.assertEqual(db_router.PrimaryReplicaRouter().db_for_read(InspectionRequest), 'default')
+
+    @override_settings(DATABASE_REPLICAS=('default',))
+    def test_writing_request_sets_the_pin_cookie(self):
+        User.objects.create_user('owner', password='secret')
+        response = self.client.post(reverse('login'), {'username': 'owner', 'password': 'secret'})
+        pin = response.cookies[db_router.PIN_COOKIE]
+        self.assertEqual(pin['max-age'], db_router.sticky_seconds())
+        self.assertGreater(float(pin.value), time.time())
+
+        self.client.cookies.pop(db_router.PIN_COOKIE)
+        response = self.client.get(reverse('inbox'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('10/m'), (10, 60))
+        self.assertEqual(ratelimit.parse_rate('10/5m'), (10, 300))
+        self.assertEqual(ratelimit.parse_rate('1/d'), (1, 86400))
+
+    def test_bucket_refills_at_the_rate(self):
+        # 2/m with a burst of 2: two requests pass, the third waits for a token (30s)
+        state, wait = ratelimit._take(None, 0, 2, 60, 2)
+        state, wait = ratelimit._take(state, 0, 2, 60, 2)
+        self.assertEqual(wait, 0)
+        state, wait = ratelimit._take(state, 10, 2, 60, 2)
+        self.assertAlmostEqual(wait, 20)
+        _, wait = ratelimit._take(state, 30, 2, 60, 2)
+        self.assertEqual(wait, 0)
+
+    @override_settings(RATELIMITS={'login': '2/m'})
+    def test_login_is_throttled(self):
+        url = reverse('login')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'username': 'owner', 'password': 'wrong'}).status_code, 200)
+        response = self.client.post(url, {'username': 'owner', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+        # One token every 30s, less whatever refilled during the first two requests
+        self.assertIn(int(response['Retry-After']), range(1, 31))
+        # Rendering the form is free
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(RATELIMITS={'login': '2/m'}, RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse('login'), {'username': 'owner'}).status_code, 200)
+
+
+@jobs.task('tests.noop')
+def _noop():
+    pass
+
+
+# Savepoint depth of every run of 'tests.chain'
+_chain_depths = []
+
+
+@jobs.task('tests.chain')
+def _chain(remaining):
+    _chain_depths.append(len(connection.savepoint_ids))
+    if remaining:
+        jobs.enqueue('tests.chain', {'remaining': remaining - 1})
+
+
+class WorkerTests(TestCase):
+    @override_settings(JOBS_REQUEUE_INTERVAL=0, JOBS_LOCK_TIMEOUT=60)
+    def test_running_worker_requeues_abandoned_jobs(self):
+        job = jobs.enqueue('tests.noop')
+        # Claimed by a worker that died an hour ago
+        Job.objects.filter(pk=job.pk).update(status='running', locked_by='gone:1',
+                                             locked_at=timezone.now() - timedelta(hours=1))
+        with self.assertLogs('myapp.jobs', 'WARNING'):
+            self.assertEqual(jobs.work('test:1', exit_when_idle=True), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_jobs_queued_by_a_job_run_after_it(self):
+        _chain_depths.clear()
+        jobs.enqueue('tests.chain', {'remaining': 50})
+        self.assertEqual(len(_chain_depths), 51)
+        # Not nested in the job that queued them
+        self.assertEqual(len(set(_chain_depths)), 1)
+        self.assertEqual(Job.objects.filter(task='tests.chain', status='done').count(), 51)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=5)
+    def test_sqlite_max_id_is_not_trusted_after_deletes(self):
+        created = [jobs.enqueue('tests.noop') for _ in range(8)]
+        # Past the limit, SQLite's estimate is MAX(id)
+        self.assertEqual(EstimatedCountPaginator(Job.objects.order_by('-id'), 2).count, created[-1].pk)
+
+        # Purged rows leave MAX(id) where it was
+        Job.objects.filter(pk__in=[job.pk for job in created[:6]]).delete()
+        self.assertEqual(EstimatedCountPaginator(Job.objects.order_by('-id'), 2).count, 2)
+
+
+class InboxTests(TestCase):
+    def test_pages_merge_live_and_archived_messages(self):
+        sender = User.objects.create_user('sender')
+        reader = User.objects.create_user('reader')
+        start = timezone.now() - timedelta(days=200)
+        for i in range(60):
+            message = Message.objects.create(sender=sender, recipient=reader, subject=f'm{i}', body='x',
+                                             is_read=True)
+            # Pairs of messages share a sent_at; every third one gets archived
+            Message.objects.filter(pk=message.pk).update(sent_at=start + timedelta(hours=i // 2),
+                                                         updated_at=start if i % 3 == 0 else timezone.now())
+        archive.archive_messages_batch(cutoff=start + timedelta(seconds=1))
+        self.assertTrue(ArchivedMessage.objects.exists())
+        self.assertTrue(Message.objects.exists())
+
+        self.client.force_login(reader)
+        seen, url = [], reverse('inbox')
+        while url:
+            response = self.client.get(url)
+            page = response.context['messages']
+            self.assertLessEqual(len(page), 25)
+            seen.extend(message.pk for message in page)
+            url = response.context['next_url'] and reverse('inbox') + response.context['next_url']
+        expected = sorted(Message.objects.values_list('sent_at', 'pk').union(
+            ArchivedMessage.objects.values_list('sent_at', 'pk')), reverse=True)
+        self.assertEqual(seen, [pk for _, pk in expected])
+
+    @override_settings(AUTH_CACHE_MODE='revalidate')
+    def test_replica_page_gets_no_etag(self):
+        reader = User.objects.create_user('reader')
+        self.client.force_login(reader)
+        etag = self.client.get(reverse('inbox'))['ETag']
+        self.assertEqual(self.client.get(reverse('inbox'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # 'default' standing in for a replica: the page may be stale, so it must not carry the version ETag
+        with override_settings(DATABASE_REPLICAS=('default',)):
+            response = self.client.get(reverse('inbox'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
+
+
+class NotificationSenderTests(TestCase):
+    def test_sender_name_is_reserved_at_signup(self):
+        form = SignUpForm(data={'username': 'Notifications', 'password1': 'a-long-pass-phrase',
+                                'password2': 'a-long-pass-phrase', 'user_type': 'Owner'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
+
+    def test_regular_account_is_never_adopted(self):
+        sender = notifications._sender()
+        self.assertFalse(sender.is_active)
+        User.objects.filter(pk=sender.pk).delete()
+        User.objects.create_user('notifications', password='secret-pass-phrase')
+        with self.assertRaises(ImproperlyConfigured):
+            notifications._sender()
+
+
+class PurgeTests(TestCase):
+    @override_settings(PURGE_BATCH_SIZE=1)
+    def test_batches_delete_children_before_parents(self):
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        other = User.objects.create_user('other')
+        for decision in ('Approved', 'Rejected'):
+            req = InspectionRequest.objects.create(owner=owner, inspector=inspector, building_location='site',
+                                                   status='Assigned')
+            inspections.file_report(req, inspector, decision)
+            Payment.objects.create(payer=owner, inspection_request=req, amount=100)
+        Message.objects.create(sender=owner, recipient=other, subject='hi', body='x')
+        Message.objects.create(sender=other, recipient=owner, subject='re', body='x')
+        Complaint.objects.create(reporter=owner, against_inspector=inspector, message='late')
+        notifications.flush()
+        # One of the requests lives in the archive
+        archive.archive_requests_batch(cutoff=timezone.now() + timedelta(seconds=1))
+        self.assertTrue(ArchivedInspectionRequest.objects.exists())
+
+        for _ in range(50):
+            more = purge.purge_batch(owner.pk)
+            # Every batch leaves the foreign keys intact
+            connection.check_constraints()
+            if not more:
+                break
+        else:
+            self.fail('purge never finished')
+        self.assertFalse(User.objects.filter(pk=owner.pk).exists())
+        for model in (InspectionRequest, ArchivedInspectionRequest, InspectionReport, ArchivedInspectionReport,
+                      Payment, ArchivedPayment, Message, Complaint):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.assertEqual(User.objects.filter(pk__in=[inspector.pk, other.pk]).count(), 2)
+
+    def test_purged_inspector_requests_go_back_to_pending(self):
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        start = timezone.now() + timedelta(days=1)
+        req = InspectionRequest.objects.create(owner=owner, inspector=inspector, building_location='site',
+                                               status='Assigned', appointment_start=start,
+                                               appointment_end=start + timedelta(hours=1))
+        rollups.record_request_created(req)
+        InspectorAvailability.objects.create(inspector=inspector, weekday=0, start_time='09:00', end_time='17:00')
+        InspectorTimeOff.objects.create(inspector=inspector, start=start, end=start + timedelta(days=1))
+        broadcast = Broadcast.objects.create(sender=inspector, subject='hello', body='x')
+        BroadcastReceipt.objects.create(broadcast=broadcast, user=owner)
+        notifications.flush()
+
+        while purge.purge_batch(inspector.pk):
+            pass
+        req.refresh_from_db()
+        self.assertEqual((req.status, req.inspector_id, req.appointment_start), ('Pending', None, None))
+        self.assertEqual(RequestStatusRollup.objects.get(status='Pending').total, 1)
+        self.assertEqual(RequestStatusRollup.objects.get(status='Assigned').total, 0)
+        self.assertEqual(PendingNotification.objects.get().recipient_id, owner.pk)
+        for model, lookup in ((InspectorAvailability, 'inspector_id'), (InspectorTimeOff, 'inspector_id'),
+                              (Broadcast, 'sender_id'), (BroadcastReceipt, 'broadcast__sender_id'),
+                              (UserLookupTerm, 'user_id'), (InspectorWorkloadRollup, 'inspector_id'),
+                              (Profile, 'user_id')):
+            self.assertFalse(model.objects.filter(**{lookup: inspector.pk}).exists(), model.__name__)
+
+
+class ArchiveTests(TestCase):
+    def test_archive_and_restore_keep_ids_and_fields(self):
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        req = InspectionRequest.objects.create(owner=owner, inspector=inspector, building_location='site',
+                                               status='Assigned', fee=250)
+        report = inspections.file_report(req, inspector, 'Approved', remarks='fine')
+        payment = Payment.objects.create(payer=owner, inspection_request=req, amount=250)
+        InspectionRequest.objects.filter(pk=req.pk).update(status='Paid')
+        notifications.flush()
+        fields = ('owner_id', 'inspector_id', 'building_location', 'status', 'fee', 'created_at')
+        before = InspectionRequest.objects.values(*fields).get()
+
+        self.assertEqual(archive.archive_requests_batch(cutoff=timezone.now() + timedelta(seconds=1)), 1)
+        self.assertFalse(InspectionRequest.objects.exists())
+        self.assertEqual(ArchivedInspectionRequest.objects.values(*fields).get(pk=req.pk), before)
+        self.assertIsNotNone(ArchivedInspectionRequest.objects.get(pk=req.pk).archived_at)
+        self.assertEqual(ArchivedInspectionReport.objects.get(pk=report.pk).remarks, 'fine')
+        self.assertEqual(ArchivedPayment.objects.get(pk=payment.pk).inspection_request_id, req.pk)
+
+        self.assertEqual(archive.restore_requests([req.pk]), 1)
+        self.assertFalse(ArchivedInspectionRequest.objects.exists())
+        self.assertFalse(ArchivedInspectionReport.objects.exists())
+        self.assertFalse(ArchivedPayment.objects.exists())
+        self.assertEqual(InspectionRequest.objects.values(*fields).get(pk=req.pk), before)
+        self.assertEqual(InspectionReport.objects.get(pk=report.pk).inspection_request_id, req.pk)
+        self.assertEqual(Payment.objects.get(pk=payment.pk).amount, 250)
+
+
+class FeeRuleTests(TestCase):
+    def _rule(self, name, base_fee, **fields):
+        fields.setdefault('effective_from', date(2020, 1, 1))
+        return FeeRule.objects.create(name=name, base_fee=base_fee, **fields)
+
+    def _fee(self, req_type='New Construction', location='12 Harbour Road', floors=None, day=date(2026, 1, 1)):
+        table = fees.compile_rules(list(FeeRule.objects.all()))
+        return fees.fee_for(req_type, location, floors=floors, day=day, table=table)
+
+    def test_precedence(self):
+        self.assertEqual(self._fee(), fees.default_fee())
+        self._rule('catch-all', 100)
+        self.assertEqual(self._fee(), Decimal('100.00'))
+        # More specific beats less specific at the same priority
+        self._rule('harbour', 200, zone='Harbour')
+        self._rule('new harbour', 300, zone='harbour', req_type='New Construction')
+        self.assertEqual(self._fee(), Decimal('300.00'))
+        self.assertEqual(self._fee(req_type='Reinspection'), Decimal('200.00'))
+        # A bounded rule needs the value
+        self._rule('tall', 400, zone='harbour', req_type='New Construction', min_floors=10)
+        self.assertEqual(self._fee(floors=12), Decimal('400.00'))
+        self.assertEqual(self._fee(), Decimal('300.00'))
+        # Priority beats specificity
+        self._rule('flat rate', 50, priority=1)
+        self.assertEqual(self._fee(floors=12), Decimal('50.00'))
+
+    def test_effective_dates(self):
+        self._rule('old', 100, effective_to=date(2025, 12, 31))
+        self._rule('future', 300, effective_from=date(2027, 1, 1))
+        self.assertEqual(self._fee(), fees.default_fee())
+        self.assertEqual(self._fee(day=date(2025, 6, 1)), Decimal('100.00'))
+        self.assertEqual(self._fee(day=date(2027, 1, 1)), Decimal('300.00'))
+
+
+class SchedulingTests(TestCase):
+    # 2026-10-19 is a Monday; DEFAULT_WEEK works 9:00-17:00, Monday to Friday
+    MONDAY = timezone.make_aware(datetime(2026, 10, 19))
+
+    def at(self, day, hour, minute=0):
+        return self.MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+    def test_first_overlap_is_earliest_start(self):
+        tree = IntervalTree([(self.at(0, 13), self.at(0, 14), 'b'), (self.at(0, 10), self.at(0, 11), 'a'),
+                             (self.at(0, 9), self.at(0, 17), 'all day'), (self.at(0, 15), self.at(0, 16), 'c')])
+        self.assertEqual(tree.first_overlap(self.at(0, 12), self.at(0, 16))[2], 'all day')
+        tree = IntervalTree([(self.at(0, 13), self.at(0, 14), 'b'), (self.at(0, 10), self.at(0, 11), 'a'),
+                             (self.at(0, 15), self.at(0, 16), 'c')])
+        self.assertEqual(tree.first_overlap(self.at(0, 10, 30), self.at(0, 15, 30))[2], 'a')
+        self.assertEqual(tree.first_overlap(self.at(0, 12), self.at(0, 16))[2], 'b')
+        # Half-open: touching intervals don't overlap
+        self.assertIsNone(tree.first_overlap(self.at(0, 11), self.at(0, 13)))
+        self.assertIsNone(tree.first_overlap(self.at(0, 16), self.at(0, 17)))
+        self.assertEqual(len(tree), 3)
+        with self.assertRaises(ValueError):
+            tree.insert(self.at(0, 12), self.at(0, 12))
+
+    def test_next_free_skips_busy_time_and_closed_hours(self):
+        hour = timedelta(hours=1)
+        calendar = Calendar(busy=[(self.at(0, 9), self.at(0, 10, 20), 'booked'),
+                                  (self.at(0, 11), self.at(0, 17), 'time off')])
+        until = self.at(7, 0)
+        # 10:20-11:00 is too short for an hour; Tuesday opens free
+        self.assertEqual(calendar.next_free(self.at(0, 8, 5), hour, until), self.at(1, 9))
+        calendar.book(self.at(1, 9), self.at(1, 10))
+        self.assertEqual(calendar.next_free(self.at(0, 8, 5), hour, until), self.at(1, 10))
+        # Starts where the conflicting booking ends, even off the quarter hour
+        self.assertEqual(calendar.next_free(self.at(0, 9, 50), timedelta(minutes=30), until), self.at(0, 10, 20))
+        # Friday afternoon: the next window is on Monday
+        self.assertEqual(calendar.next_free(self.at(4, 16, 30), hour, self.at(14, 0)), self.at(7, 9))
+        self.assertIsNone(calendar.next_free(self.at(4, 16, 30), hour, self.at(7, 0)))
+
+
+class RollupTests(TestCase):
+    def _rollups(self):
+        return {
+            'statuses': set(RequestStatusRollup.objects.exclude(total=0).values_list('status', 'total')),
+            'revenue': set(DailyRevenueRollup.objects.values_list('day', 'amount', 'payments')),
+            'workloads': set(InspectorWorkloadRollup.objects.values_list(
+                'inspector_id', 'open_requests', 'complaints_total', 'complaints_open')),
+            'scorecards': set(InspectorScorecard.objects.values_list(
+                'profile_id', 'reports_filed', 'approved', 'rejected', 'turnaround_seconds')),
+            'complaints': set(ComplaintRollup.objects.values_list('total', 'unresolved')),
+        }
+
+    def test_rebuild_agrees_with_incremental_updates(self):
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        requests = []
+        for i in range(3):
+            req = InspectionRequest.objects.create(owner=owner, building_location=f'site {i}')
+            rollups.record_request_created(req)
+            req.inspector, req.status = inspector, 'Assigned'
+            req.save()
+            rollups.record_status_change('Pending', None, req)
+            requests.append(req)
+        created = requests[0].created_at
+        inspections.file_report(requests[0], inspector, 'Approved', inspection_date=created + timedelta(hours=3))
+        # Filed with a date before the request existed: counts as no turnaround, not a negative one
+        inspections.file_report(requests[1], inspector, 'Rejected', inspection_date=created - timedelta(days=1))
+        payment = Payment.objects.create(payer=owner, inspection_request=requests[0], amount=100)
+        rollups.record_payment(payment)
+        complaint = Complaint.objects.create(reporter=owner, against_inspector=inspector, message='late')
+        rollups.record_complaint_created(complaint)
+
+        live = self._rollups()
+        self.assertEqual(InspectorScorecard.objects.get().turnaround_seconds, 3 * 60 * 60)
+        self.assertEqual(live['statuses'], {('Approved', 1), ('Rejected', 1), ('Assigned', 1)})
+        rollups.rebuild_rollups()
+        self.assertEqual(self._rollups(), live)
+
+
+class BulkTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', is_staff=True)
+        self.owner = User.objects.create_user('owner')
+        self.inspector = User.objects.create_user('inspector')
+
+    def test_assign_inspector(self):
+        other = User.objects.create_user('other')
+        start = timezone.now() + timedelta(days=1)
+        pending = InspectionRequest.objects.create(owner=self.owner, building_location='a')
+        moved = InspectionRequest.objects.create(owner=self.owner, inspector=other, status='Assigned',
+                                                 building_location='b', appointment_start=start,
+                                                 appointment_end=start + timedelta(hours=1))
+        for req in (pending, moved):
+            rollups.record_request_created(req)
+
+        ids = bulk.parse_ids([str(pending.pk), str(moved.pk), str(moved.pk), 'x', ''])
+        self.assertEqual(bulk.assign_inspector(self.admin, ids, self.inspector), 2)
+        self.assertEqual(set(InspectionRequest.objects.values_list('status', 'inspector_id', 'appointment_start')),
+                         {('Assigned', self.inspector.pk, None)})
+        self.assertEqual(set(RequestStatusRollup.objects.exclude(total=0).values_list('status', 'total')),
+                         {('Assigned', 2)})
+        self.assertEqual(dict(InspectorWorkloadRollup.objects.values_list('inspector_id', 'open_requests')),
+                         {other.pk: 0, self.inspector.pk: 2})
+        self.assertEqual(set(PendingNotification.objects.values_list('recipient_id', flat=True)),
+                         {self.owner.pk, self.inspector.pk})
+        entry = AuditLog.objects.get()
+        self.assertEqual((entry.actor, entry.action, entry.target, entry.object_ids, entry.affected, entry.details),
+                         (self.admin, 'assign_inspector', 'myapp.inspectionrequest', sorted(ids), 2,
+                          {'inspector_id': self.inspector.pk}))
+
+    def test_set_fee_and_resolve_complaints(self):
+        req = InspectionRequest.objects.create(owner=self.owner, building_location='a')
+        with self.assertRaises(ValueError):
+            bulk.parse_fee('-1')
+        self.assertEqual(bulk.set_fee(self.admin, [req.pk], bulk.parse_fee('99.5')), 1)
+        req.refresh_from_db()
+        self.assertEqual((req.fee, req.fee_overridden), (Decimal('99.50'), True))
+
+        complaint = Complaint.objects.create(reporter=self.owner, against_inspector=self.inspector, message='late')
+        rollups.record_complaint_created(complaint)
+        self.assertEqual(bulk.resolve_complaints(self.admin, [complaint.pk]), 1)
+        # Resolving twice changes nothing and is still audited
+        self.assertEqual(bulk.resolve_complaints(self.admin, [complaint.pk]), 0)
+        self.assertEqual(InspectorWorkloadRollup.objects.get(inspector=self.inspector).complaints_open, 0)
+        self.assertEqual(list(AuditLog.objects.order_by('pk').values_list('action', 'affected', 'details')),
+                         [('set_fee', 1, {'fee': '99.50'}), ('resolve_complaints', 1, {}),
+                          ('resolve_complaints', 0, {})])
+
+    def test_bulk_page_is_staff_only(self):
+        req = InspectionRequest.objects.create(owner=self.owner, building_location='a')
+        form = {'ids': [req.pk], 'action': 'bulk_fee', 'fee': '1'}
+        self.client.force_login(self.owner)
+        self.client.post(reverse('admin_bulk_requests'), form)
+        self.assertFalse(AuditLog.objects.exists())
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin_bulk_requests'), form)
+        self.assertRedirects(response, reverse('admin_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(AuditLog.objects.get().actor, self.admin)
+
+
+class CounterTests(TestCase):
+    def test_write_paths_keep_counters_exact(self):
+        admin = User.objects.create_user('admin', is_staff=True)
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        requests = []
+        for i in range(3):
+            req = InspectionRequest.objects.create(owner=owner, building_location=f'site {i}')
+            rollups.record_request_created(req)
+            requests.append(req)
+        bulk.assign_inspector(admin, [req.pk for req in requests], inspector)
+        inspections.file_report(InspectionRequest.objects.get(pk=requests[0].pk), inspector, 'Approved')
+        complaints = [Complaint.objects.create(reporter=owner, against_inspector=inspector, message='late')
+                      for _ in range(2)]
+        for complaint in complaints:
+            rollups.record_complaint_created(complaint)
+        bulk.resolve_complaints(admin, [complaints[0].pk])
+        # Delivers the status change notifications as messages
+        notifications.flush()
+
+        unread = Message.objects.filter(recipient=inspector, is_read=False).count()
+        self.assertGreater(unread, 0)
+        self.assertEqual(counters.find_drift(), [])
+        self.assertEqual(Profile.objects.values(*counters.FIELDS).get(user=inspector), {
+            'requests_owned': 0, 'open_inspections': 2, 'reports_filed': 1, 'complaints_open': 1,
+            'unread_messages': unread,
+        })
+        self.assertEqual(Profile.objects.get(user=owner).requests_owned, 3)
+
+    def test_repair_fixes_drift(self):
+        owner = User.objects.create_user('owner')
+        InspectionRequest.objects.create(owner=owner, building_location='site')
+        Profile.objects.filter(user=owner).update(requests_owned=5, unread_messages=2)
+        self.assertEqual(sorted(counters.find_drift()),
+                         [(owner.pk, 'requests_owned', 5, 1), (owner.pk, 'unread_messages', 2, 0)])
+        with self.assertRaises(CommandError):
+            call_command('repair_profile_counters', '--check', stdout=StringIO())
+        call_command('repair_profile_counters', stdout=StringIO())
+        self.assertEqual(counters.find_drift(), [])
+
+
+class LookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner')
+        self.ann = self._inspector('ann', 'North Harbour', first_name='Ann', last_name='Smith')
+        self.bob = self._inspector('bob', 'Hillside', approved=False)
+
+    def _inspector(self, username, location, approved=True, **names):
+        user = User.objects.create_user(username, **names)
+        # Saved, not updated: the profile signal reindexes the lookup terms
+        profile = user.profile
+        profile.user_type, profile.location, profile.is_approved = 'Inspector', location, approved
+        profile.save()
+        return user
+
+    def _usernames(self, scope, query):
+        return [row['username'] for row in lookup.search(scope, query)]
+
+    def test_every_word_prefixes_a_term(self):
+        self.assertEqual(self._usernames('inspectors', 'har SM'), ['ann'])
+        self.assertEqual(self._usernames('inspectors', 'harbour hill'), [])
+        self.assertEqual(self._usernames('inspectors', 'hill'), ['bob'])
+        # Owners are in no scope; unapproved inspectors can't be assigned
+        self.assertEqual(self._usernames('recipients', 'own'), [])
+        self.assertEqual(self._usernames('assignable', 'hill'), [])
+        self.assertEqual(self._usernames('inspectors', '  '), [])
+
+    def test_renames_are_reindexed(self):
+        self.ann.last_name = 'Jones'
+        self.ann.save()
+        self.assertEqual(self._usernames('inspectors', 'jones'), ['ann'])
+        self.assertEqual(self._usernames('inspectors', 'smith'), [])
+
+    def test_choice_checks_the_scope(self):
+        self.assertEqual(lookup.choice('assignable', str(self.ann.pk)), self.ann)
+        Profile.objects.filter(user=self.ann).update(is_banned=True)
+        for value in (self.ann.pk, self.bob.pk, self.owner.pk, 'x', None):
+            self.assertIsNone(lookup.choice('assignable', value), value)
+        self.assertEqual(lookup.choice('inspectors', self.ann.pk), self.ann)
+
+    def test_views(self):
+        self.client.force_login(self.owner)
+        url = reverse('user_lookup')
+        self.assertEqual(self.client.get(url, {'scope': 'assignable', 'q': 'ann'}).status_code, 404)
+        self.assertEqual([row['username'] for row in self.client.get(url, {'scope': 'recipients', 'q': 'a'})
+                          .json()['results']], ['ann'])
+        self.client.post(reverse('send_message'), {'recipient': self.owner.pk, 'subject': 's', 'body': 'b'})
+        self.assertFalse(Message.objects.exists())
+        self.client.post(reverse('send_message'), {'recipient': self.ann.pk, 'subject': 's', 'body': 'b'})
+        self.assertEqual(Message.objects.get().recipient, self.ann)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.inspector = User.objects.create_user('inspector')
+        self.client.force_login(self.owner)
+
+    def _create(self, n, **fields):
+        return InspectionRequest.objects.bulk_create(
+            InspectionRequest(owner=self.owner, building_location=f'site {i}', **fields) for i in range(n))
+
+    def _page_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('owner_dashboard')).status_code, 200)
+        return len(queries)
+
+    def test_owner_pages_newest_first(self):
+        self._create(30)
+        paid = InspectionRequest.objects.order_by('-pk').first()
+        Payment.objects.create(payer=self.owner, inspection_request=paid, amount=40)
+        Payment.objects.create(payer=self.owner, inspection_request=paid, amount=60)
+        seen, url = [], reverse('owner_dashboard')
+        while url:
+            context = self.client.get(url).context
+            self.assertLessEqual(len(context['data']), 25)
+            seen.extend(context['data'])
+            url = context['next_url'] and reverse('owner_dashboard') + context['next_url']
+        self.assertEqual([req.pk for req in seen],
+                         list(InspectionRequest.objects.order_by('-pk').values_list('pk', flat=True)))
+        self.assertEqual(seen[0].amount_paid, Decimal('100.00'))
+        self.assertEqual(seen[1].amount_paid, 0)
+
+    def test_query_count_does_not_grow_with_requests(self):
+        self._create(2)
+        few = self._page_queries()
+        self._create(40, inspector=self.inspector, status='Assigned')
+        self.assertEqual(self._page_queries(), few)
+
+    def test_status_filter(self):
+        self._create(2)
+        self._create(3, inspector=self.inspector, status='Assigned')
+        context = self.client.get(reverse('owner_dashboard'), {'status': 'Assigned'}).context
+        self.assertEqual({req.status for req in context['data']}, {'Assigned'})
+        self.assertEqual(len(context['data']), 3)
+        # An unknown status shows everything
+        self.assertEqual(len(self.client.get(reverse('owner_dashboard'), {'status': 'Bogus'}).context['data']), 5)
+
+    def test_inspector_sees_assigned_requests_only(self):
+        mine = self._create(2, inspector=self.inspector, status='Assigned')
+        self._create(2)
+        Profile.objects.filter(user=self.inspector).update(user_type='Inspector', is_approved=True)
+        self.client.force_login(self.inspector)
+        context = self.client.get(reverse('inspector_dashboard')).context
+        self.assertEqual([req.pk for req in context['data']], [req.pk for req in reversed(mine)])
+
+
+class TriageTests(TestCase):
+    def test_queue_pages_open_complaints_first(self):
+        owner = User.objects.create_user('owner')
+        inspector = User.objects.create_user('inspector')
+        complaints = [Complaint.objects.create(reporter=owner, against_inspector=inspector, message=str(i),
+                                               resolved=i % 3 == 0) for i in range(10)]
+        seen, after = [], None
+        while True:
+            page, cursor = triage.queue(after=after, limit=3)
+            self.assertLessEqual(len(page), 3)
+            seen.extend(page)
+            if cursor is None:
+                break
+            after = triage.decode_cursor(cursor)
+        expected = sorted(complaints, key=lambda complaint: (complaint.resolved, -complaint.pk))
+        self.assertEqual([complaint.pk for complaint in seen], [complaint.pk for complaint in expected])
+        self.assertEqual(len(triage.queue('open', limit=20)[0]), 6)
+
+        with self.assertRaises(ValueError):
+            triage.decode_cursor('2.5')
+        with self.assertRaises(ValueError):
+            triage.decode_cursor('0.x')
+
+    @override_settings(COMPLAINT_FLAG_THRESHOLD=2)
+    def test_inspector_counts(self):
+        owner = User.objects.create_user('owner')
+        busy = User.objects.create_user('busy')
+        quiet = User.objects.create_user('quiet')
+        for inspector, n in ((busy, 2), (quiet, 1)):
+            for _ in range(n):
+                Complaint.objects.create(reporter=owner, against_inspector=inspector, message='late')
+        Complaint.objects.create(reporter=owner, against_inspector=quiet, message='old', resolved=True)
+        self.assertEqual([(row['username'], row['open'], row['flagged']) for row in triage.inspector_counts()],
+                         [('busy', 2, True), ('quiet', 1, False)])
+
+
+class ScorecardTests(TestCase):
+    def setUp(self):
+        # Three inspectors approving 8 of 10, one approving 1 of 10
+        for i, approved in enumerate((8, 8, 8, 1)):
+            user = User.objects.create_user(f'inspector{i}')
+            Profile.objects.filter(user=user).update(user_type='Inspector')
+            InspectorScorecard.objects.create(profile=user.profile, reports_filed=10, approved=approved,
+                                              rejected=10 - approved, turnaround_seconds=10 * 3600)
+
+    def test_outlier_is_flagged(self):
+        flags = {card['user'].username: card['flags'] for card in scorecards.inspector_scorecards()}
+        self.assertEqual(flags, {'inspector0': [], 'inspector1': [], 'inspector2': [],
+                                 'inspector3': ['low approval rate']})
+
+    def test_users_page_lists_only_flagged_inspectors(self):
+        admin = User.objects.create_user('admin', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin_view_users'))
+        self.assertEqual([card['user'].username for card in response.context['flagged']], ['inspector3'])
+        self.assertEqual(response.context['inspector_count'], 4)
+
+        page = self.client.get(reverse('admin_scorecards')).context['page']
+        self.assertEqual(len(page), 4)
+        self.client.force_login(User.objects.get(username='inspector0'))
+        self.assertRedirects(self.client.get(reverse('admin_scorecards')), reverse('dashboard_redirect'),
+                             fetch_redirect_response=False)
+
+
+class DataVersionTests(TestCase):
+    def test_only_admin_listed_rows_bump_the_admin_scope(self):
+        owner = User.objects.create_user('owner', password='a-long-pass-phrase')
+        other = User.objects.create_user('other')
+
+        def changed(action):
+            before = data_versions.get(data_versions.ADMIN, data_versions.user_scope(owner.pk))
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+            after = data_versions.get(data_versions.ADMIN, data_versions.user_scope(owner.pk))
+            return tuple(old != new for old, new in zip(before, after))
+
+        # (admin scope moved, owner's scope moved)
+        self.assertEqual(changed(lambda: self.client.login(username='owner', password='a-long-pass-phrase')),
+                         (False, True))
+        self.assertEqual(changed(lambda: Message.objects.create(sender=other, recipient=owner, subject='s',
+                                                                body='b')), (False, True))
+        self.assertEqual(changed(lambda: InspectionRequest.objects.create(owner=owner, building_location='site')),
+                         (True, True))
+
+
+@override_settings(AUTH_CACHE_MODE='revalidate')
+class RevalidateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+        self.renders = 0
+
+        @revalidate(data_versions.ADMIN)
+        def page(request):
+            self.renders += 1
+            return HttpResponse('page')
+        self.page = page
+
+    def _get(self, etag=None, flash=False):
+        request = RequestFactory().get('/page/', HTTP_IF_NONE_MATCH=etag or '')
+        request.user = self.user
+        request._messages = CookieStorage(request)
+        if flash:
+            messages.info(request, 'Saved.')
+        return self.page(request)
+
+    def test_unchanged_page_is_not_rendered_again(self):
+        response = self._get()
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag = response['ETag']
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.renders, 1)
+
+        # Another user's change leaves the page alone; the listed scopes don't
+        data_versions.bump(data_versions.user_scope(self.user.pk + 1))
+        self.assertEqual(self._get(etag).status_code, 304)
+        for scope in (data_versions.user_scope(self.user.pk), data_versions.GLOBAL, data_versions.ADMIN):
+            data_versions.bump(scope)
+            response = self._get(etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_no_store_fallbacks(self):
+        response = self._get(flash=True)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
+        with override_settings(AUTH_CACHE_MODE='no-store'):
+            response = self._get()
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
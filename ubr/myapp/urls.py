@@ -1,11 +1,13 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
+from .decorators import rate_limit
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('signup/', views.signup, name='signup'),
-    path('login/', auth_views.LoginView.as_view(), name='login'),
+    # Throttled per client IP and per attempted username
+    path('login/', rate_limit('login', '10/m', key=('ip', 'post:username'))(auth_views.LoginView.as_view()), name='login'),
     # Use a simple function-based logout that allows GET (resolves 405 on GET /logout/)
     path('logout/', views.custom_logout, name='logout'),
 
@@ -17,6 +19,7 @@ urlpatterns = [
     path('owner/inbox/', views.inbox, name='inbox'),
     path('owner/messages/send/', views.send_message, name='send_message'),
     path('owner/messages/<int:pk>/', views.view_message, name='view_message'),
+    path('owner/announcements/<int:pk>/', views.view_broadcast, name='view_broadcast'),
     path('owner/payment/', views.owner_payments, name='owner_payments'),
     path('owner/payment/<int:pk>/', views.payment, name='payment'),
     # Admin flows
@@ -24,14 +27,27 @@ urlpatterns = [
     path('admin/complaints/', views.admin_manage_complaints, name='admin_manage_complaints'),
     path('admin/set-fee/<int:pk>/', views.admin_set_fee, name='admin_set_fee'),
     path('admin/users/', views.admin_view_users, name='admin_view_users'),
+    path('admin/users/scorecards/', views.admin_scorecards, name='admin_scorecards'),
     path('admin/assign-inspector/<int:pk>/', views.admin_assign_inspector, name='admin_assign_inspector'),
     path('admin/assign-inspector/', views.admin_assign_inspector, name='admin_assign_inspector_list'),
+    path('admin/broadcast/', views.admin_broadcast, name='admin_broadcast'),
+    path('admin/requests/bulk/', views.admin_bulk_requests, name='admin_bulk_requests'),
     # Inspector flows
     path('inspector/inspect/<int:pk>/', views.inspector_inspection_view, name='inspector_inspection'),
     path('inspector/dashboard/', views.inspector_dashboard, name='inspector_dashboard'),
     path('inspector/profile/edit/', views.edit_profile, name='edit_profile'),
+    # Typeahead user picker (see myapp/lookup.py)
+    path('lookup/users/', views.user_lookup, name='user_lookup'),
     path('report/<int:pk>/', views.view_report, name='view_report'),
     path('report/<int:pk>/download/', views.download_report, name='download_report'),
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin/analytics/', views.admin_analytics, name='admin_analytics'),
+    path('admin/analytics/data/', views.admin_analytics_data, name='admin_analytics_data'),
+
+    # JSON API for the field tablets (see myapp/api.py)
+    path('api/v1/sync/', api.api_sync, name='api_sync'),
+    path('api/v1/sync/reports/', api.api_sync_reports, name='api_sync_reports'),
+    path('api/v1/<str:resource>/', api.api_list, name='api_list'),
+    path('api/v1/<str:resource>/<int:pk>/', api.api_detail, name='api_detail'),
     
 ]
@@ -6,10 +6,17 @@ from .forms import SignUpForm
 from .models import Profile, InspectionRequest, InspectionReport, Message  # import your models
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
-from .decorators import role_required
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db import transaction
+from django.utils import timezone
+from .decorators import rate_limit, revalidate, role_required, set_private_cache_headers
+from . import (
+    archive, bulk, counters, data_versions, fees, inspections, jobs, lookup, notifications, purge, rollups,
+    scheduling, sync, triage,
+)
 
 
+@rate_limit('signup', '5/h', key=('ip',))
 def signup(request):
     """
     Handle user registration with user_type selection.
@@ -138,66 +145,144 @@ def custom_logout(request):
     return redirect('home')
 
 
+def _optional_int(value):
+    """A non-negative int from a form field, or None when blank or invalid."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value >= 0 else None
+
+
 @login_required
+@rate_limit('request_inspection', '10/h')
 def request_inspection(request):
     """Owner: request an inspection (simple handler)."""
     if request.method == 'POST':
         location = request.POST.get('location') or request.POST.get('building_location')
-        # Create InspectionRequest with minimal required fields
-        InspectionRequest.objects.create(owner=request.user, building_location=location)
+        req_type = request.POST.get('req_type')
+        if req_type not in dict(InspectionRequest.REQ_TYPES):
+            req_type = 'New Construction'
+        floors, floor_area = (_optional_int(request.POST.get(name)) for name in ('floors', 'floor_area'))
+        # Priced by the fee rules (myapp/fees.py) as it is created
+        fee = fees.fee_for(req_type, location, floors, floor_area)
+        with transaction.atomic():
+            req = InspectionRequest.objects.create(
+                owner=request.user, building_location=location, req_type=req_type,
+                floors=floors, floor_area=floor_area, fee=fee)
+            rollups.record_request_created(req)
         messages.success(request, 'Inspection request submitted.')
         return redirect('owner_dashboard')
     return render(request, 'owner/request_inspection.html')
 
 
 @login_required
+@rate_limit('owner_complaint', '5/h')
 def owner_complaint(request):
-    """Submit a complaint to an inspector. Template expects `inspectors` context."""
-    inspectors = User.objects.filter(profile__user_type='Inspector')
+    """Submit a complaint to an inspector, picked with the typeahead user lookup."""
     if request.method == 'POST':
-        inspector_id = request.POST.get('inspector')
+        inspector = lookup.choice('inspectors', request.POST.get('inspector'))
         message_text = request.POST.get('message', '').strip()
-        inspector = None
-        if inspector_id:
-            try:
-                inspector = User.objects.get(pk=inspector_id)
-            except User.DoesNotExist:
-                inspector = None
         # Create complaint record
         from .models import Complaint
-        Complaint.objects.create(reporter=request.user, against_inspector=inspector, message=message_text)
+        with transaction.atomic():
+            complaint = Complaint.objects.create(reporter=request.user, against_inspector=inspector, message=message_text)
+            rollups.record_complaint_created(complaint)
         messages.success(request, 'Complaint submitted to the inspector.')
         return redirect('owner_dashboard')
-    return render(request, 'owner/complaints.html', {'inspectors': inspectors})
+    return render(request, 'owner/complaints.html')
+
+
+INBOX_PAGE_SIZE = 25
+
+
+def _inbox_cursor(value):
+    """Parse ``?before=<sent_at>,<id>``; None when absent or malformed."""
+    from django.utils.dateparse import parse_datetime
+    sent_at, _, pk = (value or '').rpartition(',')
+    try:
+        sent_at = parse_datetime(sent_at) if sent_at else None
+    except ValueError:
+        sent_at = None
+    if sent_at is None or not pk.isdigit():
+        return None
+    return sent_at, int(pk)
 
 
 @login_required
+@revalidate()
 def inbox(request):
-    """Show messages received by the current user."""
-    received = Message.objects.filter(recipient=request.user).order_by('-sent_at')
-    return render(request, 'messages/inbox.html', {'messages': received})
+    """
+    Show messages received by the current user, newest first, a page at a time.
+
+    Pages with ``?before=<sent_at>,<id>`` (keyset, like the dashboards). Old
+    read messages live in the archive table (myapp/archive.py); only the
+    archived messages that sort before the end of the live page are read.
+    """
+    from django.db.models import Q
+    from .models import ArchivedMessage, Broadcast
+    before = _inbox_cursor(request.GET.get('before'))
+
+    def newest_first(model):
+        # The inbox list never shows the body, skip loading/decompressing it
+        # SQL: SELECT ... FROM message WHERE recipient_id = %s
+        #        AND (sent_at < %s OR (sent_at = %s AND id < %s))
+        #      ORDER BY sent_at DESC, id DESC LIMIT %s  -- message_inbox_idx
+        qs = model.objects.filter(recipient=request.user).select_related('sender').defer('body')
+        if before:
+            qs = qs.filter(Q(sent_at__lt=before[0]) | Q(sent_at=before[0], id__lt=before[1]))
+        return qs.order_by('-sent_at', '-id')
+
+    received = list(newest_first(Message)[:INBOX_PAGE_SIZE + 1])
+    archived = newest_first(ArchivedMessage)
+    if len(received) > INBOX_PAGE_SIZE:
+        # A full live page: older archived messages belong to later pages
+        last = received[-1]
+        archived = archived.filter(Q(sent_at__gt=last.sent_at) | Q(sent_at=last.sent_at, id__gt=last.pk))
+    rows = sorted([*received, *archived[:INBOX_PAGE_SIZE + 1]], key=lambda m: (m.sent_at, m.pk), reverse=True)
+    next_url = first_page_url = None
+    params = request.GET.copy()
+    if len(rows) > INBOX_PAGE_SIZE:
+        rows = rows[:INBOX_PAGE_SIZE]
+        params['before'] = f'{rows[-1].sent_at.isoformat()},{rows[-1].pk}'
+        next_url = f'?{params.urlencode()}'
+    if before:
+        params.pop('before', None)
+        first_page_url = f'?{params.urlencode()}'
+    # Announcements are stored once and matched to the user here (fan-out on read)
+    broadcasts = Broadcast.objects.for_user(request.user).select_related('sender').defer('body')[:20]
+    return render(request, 'messages/inbox.html', {
+        'messages': rows,
+        'broadcasts': broadcasts,
+        'next_url': next_url,
+        'first_page_url': first_page_url,
+    })
 
 
 @login_required
 def payment(request, pk):
     """Handle a simple payment flow for an InspectionRequest."""
     req = get_object_or_404(InspectionRequest, pk=pk)
-    # prefer request-specific fee if set
-    amount = req.fee if getattr(req, 'fee', None) else 500
+    # Requests priced before the fee rules existed have no fee yet
+    amount = req.fee or fees.compute(req)
     success = False
     if request.method == 'POST':
         # get chosen method (demo only)
         method = request.POST.get('method', 'Demo')
         # simulate payment success: create Payment and update admin balance
         success = True
-        from .models import Payment, AdminBalance
-        Payment.objects.create(payer=request.user, inspection_request=req, amount=amount)
-        # mark request as Paid
-        req.status = 'Paid'
-        req.save()
-        admin_balance_obj, _ = AdminBalance.objects.get_or_create(pk=1)
-        admin_balance_obj.balance = (admin_balance_obj.balance or 0) + amount
-        admin_balance_obj.save()
+        from .models import Payment
+        with transaction.atomic():
+            pay = Payment.objects.create(payer=request.user, inspection_request=req, amount=amount)
+            rollups.record_payment(pay)
+            # mark request as Paid
+            old_status, old_inspector_id = req.status, req.inspector_id
+            req.status = 'Paid'
+            req.save()
+            rollups.record_status_change(old_status, old_inspector_id, req)
+            notifications.record_status_change(old_status, old_inspector_id, req)
+            # Balance bookkeeping runs in a background worker (run_workers)
+            jobs.enqueue('credit_admin_balance', {'amount': str(amount)}, priority=10)
     return render(request, 'owner/payment.html', {'amount': amount, 'success': success})
 
 
@@ -211,38 +296,66 @@ def owner_payments(request):
 @login_required
 def admin_approve_inspectors(request):
     from .models import Profile
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied.')
+        return redirect('dashboard_redirect')
     if request.method == 'POST':
-        uid = request.POST.get('profile_id')
         action = request.POST.get('action')
+        if action in ('bulk_approve', 'bulk_reject'):
+            ids = bulk.parse_ids(request.POST.getlist('ids'))
+            if action == 'bulk_approve':
+                n = bulk.approve_inspectors(request.user, ids)
+                messages.success(request, f'{n} inspector(s) approved.')
+            else:
+                n = bulk.reject_inspectors(request.user, ids)
+                messages.success(request, f'{n} inspector(s) rejected; their accounts are being removed.')
+            return redirect('admin_approve_inspectors')
+        uid = request.POST.get('profile_id')
         profile = Profile.objects.get(pk=uid)
         if action == 'approve':
             profile.is_approved = True
             profile.save()
             messages.success(request, f'Inspector {profile.user.username} approved.')
         elif action == 'reject':
-            profile.user.delete()
-            messages.success(request, f'Inspector {profile.user.username} rejected and user removed.')
+            # Deleting here would cascade through every related row in this request
+            purge.deactivate([profile.user_id])
+            messages.success(request, f'Inspector {profile.user.username} rejected; the account is being removed.')
         return redirect('admin_dashboard')
-    pending = Profile.objects.filter(user_type='Inspector', is_approved=False)
+    pending = Profile.objects.filter(user_type='Inspector', is_approved=False, deactivated_at__isnull=True)
     return render(request, 'admin/approve_inspectors.html', {'pending': pending})
 
 
 @login_required
 def admin_assign_inspector(request, pk=None):
     from .models import Profile
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied.')
+        return redirect('dashboard_redirect')
     req = None
     if pk:
         req = get_object_or_404(InspectionRequest, pk=pk)
-    inspectors = User.objects.filter(profile__user_type='Inspector', profile__is_approved=True, profile__is_banned=False)
-    if request.method == 'POST':
-        inspector_id = request.POST.get('inspector')
-        inspector = User.objects.get(pk=inspector_id)
-        req.inspector = inspector
-        req.status = 'Assigned'
-        req.save()
+    if request.method == 'POST' and req is not None:
+        inspector = lookup.choice('assignable', request.POST.get('inspector'))
+        if inspector is None:
+            messages.error(request, 'Choose an approved inspector.')
+            return redirect(request.get_full_path())
+        with transaction.atomic():
+            old_status, old_inspector_id = req.status, req.inspector_id
+            if old_inspector_id != inspector.pk:
+                # The appointment was in the old inspector's calendar
+                req.appointment_start = req.appointment_end = None
+            req.inspector = inspector
+            req.status = 'Assigned'
+            req.save()
+            rollups.record_status_change(old_status, old_inspector_id, req)
+            notifications.record_status_change(old_status, old_inspector_id, req)
+            sync.record_reassignment(req, old_inspector_id)
+            # post_save only knows the new inspector; refresh the old one's pages too
+            transaction.on_commit(lambda: data_versions.bump_users(old_inspector_id))
+            transaction.on_commit(scheduling.schedule_soon)
         messages.success(request, 'Inspector assigned.')
         return redirect('admin_dashboard')
-    return render(request, 'admin/assign_inspector.html', {'inspectors': inspectors, 'request_obj': req})
+    return render(request, 'admin/assign_inspector.html', {'request_obj': req})
 
 
 @login_required
@@ -252,13 +365,22 @@ def admin_manage_complaints(request):
         messages.error(request, 'Permission denied.')
         return redirect('dashboard_redirect')
     from .models import Complaint, Profile
+    # Forms post back to the current URL; redirect there to keep the filters
+    queue_url = request.get_full_path()
     if request.method == 'POST':
-        cid = request.POST.get('complaint_id')
         action = request.POST.get('action')
+        if action == 'bulk_resolve':
+            n = bulk.resolve_complaints(request.user, bulk.parse_ids(request.POST.getlist('ids')))
+            messages.success(request, f'{n} complaint(s) marked resolved.')
+            return redirect(queue_url)
+        cid = request.POST.get('complaint_id')
         comp = get_object_or_404(Complaint, pk=cid)
+        was_resolved = comp.resolved
         if action == 'resolve':
             comp.resolved = True
             comp.save()
+            if not was_resolved:
+                rollups.record_complaint_resolved(comp)
             messages.success(request, f'Complaint {comp.pk} marked resolved.')
         elif action == 'ban' and comp.against_inspector:
             profile, _ = Profile.objects.get_or_create(user=comp.against_inspector)
@@ -275,12 +397,74 @@ def admin_manage_complaints(request):
             comp.admin_response = resp
             comp.resolved = True
             comp.save()
+            if not was_resolved:
+                rollups.record_complaint_resolved(comp)
             messages.success(request, f'Responded to complaint {comp.pk}.')
+        return redirect(queue_url)
+
+    state = request.GET.get('state')
+    if state not in triage.STATES:
+        state = 'all'
+    try:
+        inspector_id = int(request.GET.get('inspector') or 0) or None
+        age = int(request.GET.get('age') or 0)
+        after = triage.decode_cursor(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        messages.error(request, 'Invalid filter.')
         return redirect('admin_manage_complaints')
+    if age not in triage.AGE_CHOICES:
+        age = None
+    complaints, next_cursor = triage.queue(state, inspector_id, age, after)
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['after'] = next_cursor
+        next_url = f'?{params.urlencode()}'
+    counts = triage.inspector_counts()
+    first_page = request.GET.copy()
+    first_page.pop('after', None)
+    return render(request, 'admin/complaints.html', {
+        'complaints': complaints,
+        'inspector_counts': counts,
+        'flagged_ids': {row['inspector_id'] for row in counts if row['flagged']},
+        'flag_threshold': triage.flag_threshold(),
+        'state': state,
+        'inspector_id': inspector_id,
+        'age': age,
+        'age_choices': triage.AGE_CHOICES,
+        'next_url': next_url,
+        'first_page_url': f'?{first_page.urlencode()}' if after else None,
+    })
 
-    complaints = Complaint.objects.all().order_by('-created_at')
-    return render(request, 'admin/complaints.html', {'complaints': complaints})
 
+@login_required
+def admin_bulk_requests(request):
+    """Set the fee of, or assign an inspector to, the requests ticked on the admin dashboard."""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied.')
+        return redirect('dashboard_redirect')
+    if request.method != 'POST':
+        return redirect('admin_dashboard')
+    ids = bulk.parse_ids(request.POST.getlist('ids'))
+    action = request.POST.get('action')
+    if not ids:
+        messages.error(request, 'Select at least one request.')
+    elif action == 'bulk_fee':
+        try:
+            fee = bulk.parse_fee(request.POST.get('fee'))
+        except ValueError as exc:
+            messages.error(request, str(exc))
+        else:
+            n = bulk.set_fee(request.user, ids, fee)
+            messages.success(request, f'Fee set to {fee} for {n} request(s).')
+    elif action == 'bulk_assign':
+        inspector = lookup.choice('assignable', request.POST.get('inspector'))
+        if inspector is None:
+            messages.error(request, 'Choose an approved inspector.')
+        else:
+            n = bulk.assign_inspector(request.user, ids, inspector)
+            messages.success(request, f'{inspector.username} assigned to {n} request(s).')
+    return redirect('admin_dashboard')
 
 @login_required
 def admin_set_fee(request, pk):
@@ -290,26 +474,41 @@ def admin_set_fee(request, pk):
         return redirect('dashboard_redirect')
     req = get_object_or_404(InspectionRequest, pk=pk)
     if request.method == 'POST':
-        fee = request.POST.get('fee')
         try:
-            req.fee = float(fee)
-            req.save()
+            fee = bulk.parse_fee(request.POST.get('fee'))
+        except ValueError as exc:
+            messages.error(request, str(exc))
+        else:
+            # Same path as the bulk action: audited, and kept by fee recomputation
+            bulk.set_fee(request.user, [req.pk], fee)
             messages.success(request, f'Fee updated for request {req.pk}.')
             return redirect('admin_dashboard')
-        except (TypeError, ValueError):
-            messages.error(request, 'Invalid fee value.')
     return render(request, 'admin/set_fee.html', {'request_obj': req})
 
 
+USER_SORTS = {
+    'username': ('user__username',),
+    # Counter columns: an index scan on profile_workload_idx / profile_requests_idx
+    'workload': ('-open_inspections', '-id'),
+    'requests': ('-requests_owned', '-id'),
+}
+# Flagged inspector scorecards shown above the user list
+FLAGGED_SCORECARDS = 20
+
+
 @login_required
 def admin_view_users(request):
     if not request.user.is_staff:
         messages.error(request, 'Permission denied.')
         return redirect('dashboard_redirect')
-    users = User.objects.all().order_by('username')
     from .models import Profile
     if request.method == 'POST':
         action = request.POST.get('action')
+        if action in ('bulk_ban', 'bulk_unban'):
+            banned = action == 'bulk_ban'
+            n = bulk.set_banned(request.user, bulk.parse_ids(request.POST.getlist('ids')), banned)
+            messages.success(request, f'{n} user(s) {"banned" if banned else "unbanned"}.')
+            return redirect('admin_view_users')
         uid = request.POST.get('user_id')
         user = get_object_or_404(User, pk=uid)
         profile, _ = Profile.objects.get_or_create(user=user)
@@ -321,15 +520,45 @@ def admin_view_users(request):
             profile.is_banned = False
             profile.save()
             messages.success(request, f'User {user.username} unbanned.')
+        elif action == 'remove' and user != request.user:
+            purge.deactivate([user.pk])
+            messages.success(request, f'User {user.username} deactivated; the account is being removed.')
         return redirect('admin_view_users')
-    # attach profile and counts
-    user_rows = []
-    for u in users:
-        profile, _ = Profile.objects.get_or_create(user=u)
-        inspections_count = InspectionRequest.objects.filter(owner=u).count()
-        assigned_count = InspectionRequest.objects.filter(inspector=u).count()
-        user_rows.append({'user': u, 'profile': profile, 'inspections_count': inspections_count, 'assigned_count': assigned_count})
-    return render(request, 'admin/users.html', {'users': user_rows})
+    # Counts come from the Profile counter columns (myapp/counters.py), no per-user COUNT(*)
+    from .paginators import EstimatedCountPaginator
+    user_type = request.GET.get('type') or ''
+    if user_type not in dict(Profile.USER_TYPES):
+        user_type = ''
+    sort = request.GET.get('sort')
+    if sort not in USER_SORTS:
+        sort = 'username'
+    profiles = Profile.objects.select_related('user')
+    if user_type:
+        profiles = profiles.filter(user_type=user_type)
+    page = EstimatedCountPaginator(profiles.order_by(*USER_SORTS[sort]), 50).get_page(request.GET.get('page'))
+    from .scorecards import inspector_scorecards
+    # Only the flagged inspectors here; admin_scorecards pages through all of them
+    scorecards = inspector_scorecards()
+    return render(request, 'admin/users.html', {
+        'page': page,
+        'sort': sort,
+        'user_type': user_type,
+        'user_types': [value for value, _ in Profile.USER_TYPES],
+        'flagged': [card for card in scorecards if card['flags']][:FLAGGED_SCORECARDS],
+        'inspector_count': len(scorecards),
+    })
+
+
+@login_required
+def admin_scorecards(request):
+    """Every inspector's scorecard, busiest first, a page at a time."""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied.')
+        return redirect('dashboard_redirect')
+    from django.core.paginator import Paginator
+    from .scorecards import inspector_scorecards
+    page = Paginator(inspector_scorecards(), 50).get_page(request.GET.get('page'))
+    return render(request, 'admin/scorecards.html', {'page': page})
 
 
 @login_required
@@ -340,107 +569,201 @@ def inspector_inspection_view(request, pk):
         action = request.POST.get('action')
         if action == 'approve':
             # create report
-            structural = request.POST.get('structural')
-            checklist = request.POST.get('checklist')
-            decision = 'Approved'
-            report = InspectionReport.objects.create(
-                inspection_request=req,
-                inspector=request.user,
-                structural_evaluation=structural,
-                compliance_checklist=checklist,
-                decision=decision,
-                remarks=request.POST.get('remarks','')
+            report = inspections.file_report(
+                req, request.user, 'Approved',
+                structural_evaluation=request.POST.get('structural'),
+                compliance_checklist=request.POST.get('checklist'),
+                remarks=request.POST.get('remarks', ''),
             )
-            req.status = 'Approved'
-            req.save()
             messages.success(request, 'Inspection approved and report generated.')
             return redirect('view_report', pk=report.pk)
         elif action == 'reject':
             reason = request.POST.get('reason')
-            report = InspectionReport.objects.create(inspection_request=req, inspector=request.user, decision='Rejected', remarks=reason)
-            req.status = 'Rejected'
-            req.save()
+            report = inspections.file_report(req, request.user, 'Rejected', remarks=reason)
             messages.success(request, 'Inspection rejected.')
             return redirect('view_report', pk=report.pk)
-    return render(request, 'inspector/inspect_request.html', {'req': req})
+        elif action == 'schedule':
+            from datetime import datetime
+            if req.inspector_id != request.user.pk:
+                raise Http404
+            try:
+                start = datetime.fromisoformat(request.POST.get('appointment') or '')
+            except ValueError:
+                messages.error(request, 'Choose a date and time.')
+                return redirect('inspector_inspection', pk=req.pk)
+            try:
+                scheduling.book(req, start)
+            except ValueError as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, 'Appointment booked.')
+            return redirect('inspector_inspection', pk=req.pk)
+    suggested = None
+    if req.inspector_id == request.user.pk and req.status in scheduling.BOOKED_STATUSES:
+        suggested = scheduling.suggest(req)
+    return render(request, 'inspector/inspect_request.html', {'req': req, 'suggested': suggested})
 
 
 @login_required
+@rate_limit('user_lookup', '120/m')
+def user_lookup(request):
+    """Typeahead: ``?scope=recipients|inspectors|assignable&q=<prefix>``, JSON list of users."""
+    scope = request.GET.get('scope')
+    if scope not in lookup.SCOPES or (scope in lookup.STAFF_SCOPES and not request.user.is_staff):
+        return JsonResponse({'error': 'Unknown scope.'}, status=404)
+    results = lookup.search(scope, request.GET.get('q', ''))
+    if scope == 'recipients':
+        # Cached per query for everyone; drop the asking user here
+        results = [row for row in results if row['id'] != request.user.pk]
+    return set_private_cache_headers(JsonResponse({'results': results}))
+
+
+@login_required
+@rate_limit('send_message', '20/m')
 def send_message(request):
     """Send a new internal message to another user."""
-    # Restrict recipients to Admins and Inspectors only
-    users = User.objects.filter(profile__user_type__in=['Admin', 'Inspector']).exclude(pk=request.user.pk)
     if request.method == 'POST':
-        recipient_id = request.POST.get('recipient')
+        # Recipients are Admins and Inspectors only, picked with the typeahead user lookup
+        recipient = lookup.choice('recipients', request.POST.get('recipient'))
         subject = request.POST.get('subject', '')
         body = request.POST.get('body', '')
-        recipient = get_object_or_404(User, pk=recipient_id)
+        if recipient is None or recipient == request.user:
+            messages.error(request, 'Choose an admin or inspector to write to.')
+            return render(request, 'messages/send.html', {'subject': subject, 'body': body})
         Message.objects.create(sender=request.user, recipient=recipient, subject=subject, body=body)
+        counters.record_messages_sent([recipient.pk])
         messages.success(request, 'Message sent.')
         return redirect('inbox')
-    return render(request, 'messages/send.html', {'users': users})
+    return render(request, 'messages/send.html')
 
 
 @login_required
 def view_message(request, pk):
     """View a received message and optionally reply."""
-    msg = get_object_or_404(Message, pk=pk)
+    from .models import ArchivedMessage
+    msg = Message.objects.filter(pk=pk).first() or get_object_or_404(ArchivedMessage, pk=pk)
     # Only allow recipient or sender to view (recipient can reply)
     if request.user != msg.recipient and request.user != msg.sender:
         messages.error(request, 'Permission denied.')
         return redirect('inbox')
     if request.user == msg.recipient and not msg.is_read:
+        # Conditional UPDATE: only the request that flips the flag decrements the counter
+        if Message.objects.filter(pk=msg.pk, is_read=False).update(is_read=True, updated_at=timezone.now()):
+            counters.record_message_read(msg.recipient_id)
+            transaction.on_commit(lambda: data_versions.bump_users(msg.sender_id, msg.recipient_id))
         msg.is_read = True
-        msg.save()
     if request.method == 'POST':
         # reply
         reply_body = request.POST.get('body', '')
         Message.objects.create(sender=request.user, recipient=msg.sender, subject=f'Re: {msg.subject}', body=reply_body)
+        counters.record_messages_sent([msg.sender_id])
         messages.success(request, 'Reply sent.')
         return redirect('inbox')
     return render(request, 'messages/view.html', {'msg': msg})
 
 
+@login_required
+def view_broadcast(request, pk):
+    """Show an announcement and record that the user has read it."""
+    from .models import Broadcast, BroadcastReceipt
+    if request.user.is_staff:
+        broadcast = get_object_or_404(Broadcast.objects.select_related('sender'), pk=pk)
+    else:
+        broadcast = get_object_or_404(Broadcast.objects.for_user(request.user).select_related('sender'), pk=pk)
+    if not request.user.is_staff and not broadcast.is_read:
+        # The read marker is the only per-user row, created on first view
+        BroadcastReceipt.objects.get_or_create(broadcast=broadcast, user=request.user)
+    return render(request, 'messages/broadcast.html', {'broadcast': broadcast})
+
+
+@login_required
+def admin_broadcast(request):
+    """Send an announcement to every owner, every inspector or everyone."""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied.')
+        return redirect('dashboard_redirect')
+    from django.db.models import Count
+    from .models import Broadcast
+    if request.method == 'POST':
+        audience = request.POST.get('audience', 'All')
+        subject = request.POST.get('subject', '').strip()
+        body = request.POST.get('body', '')
+        if audience not in dict(Broadcast.AUDIENCES) or not subject:
+            messages.error(request, 'Choose an audience and enter a subject.')
+        else:
+            # One row regardless of how many users are in the audience
+            Broadcast.objects.create(sender=request.user, audience=audience, subject=subject, body=body)
+            messages.success(request, 'Announcement sent.')
+            return redirect('admin_broadcast')
+    sent = (Broadcast.objects.select_related('sender').defer('body')
+            .annotate(reads=Count('receipts')).order_by('-sent_at')[:50])
+    return render(request, 'admin/broadcast.html', {'audiences': Broadcast.AUDIENCES, 'sent': sent})
+
+
+def _report_for_view(pk):
+    """Load a report with owner joined and text columns deferred, archived or not."""
+    from .models import REPORT_TEXT_FIELDS, ArchivedInspectionReport
+    for model in (InspectionReport, ArchivedInspectionReport):
+        report = (model.objects.select_related('inspection_request__owner')
+                  .defer(*REPORT_TEXT_FIELDS).filter(pk=pk).first())
+        if report is not None:
+            return report
+    raise Http404('No report matches the given query.')
+
+
 @login_required
 def view_report(request, pk):
     """Render an inspection report for viewing by owner, inspector, or admin."""
-    report = get_object_or_404(InspectionReport, pk=pk)
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date, quote_etag
+    from django.utils.safestring import mark_safe
+    from . import report_cache
+    report = _report_for_view(pk)
     # permission: owner, inspector, or staff
     if request.user != report.inspection_request.owner and request.user != report.inspector and not request.user.is_staff:
         messages.error(request, 'Permission denied.')
         return redirect('dashboard_redirect')
-    return render(request, 'inspector/report.html', {'report': report})
+    digest = report_cache.report_digest(report)
+    # The page chrome shows the username, so the page ETag is per user
+    etag = quote_etag(f'{digest}-{request.user.pk}')
+    last_modified = int(report.updated_at.timestamp())
+    # A page showing a flash message must be neither a 304 nor revalidated later
+    flash = len(messages.get_messages(request))
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None and not flash:
+        return set_private_cache_headers(not_modified)
+    report_html = mark_safe(report_cache.get_artifact(report, 'html', digest).decode('utf-8'))
+    resp = render(request, 'inspector/report.html', {'report': report, 'report_html': report_html})
+    if not flash:
+        resp['ETag'] = etag
+        resp['Last-Modified'] = http_date(last_modified)
+    return set_private_cache_headers(resp)
 
 
 @login_required
 def download_report(request, pk):
     """Provide a simple text download of the inspection report."""
-    report = get_object_or_404(InspectionReport, pk=pk)
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date, quote_etag
+    from . import report_cache
+    report = _report_for_view(pk)
     if request.user != report.inspection_request.owner and request.user != report.inspector and not request.user.is_staff:
         messages.error(request, 'Permission denied.')
         return redirect('dashboard_redirect')
 
-    lines = []
-    lines.append(f"Inspection Report #{report.pk}")
-    lines.append(f"Owner: {report.inspection_request.owner.username} ({report.inspection_request.owner.email})")
-    lines.append(f"Building location: {report.inspection_request.building_location}")
-    lines.append(f"Inspection date: {report.inspection_date}")
-    lines.append("")
-    lines.append("Structural safety evaluation:")
-    lines.append(report.structural_evaluation or '(none)')
-    lines.append("")
-    lines.append("Compliance checklist:")
-    lines.append(report.compliance_checklist or '(none)')
-    lines.append("")
-    lines.append(f"Decision: {report.decision}")
-    lines.append("")
-    lines.append("Remarks:")
-    lines.append(report.remarks or '(none)')
-
-    content = "\n".join(lines)
+    digest = report_cache.report_digest(report)
+    etag = quote_etag(digest)
+    last_modified = int(report.updated_at.timestamp())
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return set_private_cache_headers(not_modified)
+
+    content = report_cache.get_artifact(report, 'txt', digest)
     resp = HttpResponse(content, content_type='text/plain; charset=utf-8')
     resp['Content-Disposition'] = f'attachment; filename=inspection_report_{report.pk}.txt'
-    return resp
+    resp['ETag'] = etag
+    resp['Last-Modified'] = http_date(last_modified)
+    return set_private_cache_headers(resp)
 
 
 from django.contrib.auth import logout
@@ -468,6 +791,9 @@ def custom_logout(request):
     response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
     response['Pragma'] = 'no-cache'
     response['Expires'] = '0'
+    # Pages kept for revalidation (AUTH_CACHE_MODE = 'revalidate') must not
+    # be shown from the browser cache or back/forward cache after logout
+    response['Clear-Site-Data'] = '"cache"'
     
     return response
 
@@ -494,37 +820,88 @@ def dashboard_redirect(request):
         return redirect('home')
 
 
+DASHBOARD_PAGE_SIZE = 25
+
+
+def _dashboard_page(request, requests, archived):
+    """
+    One page of a dashboard listing, newest first, plus the filter and paging context.
+
+    Pages with ``?before=<id>`` (keyset on the request_owner_idx /
+    request_inspector_idx indexes) rather than OFFSET and COUNT(*), so the
+    first page costs the same for 5 requests or 5,000. ``?status=`` filters.
+    ``archived`` is the matching ArchivedInspectionRequest queryset; its rows
+    are merged into the page by id.
+    """
+    status = request.GET.get('status') or ''
+    if status not in dict(InspectionRequest.STATUS_CHOICES):
+        status = ''
+    if status:
+        requests = requests.filter(status=status)
+        archived = archived.filter(status=status) if status in archive.CLOSED_STATUSES else archived.none()
+    try:
+        before = int(request.GET.get('before') or 0)
+    except ValueError:
+        before = 0
+    if before:
+        requests = requests.filter(id__lt=before)
+        archived = archived.filter(id__lt=before)
+    # Report, owner, inspector and payments come in with the page query, one per table
+    rows = archive.merge_newest(
+        *(list(qs.for_listing().with_payments().order_by('-id')[:DASHBOARD_PAGE_SIZE + 1])
+          for qs in (requests, archived)),
+        DASHBOARD_PAGE_SIZE + 1,
+    )
+    next_url = first_page_url = None
+    params = request.GET.copy()
+    if len(rows) > DASHBOARD_PAGE_SIZE:
+        rows = rows[:DASHBOARD_PAGE_SIZE]
+        params['before'] = rows[-1].pk
+        next_url = f'?{params.urlencode()}'
+    if before:
+        params.pop('before', None)
+        first_page_url = f'?{params.urlencode()}'
+    return {
+        'data': rows,
+        'status': status,
+        'status_choices': [value for value, _ in InspectionRequest.STATUS_CHOICES],
+        'next_url': next_url,
+        'first_page_url': first_page_url,
+    }
+
+
 @login_required
 @role_required('Owner')
-@never_cache
+@revalidate()
 def owner_dashboard(request):
     """
     Show inspection requests for the logged-in building owner.
     """
-    requests = list(InspectionRequest.objects.filter(owner=request.user))
-    from .models import InspectionReport
-    for req in requests:
-        try:
-            req.report_obj = req.report
-        except InspectionReport.DoesNotExist:
-            req.report_obj = None
-    return render(request, 'owner/dashboard.html', {'data': requests})
+    from .models import ArchivedInspectionRequest
+    context = _dashboard_page(request, InspectionRequest.objects.filter(owner=request.user),
+                              ArchivedInspectionRequest.objects.filter(owner=request.user))
+    for req in context['data']:
+        # Cached by select_related, None when there is no report; no query
+        req.report_obj = getattr(req, 'report', None)
+    return render(request, 'owner/dashboard.html', context)
 
 
 @login_required
 @role_required('Inspector')
-@never_cache
+@revalidate()
 def inspector_dashboard(request):
     """
     Show inspection requests assigned to the logged-in inspector.
     """
-    requests = InspectionRequest.objects.filter(inspector=request.user)
-    return render(request, 'inspector/dashboard.html', {'data': requests})
+    from .models import ArchivedInspectionRequest
+    context = _dashboard_page(request, InspectionRequest.objects.filter(inspector=request.user),
+                              ArchivedInspectionRequest.objects.filter(inspector=request.user))
+    return render(request, 'inspector/dashboard.html', context)
 
 
 @login_required
 @role_required('Admin')
-@never_cache
+@revalidate(data_versions.ADMIN)
 def admin_dashboard(request):
     """
     Show all inspection requests to admin with optional balance info.
@@ -536,5 +913,43 @@ def admin_dashboard(request):
     return render(request, 'admin/dashboard.html', {
         'data': requests, 
         'admin_balance': admin_balance_obj, 
-        'pending_inspectors': pending_inspectors
-    })
\ No newline at end of file
+        'pending_inspectors': pending_inspectors,
+        'stats': rollups.dashboard_stats(),
+    })
+
+@login_required
+@role_required('Admin')
+@revalidate(data_versions.ADMIN)
+def admin_analytics(request):
+    """
+    Payment, throughput and inspector approval trends for management.
+    """
+    from . import analytics
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in analytics.GRANULARITIES:
+        granularity = 'day'
+    try:
+        periods = int(request.GET.get('periods', 30))
+    except ValueError:
+        periods = 30
+    series = analytics.time_series(granularity, periods)
+    return render(request, 'admin/analytics.html', {
+        'series': series,
+        'granularities': analytics.GRANULARITIES,
+        'periods': periods,
+    })
+
+
+@login_required
+@role_required('Admin')
+@revalidate(data_versions.ADMIN)
+def admin_analytics_data(request):
+    """JSON version of admin_analytics, same `granularity` and `periods` parameters."""
+    from django.http import JsonResponse
+    from . import analytics
+    try:
+        series = analytics.time_series(request.GET.get('granularity', 'day'),
+                                       int(request.GET.get('periods', 30)))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(series)
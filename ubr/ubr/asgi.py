@@ -11,6 +11,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ubr.settings')
+# UBR_ENV=production selects ubr/settings_production.py
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ubr.settings_production' if os.environ.get('UBR_ENV') == 'production' else 'ubr.settings')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +51,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'myapp.middleware.SessionSecurityMiddleware',
     'myapp.middleware.LoginRequiredMiddleware',
+    'myapp.middleware.ReplicaRoutingMiddleware',
 ]
 
 # Session settings for enhanced security
@@ -62,6 +64,14 @@ SESSION_COOKIE_SAMESITE = 'Lax'  # CSRF protection
 
 # Cache settings to prevent page caching
 CACHE_MIDDLEWARE_SECONDS = 0
+# Authenticated pages decorated with @revalidate (myapp/decorators.py):
+# 'revalidate' sends them as `private, no-cache` with an ETag built from
+# per-user data versions, so unchanged pages get a 304; 'no-store' never
+# lets the browser keep them. Other authenticated pages are always no-store.
+# The data versions live in the cache, and without CACHES each process has
+# its own: bumps made by `run_workers` would never reach the web process.
+# Only switch to 'revalidate' with a shared cache (see settings_production.py).
+AUTH_CACHE_MODE = 'no-store'
 
 ROOT_URLCONF = 'ubr.urls'
 
@@ -113,6 +123,42 @@ DATABASES = {
     }
 }
 
+# Opt-in SQLite tuning for single-node deployments (UBR_SQLITE_TUNED=1).
+# Applied to every new connection: WAL lets readers run alongside the
+# writer, synchronous=NORMAL is durable in WAL mode without an fsync per
+# commit, mmap/cache_size keep hot pages in memory, and BEGIN IMMEDIATE
+# takes the write lock up front so transactions queue on the busy timeout
+# instead of failing with "database is locked" when upgrading from read.
+# Compare with `manage.py stress_sqlite`.
+SQLITE_TUNED_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=268435456;'
+        'PRAGMA cache_size=-65536;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    # Seconds to wait on a locked database (sets busy_timeout)
+    'timeout': 20,
+}
+if os.environ.get('UBR_SQLITE_TUNED') == '1':
+    DATABASES['default']['OPTIONS'] = dict(SQLITE_TUNED_OPTIONS)
+
+# Optional read replica. Locally, point UBR_REPLICA_DB at a copy of
+# db.sqlite3 (see `manage.py simulate_replica_lag`).
+if os.environ.get('UBR_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['UBR_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Dashboard/inbox/report reads go to a replica; writers stick to the
+# primary for REPLICA_STICKY_SECONDS (see myapp/db_router.py).
+DATABASE_ROUTERS = ['myapp.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+REPLICA_STICKY_SECONDS = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -155,6 +201,70 @@ STATIC_URL = 'static/'
 # Use BASE_DIR.parent to point to that directory so runserver can find `/static/css/style.css`.
 STATICFILES_DIRS = [BASE_DIR.parent / "static"]
 
+# Background jobs (myapp/jobs.py). Run workers with `manage.py run_workers`;
+# JOBS_EAGER runs queued jobs inline instead, for setups without a worker.
+JOBS_EAGER = False
+JOBS_LOCK_TIMEOUT = 15 * 60  # seconds before a 'running' job is considered abandoned
+JOBS_REQUEUE_INTERVAL = 60  # seconds between a worker's sweeps for abandoned jobs
+
+# Status-change notifications (myapp/notifications.py): events for the same
+# recipient within NOTIFICATION_BATCH_SECONDS are delivered as one message.
+NOTIFICATION_BATCH_SECONDS = 30
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_EMAILS = True
+# Local development writes emails to files instead of talking to SMTP
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = BASE_DIR / 'cache' / 'emails'
+DEFAULT_FROM_EMAIL = 'notifications@ubr.local'
+
+# Rate limiting (myapp/ratelimit.py, @rate_limit in myapp/decorators.py).
+# RATELIMITS overrides the rate of a throttled view by name, e.g. {'login': '20/m'}.
+RATELIMIT_ENABLED = True
+RATELIMITS = {}
+# Set to 'HTTP_X_FORWARDED_FOR' when running behind a trusted reverse proxy
+RATELIMIT_IP_HEADER = None
+
+# Removed accounts are purged by background jobs (myapp/purge.py): one batch of
+# PURGE_BATCH_SIZE rows per job run, runs PURGE_PAUSE_SECONDS apart
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE_SECONDS = 1
+
+# Inspection fees (myapp/fees.py): charged when no FeeRule matches a request
+DEFAULT_INSPECTION_FEE = '500.00'
+
+# Typeahead user lookup (myapp/lookup.py): results per query, and how long a
+# query's results are cached
+LOOKUP_MAX_RESULTS = 10
+LOOKUP_CACHE_SECONDS = 30
+
+# Appointment booking (myapp/scheduling.py, manage.py schedule_appointments):
+# length of an inspection visit, and how far ahead the scheduler books
+APPOINTMENT_MINUTES = 60
+SCHEDULE_HORIZON_DAYS = 30
+
+# Hot/cold archival (myapp/archive.py, manage.py archive_closed_records): closed
+# requests and read messages untouched for this many days move to the archive
+# tables, ARCHIVE_BATCH_SIZE rows per transaction
+ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_MESSAGES_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 500
+
+# Offline sync (myapp/sync.py)
+SYNC_PAGE_SIZE = 500
+SYNC_CURSOR_LAG_SECONDS = 10
+SYNC_TOMBSTONE_DAYS = 30
+
+# Admin changelists (myapp/paginators.py): tables estimated above this many
+# rows are paged with the database's row estimate instead of COUNT(*)
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Admin complaint triage (myapp/triage.py): inspectors with at least this many
+# open complaints are flagged
+COMPLAINT_FLAG_THRESHOLD = 3
+
+# Rendered report artifacts (text download, HTML body), see myapp/report_cache.py
+REPORT_CACHE_DIR = BASE_DIR / 'cache' / 'reports'
+
 
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
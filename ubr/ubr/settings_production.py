@@ -0,0 +1,137 @@
+"""
+Production settings for ubr project.
+
+Selected by setting ``UBR_ENV=production`` (see manage.py, wsgi.py and
+asgi.py); everything not overridden here comes from ``ubr/settings.py``.
+All values are read from the environment:
+
+    UBR_SECRET_KEY          required
+    UBR_ALLOWED_HOSTS       comma separated host names
+    UBR_DB_ENGINE           django.db.backends.{sqlite3,postgresql,mysql}
+    UBR_DB_NAME / UBR_DB_USER / UBR_DB_PASSWORD / UBR_DB_HOST / UBR_DB_PORT
+    UBR_DB_CONN_MAX_AGE     seconds to keep a connection open (default 600)
+    UBR_SQLITE_TUNED        1 to apply SQLITE_TUNED_OPTIONS from settings.py
+    UBR_CACHE_BACKEND       locmem, file, db, redis or memcached (default locmem)
+    UBR_CACHE_LOCATION      backend location (path, table, URL or host:port)
+    UBR_CACHE_TIMEOUT       default cache timeout in seconds (default 300)
+    UBR_RATELIMIT_IP_HEADER e.g. HTTP_X_FORWARDED_FOR behind a trusted proxy
+    UBR_EMAIL_HOST          SMTP server for notification emails (unset: emails off)
+    UBR_EMAIL_PORT / UBR_EMAIL_USER / UBR_EMAIL_PASSWORD / UBR_EMAIL_USE_TLS
+    UBR_DEFAULT_FROM_EMAIL  sender address of notification emails
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, SQLITE_TUNED_OPTIONS, TEMPLATES
+
+
+def env(name, default=None):
+    return os.environ.get(name, default)
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+SECRET_KEY = env('UBR_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('UBR_SECRET_KEY must be set when UBR_ENV=production')
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host.strip() for host in env('UBR_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+
+# Database
+# Persistent connections: reuse each connection for UBR_DB_CONN_MAX_AGE
+# seconds instead of opening one per request, and check it is still alive
+# before reusing it so a restarted database doesn't fail the next request.
+
+DATABASES['default'] = {
+    'ENGINE': env('UBR_DB_ENGINE', 'django.db.backends.sqlite3'),
+    'NAME': env('UBR_DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+    'USER': env('UBR_DB_USER', ''),
+    'PASSWORD': env('UBR_DB_PASSWORD', ''),
+    'HOST': env('UBR_DB_HOST', ''),
+    'PORT': env('UBR_DB_PORT', ''),
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and env('UBR_SQLITE_TUNED') == '1':
+    DATABASES['default']['OPTIONS'] = dict(SQLITE_TUNED_OPTIONS)
+for _db in DATABASES.values():
+    _db['CONN_MAX_AGE'] = env_int('UBR_DB_CONN_MAX_AGE', 600)
+    _db['CONN_HEALTH_CHECKS'] = True
+
+
+# Cache
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+_cache_backend = env('UBR_CACHE_BACKEND', 'locmem')
+if _cache_backend not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'UBR_CACHE_BACKEND must be one of {", ".join(CACHE_BACKENDS)}')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[_cache_backend],
+        'LOCATION': env('UBR_CACHE_LOCATION', {
+            'file': str(BASE_DIR / 'cache' / 'django'),
+            'db': 'ubr_cache',
+        }.get(_cache_backend, '')),
+        'TIMEOUT': env_int('UBR_CACHE_TIMEOUT', 300),
+        'KEY_PREFIX': 'ubr',
+    }
+}
+
+
+# Rate limiting
+# Buckets live in the cache above; use a shared backend (redis, memcached or
+# db) with several worker processes, or each process keeps its own limits.
+
+RATELIMIT_IP_HEADER = env('UBR_RATELIMIT_IP_HEADER') or None
+
+
+# Page revalidation needs data versions shared by every process, which a
+# per-process locmem cache can't provide
+AUTH_CACHE_MODE = 'no-store' if _cache_backend == 'locmem' else 'revalidate'
+
+
+# Templates
+# Compile each template once per process instead of on every render.
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+# Sessions
+# Sessions keep the 30 minute sliding expiry from settings.py; cached_db
+# serves session reads from the cache and only writes through to the DB.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+
+
+# Email
+# Notification batches reuse one SMTP connection (see myapp/notifications.py).
+
+EMAIL_HOST = env('UBR_EMAIL_HOST', '')
+NOTIFICATION_EMAILS = bool(EMAIL_HOST)
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_PORT = env_int('UBR_EMAIL_PORT', 587)
+EMAIL_HOST_USER = env('UBR_EMAIL_USER', '')
+EMAIL_HOST_PASSWORD = env('UBR_EMAIL_PASSWORD', '')
+EMAIL_USE_TLS = env('UBR_EMAIL_USE_TLS', '1') == '1'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = env('UBR_DEFAULT_FROM_EMAIL', 'notifications@' + (ALLOWED_HOSTS[0] if ALLOWED_HOSTS else 'localhost'))